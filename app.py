@@ -1,42 +1,115 @@
 import sys
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import QObject, pyqtSignal, QTimer
+import os
+import time
+from PyQt5.QtWidgets import QApplication, QMessageBox
+from PyQt5.QtCore import QObject, pyqtSignal
 from main_menu import MainMenuWindow
-from single_video_window import SingleVideoWindow
-from playlist_window import PlaylistWindow
 from splash_screen import SplashScreen
+from artifact_cleaner import ArtifactCleaner
+from job_queue import JobQueue
+import preload
+from startup_tasks import StartupLoader
+
+# Diretório de saída padrão das janelas de download
+DEFAULT_OUTPUT_DIRECTORY = os.path.join(os.path.expanduser("~"), "Audios")
 
 class YouTubeAudioExtractorApp(QObject):
-    """Classe principal que gerencia todas as janelas da aplicação"""
+    """
+    Classe principal que gerencia todas as janelas da aplicação.
+
+    Só o menu principal é construído na inicialização; as janelas de download
+    e o painel da fila (e os módulos que eles importam) são criados na
+    primeira navegação, e o yt-dlp é importado em segundo plano.
+    """
     
     def __init__(self):
         super().__init__()
+        start = time.perf_counter()
         
         # Inicializar splash screen primeiro
         self.splash = SplashScreen()
         
-        # Inicializar janelas
+        # Fila global de downloads, criada ao fim da inicialização (ver job_queue)
+        self._job_queue = None
+        self.daemon_client = None
+        
+        # Janelas criadas sob demanda (ver propriedades abaixo)
+        self._single_video_window = None
+        self._playlist_window = None
+        self._queue_panel = None
+        
+        # Inicializar menu principal
         self.main_menu = MainMenuWindow()
-        self.single_video_window = SingleVideoWindow()
-        self.playlist_window = PlaylistWindow()
+        self.startup_timings = {'interface': time.perf_counter() - start}
+        self.ffmpeg_info = None
+        self.library_watcher = None
         
         # Conectar sinais do menu principal
         self.main_menu.single_video_requested.connect(self.show_single_video_window)
         self.main_menu.playlist_requested.connect(self.show_playlist_window)
         
-        # Conectar sinais de volta ao menu
-        self.single_video_window.back_to_menu_requested.connect(self.show_main_menu)
-        self.playlist_window.back_to_menu_requested.connect(self.show_main_menu)
-        
         # Configurar fechamento da aplicação
         self.main_menu.closeEvent = self.close_application
-        self.single_video_window.closeEvent = self.close_application
-        self.playlist_window.closeEvent = self.close_application
+        
+        # Coletor de arquivos temporários órfãos (roda na inicialização e a cada hora);
+        # diretórios de saída escolhidos nas janelas entram pelo registro de temporários
+        self.artifact_cleaner = ArtifactCleaner([DEFAULT_OUTPUT_DIRECTORY])
+        
+    @property
+    def job_queue(self):
+        """
+        Fila global de downloads, compartilhada pelas janelas.
+
+        Com o daemon de extração disponível, a fila pertence a ele e os
+        downloads sobrevivem ao fechamento da interface; senão, é local.
+        """
+        if self._job_queue is None:
+            if self.daemon_client is not None:
+                from daemon_bridge import DaemonJobQueue
+                self._job_queue = DaemonJobQueue(self.daemon_client, parent=self)
+            else:
+                self._job_queue = JobQueue(max_concurrent=2, parent=self)
+        return self._job_queue
+        
+    @property
+    def single_video_window(self):
+        if self._single_video_window is None:
+            from single_video_window import SingleVideoWindow
+            window = SingleVideoWindow(self.job_queue)
+            window.back_to_menu_requested.connect(self.show_main_menu)
+            window.queue_panel_requested.connect(self.show_queue_panel)
+            window.closeEvent = self.close_application
+            self._single_video_window = window
+        return self._single_video_window
+        
+    @property
+    def playlist_window(self):
+        if self._playlist_window is None:
+            from playlist_window import PlaylistWindow
+            window = PlaylistWindow(self.job_queue)
+            window.back_to_menu_requested.connect(self.show_main_menu)
+            window.queue_panel_requested.connect(self.show_queue_panel)
+            window.closeEvent = self.close_application
+            self._playlist_window = window
+        return self._playlist_window
+        
+    @property
+    def queue_panel(self):
+        if self._queue_panel is None:
+            from queue_panel import QueuePanel
+            self._queue_panel = QueuePanel(self.job_queue)
+        return self._queue_panel
+        
+    def created_windows(self):
+        """Janelas de download e painel já construídos"""
+        return [w for w in (self._single_video_window, self._playlist_window, self._queue_panel)
+                if w is not None]
         
     def show_main_menu(self):
         """Mostrar o menu principal e esconder outras janelas"""
-        self.single_video_window.hide()
-        self.playlist_window.hide()
+        for window in (self._single_video_window, self._playlist_window):
+            if window is not None:
+                window.hide()
         self.main_menu.show()
         self.main_menu.raise_()
         self.main_menu.activateWindow()
@@ -44,7 +117,8 @@ class YouTubeAudioExtractorApp(QObject):
     def show_single_video_window(self):
         """Mostrar janela de vídeo único e esconder outras"""
         self.main_menu.hide()
-        self.playlist_window.hide()
+        if self._playlist_window is not None:
+            self._playlist_window.hide()
         self.single_video_window.show()
         self.single_video_window.raise_()
         self.single_video_window.activateWindow()
@@ -52,17 +126,30 @@ class YouTubeAudioExtractorApp(QObject):
     def show_playlist_window(self):
         """Mostrar janela de playlist e esconder outras"""
         self.main_menu.hide()
-        self.single_video_window.hide()
+        if self._single_video_window is not None:
+            self._single_video_window.hide()
         self.playlist_window.show()
         self.playlist_window.raise_()
         self.playlist_window.activateWindow()
         
+    def show_queue_panel(self):
+        """Mostrar o painel da fila de downloads sem esconder a janela atual"""
+        self.queue_panel.show()
+        self.queue_panel.raise_()
+        self.queue_panel.activateWindow()
+        
     def close_application(self, event):
         """Fechar toda a aplicação quando qualquer janela for fechada"""
+        self.artifact_cleaner.stop()
+        if self.library_watcher is not None:
+            self.library_watcher.stop()
+        if self._job_queue is not None:
+            self._job_queue.shutdown()
+        
         # Fechar todas as janelas
         self.main_menu.close()
-        self.single_video_window.close()
-        self.playlist_window.close()
+        for window in self.created_windows():
+            window.close()
         
         # Aceitar o evento de fechamento
         event.accept()
@@ -74,10 +161,38 @@ class YouTubeAudioExtractorApp(QObject):
         """Iniciar a aplicação mostrando primeiro a splash screen"""
         # Mostrar splash screen
         self.splash.show()
-        self.splash.start_loading()
         
-        # Timer para fechar splash e mostrar menu principal
-        QTimer.singleShot(3000, self.show_main_menu_after_splash)
+        # Limpar temporários de execuções anteriores em segundo plano
+        self.artifact_cleaner.start(interval=3600)
+        
+        # Importar o yt-dlp em segundo plano enquanto a splash é exibida
+        preload.start_preload()
+        
+        # A splash acompanha as etapas reais e fecha assim que terminarem
+        self.startup_loader = StartupLoader(self)
+        self.startup_loader.stage_started.connect(self.splash.set_stage)
+        self.startup_loader.ready.connect(self.on_startup_ready)
+        self.startup_loader.start()
+        
+    def on_startup_ready(self, report):
+        """Registrar os tempos de inicialização e trocar a splash pelo menu principal"""
+        self.startup_timings.update(report['timings'])
+        print("Inicialização: " + ", ".join(
+            f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in self.startup_timings.items()))
+        
+        self.ffmpeg_info = report['results'].get('ffmpeg')
+        self.daemon_client = report['results'].get('daemon')
+        self.library_watcher = report['results'].get('library')
+        if self.library_watcher is not None:
+            print(f"Biblioteca: {len(self.library_watcher.index)} arquivo(s) em "
+                  f"{self.library_watcher.base_directory} ({self.library_watcher.backend})")
+        self.splash.finish()
+        self.show_main_menu_after_splash()
+        
+        if not self.ffmpeg_info or not self.ffmpeg_info['path']:
+            QMessageBox.warning(self.main_menu, "Aviso",
+                                "FFmpeg não encontrado. Instale-o e adicione ao PATH para "
+                                "converter os áudios.")
         
     def show_main_menu_after_splash(self):
         """Mostrar menu principal após splash screen"""
@@ -86,6 +201,11 @@ class YouTubeAudioExtractorApp(QObject):
 
 def main():
     """Função principal da aplicação"""
+    # No executável do PyInstaller, o daemon de extração é este mesmo programa
+    if '--daemon' in sys.argv:
+        from extraction_daemon import main as daemon_main
+        sys.exit(daemon_main(['serve']))
+    
     # Criar aplicação Qt
     app = QApplication(sys.argv)
     
@@ -181,7 +301,7 @@ def main():
             margin-right: 5px;
         }
         
-        QTextEdit {
+        QTextEdit, QPlainTextEdit {
             border: 1px solid #ced4da;
             border-radius: 6px;
             background-color: #f8f9fa;
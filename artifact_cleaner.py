@@ -0,0 +1,323 @@
+import os
+import glob
+import time
+import fnmatch
+import tempfile
+import threading
+import shutil
+
+from staging import StagingArea, active_paths
+
+# Nomes temporários do próprio aplicativo deixados por execuções interrompidas.
+# Os .part, .ytdl e arquivos intermediários do yt-dlp não entram aqui: só são
+# removidos os registrados no ArtifactLedger, e nunca um arquivo do usuário.
+ORPHAN_PATTERNS = (
+    'temp_*',  # integrated_audio_extractor
+    '.*.tmp',  # cópias incompletas de atomic_move
+)
+
+ARTIFACTS_FILE = os.path.join(os.path.expanduser("~"), ".youtube_audio_extractor", "artifacts.log")
+
+# Arquivos que o yt-dlp cria a partir de um nome registrado
+TEMP_SUFFIXES = ('', '.part', '.ytdl')
+
+
+def format_bytes(size):
+    """Formata um tamanho em bytes para exibição (ex: '12.3 MB')."""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class ArtifactLedger:
+    """
+    Registro em disco dos arquivos temporários criados pelos downloads.
+
+    Cada linha é '+caminho' (arquivo temporário criado) ou '-caminho' (o
+    arquivo virou definitivo, ex: saída do FFmpegExtractAudio). As linhas
+    só são acrescentadas, então processos diferentes (interface, daemon,
+    linha de comando) podem registrar ao mesmo tempo; a compactação feita
+    pelo coletor pode perder um registro concorrente, o que só deixa o
+    arquivo sem limpeza automática.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): Arquivo do registro. Se None, usa ARTIFACTS_FILE
+        """
+        self.path = path or ARTIFACTS_FILE
+        self._recorded = set()  # evita uma escrita a cada progress_hook
+        self._lock = threading.Lock()
+
+    def _append(self, line):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        except OSError as e:
+            print(f"Erro ao gravar o registro de temporários {self.path}: {e}")
+
+    def record(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            if path in self._recorded:
+                return
+            self._recorded.add(path)
+            self._append('+' + path)
+
+    def forget(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            self._recorded.discard(path)
+            self._append('-' + path)
+
+    def paths(self):
+        """Retorna os caminhos registrados e ainda não esquecidos."""
+        paths = set()
+        with self._lock:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    for line in f:
+                        line = line.rstrip('\n')
+                        if line.startswith('+'):
+                            paths.add(line[1:])
+                        elif line.startswith('-'):
+                            paths.discard(line[1:])
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Erro ao ler o registro de temporários {self.path}: {e}")
+        return paths
+
+    def compact(self, paths):
+        """Regrava o registro só com `paths` (os que ainda existem no disco)."""
+        with self._lock:
+            try:
+                directory = os.path.dirname(self.path)
+                os.makedirs(directory, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(prefix='.artifacts.', suffix='.tmp', dir=directory)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.writelines(f"+{path}\n" for path in sorted(paths))
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"Erro ao compactar o registro de temporários {self.path}: {e}")
+
+
+def artifact_files(path):
+    """Arquivos existentes derivados de um caminho registrado (.part, .ytdl, fragmentos)."""
+    candidates = [path + suffix for suffix in TEMP_SUFFIXES]
+    candidates += glob.glob(glob.escape(path) + '.part-Frag*')
+    return [candidate for candidate in candidates if os.path.isfile(candidate)]
+
+
+_shared_ledger = None
+_shared_lock = threading.Lock()
+
+
+def shared_ledger():
+    """Retorna o ArtifactLedger do processo, criado na primeira chamada."""
+    global _shared_ledger
+    with _shared_lock:
+        if _shared_ledger is None:
+            _shared_ledger = ArtifactLedger()
+        return _shared_ledger
+
+
+class ArtifactCleaner:
+    """
+    Coletor de lixo para arquivos parciais e temporários órfãos.
+
+    Remove os temporários registrados no ArtifactLedger e, na biblioteca,
+    nos diretórios onde houve downloads e nos diretórios de rascunho,
+    arquivos que casam com ORPHAN_PATTERNS e diretórios de staging
+    abandonados, mais antigos que `min_age`. Diretórios registrados como ativos (ver staging.active_job)
+    são ignorados, assim como tudo que foi modificado recentemente, o que
+    protege downloads em andamento em outros processos.
+    """
+
+    def __init__(self, library_directories, scratch_directories=None, min_age=3600,
+                 patterns=ORPHAN_PATTERNS, on_report=None, ledger=None):
+        """
+        Args:
+            library_directories (list): Diretórios da biblioteca (varridos recursivamente)
+            scratch_directories (list): Diretórios de rascunho onde ficam os stagings.
+                                        Se None, usa o diretório temporário do sistema
+            min_age (float): Idade mínima, em segundos, para considerar um artefato órfão
+            patterns (tuple): Padrões de nome (fnmatch) dos artefatos
+            on_report (callable): Chamado com o dicionário de resultado de cada coleta
+            ledger (ArtifactLedger): Registro dos temporários. Se None, usa o do processo
+        """
+        self.library_directories = [os.path.abspath(d) for d in library_directories]
+        self.scratch_directories = [os.path.abspath(d) for d in
+                                    (scratch_directories or [tempfile.gettempdir()])]
+        self.min_age = min_age
+        self.patterns = tuple(patterns)
+        self.on_report = on_report
+        self.ledger = ledger or shared_ledger()
+
+        self._timer = None
+        self._stopped = True
+        self._lock = threading.Lock()
+
+    def _is_active(self, path, active):
+        return any(path == a or path.startswith(a + os.sep) for a in active)
+
+    def _is_old(self, mtime, now):
+        return now - mtime >= self.min_age
+
+    def find_orphans(self):
+        """
+        Procura artefatos órfãos sem removê-los.
+
+        Returns:
+            list: Tuplas (caminho, tamanho em bytes, é_diretório)
+        """
+        now = time.time()
+        active = active_paths()
+        found = {}
+
+        def consider(path):
+            if path in found or self._is_active(path, active):
+                return
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return
+            if self._is_old(stat.st_mtime, now):
+                found[path] = (path, stat.st_size, False)
+
+        registered = self.ledger.paths()
+        for path in registered:
+            for candidate in artifact_files(path):
+                consider(candidate)
+
+        # Diretórios onde houve downloads também recebem os temp_* e .tmp, mesmo fora da biblioteca padrão
+        download_directories = {os.path.dirname(path) for path in registered}
+        for directory in self.library_directories:
+            for root, dirs, files in os.walk(directory):
+                if self._is_active(root, active):
+                    dirs[:] = []
+                    continue
+                download_directories.discard(root)
+                for name in files:
+                    if any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns):
+                        consider(os.path.join(root, name))
+        for directory in download_directories:
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            for name in names:
+                if any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns):
+                    consider(os.path.join(directory, name))
+        orphans = list(found.values())
+
+        for directory in self.scratch_directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if not (entry.name.startswith(StagingArea.PREFIX) and entry.is_dir(follow_symlinks=False)):
+                    continue
+                if self._is_active(entry.path, active):
+                    continue
+                size, newest = self._tree_stats(entry.path)
+                if self._is_old(newest, now):
+                    orphans.append((entry.path, size, True))
+
+        return orphans
+
+    def _tree_stats(self, directory):
+        """Retorna (tamanho total, mtime mais recente) de uma árvore."""
+        total = 0
+        newest = os.stat(directory).st_mtime
+        for root, _dirs, files in os.walk(directory):
+            for name in files:
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                total += stat.st_size
+                newest = max(newest, stat.st_mtime)
+        return total, newest
+
+    def collect(self, dry_run=False):
+        """
+        Remove os artefatos órfãos encontrados.
+
+        Args:
+            dry_run (bool): Se True, apenas conta o que seria removido
+
+        Returns:
+            dict: {'removed': quantidade, 'bytes': bytes recuperados, 'failed': falhas}
+        """
+        with self._lock:
+            result = {'removed': 0, 'bytes': 0, 'failed': 0}
+            for path, size, is_dir in self.find_orphans():
+                if not dry_run:
+                    try:
+                        if is_dir:
+                            shutil.rmtree(path)
+                        else:
+                            os.remove(path)
+                    except OSError as e:
+                        print(f"Erro ao remover artefato {path}: {e}")
+                        result['failed'] += 1
+                        continue
+                result['removed'] += 1
+                result['bytes'] += size
+            if not dry_run:
+                # Registros cujos arquivos não existem mais (concluídos ou removidos) saem do registro
+                self.ledger.compact({path for path in self.ledger.paths() if artifact_files(path)})
+
+        print(f"Limpeza de temporários: {result['removed']} artefato(s), "
+              f"{format_bytes(result['bytes'])} recuperados")
+        if self.on_report:
+            self.on_report(result)
+        return result
+
+    def start(self, interval=3600, run_now=True):
+        """
+        Agenda coletas periódicas em segundo plano.
+
+        Args:
+            interval (float): Intervalo entre coletas, em segundos
+            run_now (bool): Se True, faz uma coleta imediatamente (ex: na inicialização)
+        """
+        self.stop()
+        self._stopped = False
+        self._schedule(0 if run_now else interval, interval)
+
+    def _schedule(self, delay, interval):
+        def run():
+            try:
+                self.collect()
+            except Exception as e:
+                print(f"Erro na limpeza de temporários: {e}")
+            if not self._stopped:
+                self._schedule(interval, interval)
+
+        self._timer = threading.Timer(delay, run)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def stop(self):
+        """Cancela as coletas agendadas."""
+        self._stopped = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+if __name__ == "__main__":
+    import sys
+
+    library = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.expanduser("~"), "Audios")
+    cleaner = ArtifactCleaner([library])
+    for path, size, _is_dir in cleaner.find_orphans():
+        print(f"{format_bytes(size):>10}  {path}")
+    cleaner.collect()
@@ -0,0 +1,302 @@
+"""
+Limite global de banda compartilhado por todos os downloads ativos.
+
+Cada tarefa recebe um token bucket próprio, aplicado no progress_hook do
+yt-dlp: quando a tarefa baixa mais do que sua parcela, o hook dorme até os
+tokens se recomporem, o que segura o laço de leitura do downloader. A taxa
+global é dividida de forma justa (water-filling) entre as tarefas que
+estão baixando no momento: tarefas com limite próprio abaixo da parcela
+ficam com o seu limite, e a sobra é redistribuída entre as demais.
+
+A taxa global pode vir de uma agenda por horário, por exemplo
+"22:00-07:00=ilimitado;07:00-22:00=2M". Tudo pode ser alterado em tempo
+de execução (interface, daemon e linha de comando).
+"""
+import re
+import time
+import threading
+from contextlib import contextmanager
+
+_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+_RATE_PATTERN = re.compile(r'^\s*(\d+(?:[.,]\d+)?)\s*([KMG]?)(?:i?B)?(?:/s)?\s*$', re.IGNORECASE)
+_UNLIMITED = ('', '0', 'ilimitado', 'unlimited', 'none', 'off')
+
+IDLE_AFTER = 3.0        # segundos sem progresso até a tarefa deixar de contar na divisão
+REALLOCATE_EVERY = 0.5  # intervalo mínimo entre recálculos da divisão, em segundos
+SLEEP_SLICE = 0.2       # esperas longas são fatiadas para pausa/cancelamento responderem
+
+
+def parse_rate(text):
+    """
+    Converte uma taxa como '2M', '500K', '1.5MB/s' ou 'ilimitado' em bytes/s.
+
+    Returns:
+        float: Bytes por segundo, ou None para ilimitado
+
+    Raises:
+        ValueError: Se o texto não é uma taxa válida
+    """
+    if text is None or isinstance(text, (int, float)):
+        return float(text) if text else None
+    if text.strip().lower() in _UNLIMITED:
+        return None
+    match = _RATE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Taxa inválida: {text!r} (ex: 500K, 2M, ilimitado)")
+    return float(match.group(1).replace(',', '.')) * _UNITS[match.group(2).upper()]
+
+
+def compact_rate(rate):
+    """Formata bytes/s no formato aceito por parse_rate (ex: '2M', '512K', 'ilimitado')."""
+    if rate is None:
+        return "ilimitado"
+    for suffix, size in (('G', 1024 ** 3), ('M', 1024 ** 2), ('K', 1024)):
+        if rate >= size:
+            return f"{rate / size:g}{suffix}"
+    return f"{rate:g}"
+
+
+def format_rate(rate):
+    """Formata bytes/s para exibição (ex: '2.0 MB/s' ou 'ilimitado')."""
+    if rate is None:
+        return "ilimitado"
+    for unit, size in (('GB', 1024 ** 3), ('MB', 1024 ** 2), ('KB', 1024)):
+        if rate >= size:
+            return f"{rate / size:.1f} {unit}/s"
+    return f"{rate:.0f} B/s"
+
+
+class BandwidthSchedule:
+    """Taxa global por faixa de horário; fora das faixas vale a taxa global configurada."""
+
+    def __init__(self, rules):
+        """
+        Args:
+            rules (list): Tuplas (início, fim, taxa) com início e fim em minutos desde
+                          meia-noite e taxa em bytes/s (None = ilimitado). Faixas que
+                          passam da meia-noite (ex: 22:00-07:00) são permitidas.
+        """
+        self.rules = list(rules)
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Lê uma agenda como "22:00-07:00=ilimitado;07:00-22:00=2M".
+
+        Raises:
+            ValueError: Se alguma faixa for inválida
+        """
+        rules = []
+        for part in re.split(r'[;,]', text or ''):
+            if not part.strip():
+                continue
+            match = re.match(r'^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*=\s*(.+)$', part)
+            if not match:
+                raise ValueError(f"Faixa de horário inválida: {part.strip()!r} (ex: 22:00-07:00=ilimitado)")
+            start_h, start_m, end_h, end_m, rate = match.groups()
+            if int(start_h) > 23 or int(end_h) > 24 or int(start_m) > 59 or int(end_m) > 59:
+                raise ValueError(f"Horário inválido: {part.strip()!r}")
+            rules.append((int(start_h) * 60 + int(start_m), int(end_h) * 60 + int(end_m), parse_rate(rate)))
+        return cls(rules)
+
+    def rule_at(self, when=None):
+        """
+        Retorna a regra em vigor no horário informado (padrão: agora), ou None.
+
+        Returns:
+            tuple: (início, fim, taxa) ou None se nenhuma faixa cobre o horário
+        """
+        local = time.localtime(when)
+        minute = local.tm_hour * 60 + local.tm_min
+        for rule in self.rules:
+            start, end, _rate = rule
+            if start <= end and start <= minute < end:
+                return rule
+            if start > end and (minute >= start or minute < end):
+                return rule
+        return None
+
+    def __str__(self):
+        return ";".join(f"{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}={compact_rate(rate)}"
+                        for start, end, rate in self.rules)
+
+
+class _TokenBucket:
+    """Token bucket com dívida: consumir além do saldo retorna quanto esperar."""
+
+    def __init__(self, rate=None, clock=time.monotonic):
+        self.rate = rate
+        self.clock = clock
+        self.tokens = 0.0
+        self.last = clock()
+
+    def consume(self, amount):
+        now = self.clock()
+        if self.rate is None:
+            self.last = now
+            self.tokens = 0.0
+            return 0.0
+        # Rajada máxima de 1 segundo de taxa (no mínimo 64 KB)
+        burst = max(self.rate, 64 * 1024)
+        self.tokens = min(burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        self.tokens -= amount
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class JobBandwidth:
+    """Progress_hook de uma tarefa registrada no limitador (ver BandwidthLimiter.job)."""
+
+    def __init__(self, limiter, key, control=None):
+        self.limiter = limiter
+        self.key = key
+        self.control = control
+        self.bucket = _TokenBucket(clock=limiter.clock)
+        self.share = None
+        self.last_active = None
+        self._downloaded = {}  # arquivo -> bytes já contados
+
+    def __call__(self, d):
+        filename = d.get('filename')
+        downloaded = d.get('downloaded_bytes') or 0
+        delta = max(0, downloaded - self._downloaded.get(filename, 0))
+        if d.get('status') == 'downloading':
+            self._downloaded[filename] = downloaded
+        else:
+            self._downloaded.pop(filename, None)
+        if delta:
+            self.limiter._throttle(self, delta)
+
+
+class BandwidthLimiter:
+    """
+    Divide uma taxa global entre as tarefas ativas, respeitando os limites de cada uma.
+
+    Uso:
+        with limiter.job(job_id, control=job_control) as hook:
+            extract_audio(url, progress_hooks=[hook], ...)
+    """
+
+    def __init__(self, global_rate=None, schedule=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        Args:
+            global_rate (float): Taxa global em bytes/s (None = ilimitado)
+            schedule (BandwidthSchedule): Agenda que substitui a taxa global nas suas faixas
+            clock (callable): Relógio monotônico (substituível em testes)
+            sleep (callable): Função de espera (substituível em testes)
+        """
+        self.global_rate = global_rate
+        self.schedule = schedule
+        self.clock = clock
+        self.sleep = sleep
+        self._job_rates = {}   # chave -> limite próprio em bytes/s
+        self._jobs = {}        # chave -> JobBandwidth
+        self._lock = threading.Lock()
+        self._allocated_at = None
+
+    # --- Configuração (pode ser chamada a qualquer momento) ---
+
+    def set_global_rate(self, rate):
+        with self._lock:
+            self.global_rate = rate
+            self._allocated_at = None
+
+    def set_schedule(self, schedule):
+        with self._lock:
+            self.schedule = schedule if schedule and schedule.rules else None
+            self._allocated_at = None
+
+    def set_job_rate(self, key, rate):
+        """Define (ou remove, com None) o limite próprio de uma tarefa."""
+        with self._lock:
+            if rate is None:
+                self._job_rates.pop(key, None)
+            else:
+                self._job_rates[key] = rate
+            self._allocated_at = None
+
+    def effective_global_rate(self):
+        """Taxa global em vigor agora, considerando a agenda."""
+        rule = self.schedule.rule_at() if self.schedule else None
+        return rule[2] if rule else self.global_rate
+
+    # --- Tarefas ---
+
+    @contextmanager
+    def job(self, key, control=None):
+        """
+        Registra uma tarefa enquanto o bloco `with` roda.
+
+        Args:
+            key: Identificação da tarefa (ex: job_id), usada por set_job_rate
+            control (JobControl): Se informado, pausa/cancelamento interrompem a espera
+
+        Yields:
+            JobBandwidth: progress_hook a passar ao yt-dlp
+        """
+        job = JobBandwidth(self, key, control)
+        with self._lock:
+            self._jobs[key] = job
+            self._allocated_at = None
+        try:
+            yield job
+        finally:
+            with self._lock:
+                if self._jobs.get(key) is job:
+                    del self._jobs[key]
+                self._allocated_at = None
+
+    def _allocate(self, now):
+        """Water-filling: divide a taxa global entre as tarefas baixando agora."""
+        total = self.effective_global_rate()
+        active = [job for job in self._jobs.values()
+                  if job.last_active is not None and now - job.last_active < IDLE_AFTER]
+        for job in self._jobs.values():
+            job.share = self._job_rates.get(job.key)
+        if total is not None:
+            infinity = float('inf')
+            remaining = total
+            ordered = sorted(active, key=lambda job: self._job_rates.get(job.key) or infinity)
+            for index, job in enumerate(ordered):
+                fair = remaining / (len(ordered) - index)
+                cap = self._job_rates.get(job.key)
+                job.share = min(fair, cap) if cap else fair
+                remaining -= job.share
+            # Tarefas paradas (ex: convertendo) recebem uma parcela ao voltar
+            for job in self._jobs.values():
+                if job not in active:
+                    fair = total / (len(active) + 1)
+                    cap = self._job_rates.get(job.key)
+                    job.share = min(fair, cap) if cap else fair
+        for job in self._jobs.values():
+            job.bucket.rate = job.share
+        self._allocated_at = now
+
+    def _throttle(self, job, amount):
+        with self._lock:
+            now = self.clock()
+            was_idle = job.last_active is None or now - job.last_active >= IDLE_AFTER
+            job.last_active = now
+            if was_idle or self._allocated_at is None or now - self._allocated_at >= REALLOCATE_EVERY:
+                self._allocate(now)
+            wait = job.bucket.consume(amount)
+
+        while wait > 0:
+            if job.control is not None:
+                job.control.checkpoint()
+            step = min(wait, SLEEP_SLICE)
+            self.sleep(step)
+            wait -= step
+
+    def snapshot(self):
+        """Estado atual para exibição e para o status do daemon."""
+        with self._lock:
+            return {
+                'global_rate': self.global_rate,
+                'effective_rate': self.effective_global_rate(),
+                'schedule': str(self.schedule) if self.schedule else None,
+                'jobs': {str(key): {'cap': self._job_rates.get(key),
+                                    'share': self._jobs[key].share if key in self._jobs else None}
+                         for key in list(self._jobs) + [k for k in self._job_rates if k not in self._jobs]},
+            }
+
@@ -88,6 +88,7 @@ def verify_source_files():
         'single_video_window.py',
         'playlist_window.py',
         'integrated_audio_extractor_playlist.py',
+        'extraction_core.py',
         'file_manager.py',
         'youtube_audio_extractor.spec'
     ]
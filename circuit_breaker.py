@@ -0,0 +1,212 @@
+"""
+Disjuntor compartilhado contra bloqueios do servidor remoto.
+
+Quando o servidor começa a responder com bloqueios (HTTP 429/403, "not a
+bot"), continuar com todos os downloads em paralelo só prolonga o bloqueio.
+O disjuntor conta os erros de bloqueio de todas as tarefas:
+
+    fechado      tudo passa; `threshold` bloqueios em `window` segundos abrem o disjuntor
+    aberto       nenhuma requisição nova passa durante o resfriamento
+    meio-aberto  passam só `probe_limit` requisições de sondagem; `probe_successes`
+                 sucessos fecham o disjuntor, um bloqueio o reabre com o dobro do
+                 resfriamento (até `max_cooldown`)
+
+As requisições são barradas em CircuitBreaker.wait(), chamado antes de
+cada tentativa de extração e, via match_filter do yt-dlp, antes de cada
+vídeo de uma playlist. O sucesso é o fim de um download (progress_hook).
+"""
+import time
+import threading
+from collections import deque
+
+from concurrency_controller import is_throttling_error
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+STATE_LABELS = {
+    CLOSED: "fechado",
+    OPEN: "aberto",
+    HALF_OPEN: "meio-aberto",
+}
+
+
+class CircuitBreaker:
+    """Disjuntor compartilhado por todas as tarefas de um processo."""
+
+    def __init__(self, threshold=3, window=60.0, cooldown=120.0, max_cooldown=1800.0, probe_limit=1,
+                 probe_successes=2, on_change=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        Args:
+            threshold (int): Erros de bloqueio na janela que abrem o disjuntor
+            window (float): Janela de contagem dos erros, em segundos
+            cooldown (float): Resfriamento inicial, em segundos
+            max_cooldown (float): Resfriamento máximo após reaberturas seguidas
+            probe_limit (int): Sondagens simultâneas no estado meio-aberto
+            probe_successes (int): Sondagens bem-sucedidas para fechar o disjuntor
+            on_change (callable): Recebe o snapshot() a cada mudança de estado
+            clock (callable): Relógio monotônico (substituível em testes)
+            sleep (callable): Função de espera (substituível em testes)
+        """
+        self.threshold = threshold
+        self.window = window
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_limit = probe_limit
+        self.probe_successes = probe_successes
+        self.on_change = on_change
+        self.clock = clock
+        self.sleep = sleep
+
+        self.state = CLOSED
+        self.cooldown = cooldown
+        self.opened_at = None
+        self._failures = deque()  # momentos dos erros de bloqueio recentes
+        self._probes = set()      # threads com uma sondagem em andamento
+        self._successes = 0       # sondagens bem-sucedidas no estado meio-aberto
+        self._lock = threading.Lock()
+        self._changed = False
+
+    # --- Admissão ---
+
+    def _admit(self, thread_id):
+        """Decide (com o lock) se a thread pode fazer uma requisição; retorna a espera sugerida."""
+        now = self.clock()
+        if self.state == OPEN:
+            remaining = self.opened_at + self.cooldown - now
+            if remaining > 0:
+                return remaining
+            self._set_state(HALF_OPEN)
+            self._successes = 0
+            print("Disjuntor meio-aberto: liberando requisições de sondagem")
+        if self.state == HALF_OPEN:
+            if thread_id in self._probes:
+                return 0
+            if len(self._probes) >= self.probe_limit:
+                return 1.0
+            self._probes.add(thread_id)
+        return 0
+
+    def wait(self, control=None, on_wait=None):
+        """
+        Bloqueia até o disjuntor admitir uma requisição desta thread.
+
+        Args:
+            control (JobControl): Se informado, pausa e cancelamento interrompem a espera
+            on_wait (callable): Recebe uma mensagem quando a espera começa
+        """
+        thread_id = threading.get_ident()
+        notified = False
+        while True:
+            with self._lock:
+                delay = self._admit(thread_id)
+            self._notify()
+            if delay <= 0:
+                return
+            if on_wait and not notified:
+                on_wait(f"Servidor remoto bloqueando requisições: aguardando {delay:.0f} s...")
+                notified = True
+            if control is not None:
+                control.checkpoint()
+            self.sleep(min(delay, 0.5))
+
+    # --- Resultados ---
+
+    def record_failure(self, error):
+        """Registra uma falha; só erros de bloqueio contam."""
+        if not is_throttling_error(error):
+            self.release()
+            return
+        thread_id = threading.get_ident()
+        with self._lock:
+            now = self.clock()
+            if self.state == HALF_OPEN:
+                # Sondagem bloqueada: reabrir com resfriamento maior
+                self._probes.discard(thread_id)
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                self._open(now)
+            elif self.state == CLOSED:
+                self._failures.append(now)
+                while self._failures and now - self._failures[0] > self.window:
+                    self._failures.popleft()
+                if len(self._failures) >= self.threshold:
+                    self._open(now)
+        self._notify()
+
+    def record_success(self):
+        thread_id = threading.get_ident()
+        with self._lock:
+            if self.state == HALF_OPEN and thread_id in self._probes:
+                self._probes.discard(thread_id)
+                self._successes += 1
+                if self._successes >= self.probe_successes:
+                    self.cooldown = self.base_cooldown
+                    self._failures.clear()
+                    self._set_state(CLOSED)
+                    print("Disjuntor fechado: vazão normal retomada")
+        self._notify()
+
+    def release(self):
+        """Libera a sondagem desta thread sem resultado (ex: erro comum, cancelamento)."""
+        with self._lock:
+            self._probes.discard(threading.get_ident())
+
+    def progress_hook(self, d):
+        """Deve ser usado como progress_hook do yt-dlp: um download concluído é um sucesso."""
+        if d.get('status') == 'finished':
+            self.record_success()
+
+    def match_filter(self, control=None):
+        """
+        Cria um match_filter do yt-dlp que espera o disjuntor antes de cada vídeo.
+
+        Returns:
+            callable: Filtro que sempre aceita o vídeo (retorna None) depois de esperar
+        """
+        def match_filter(info_dict, incomplete=False):
+            self.wait(control)
+            return None
+        return match_filter
+
+    # --- Estado ---
+
+    def _open(self, now):
+        self.opened_at = now
+        self._failures.clear()
+        self._set_state(OPEN)
+        print(f"Disjuntor aberto: novas requisições suspensas por {self.cooldown:.0f} s")
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self._changed = True
+
+    def _notify(self):
+        # Fora do lock: o callback pode difundir eventos do daemon
+        with self._lock:
+            changed, self._changed = self._changed, False
+        if changed and self.on_change:
+            self.on_change(self.snapshot())
+
+    def reset(self):
+        """Fecha o disjuntor manualmente."""
+        with self._lock:
+            self.cooldown = self.base_cooldown
+            self._failures.clear()
+            self._probes.clear()
+            self._set_state(CLOSED)
+        self._notify()
+
+    def snapshot(self):
+        with self._lock:
+            remaining = None
+            if self.state == OPEN:
+                remaining = max(0.0, self.opened_at + self.cooldown - self.clock())
+            return {
+                'state': self.state,
+                'cooldown': self.cooldown,
+                'remaining': remaining,
+                'recent_failures': len(self._failures),
+                'probes': len(self._probes),
+            }
@@ -0,0 +1,338 @@
+"""
+Linha de comando para extrair o áudio de listas de URLs sem interface gráfica.
+
+As URLs vêm dos argumentos, de um arquivo (--input) ou da entrada padrão,
+uma por linha (linhas vazias e começadas por '#' são ignoradas). Cada
+extração concluída gera uma linha JSON na saída padrão; mensagens para
+humanos vão para a saída de erro. Não importa o PyQt5.
+
+Uso:
+    python cli.py URL [URL ...]
+    python cli.py --input urls.txt --concurrency 4 --layout artist
+    cat urls.txt | python cli.py --format flac --quality 320K > resultados.jsonl
+    python cli.py --input urls.txt -j 4 --limit-rate 2M --bandwidth-schedule "00:00-07:00=ilimitado"
+    python cli.py --retry-dead-letters
+
+Falhas temporárias e bloqueios são tentados de novo com backoff; as
+falhas permanentes vão para a lista de falhas (ver retry_policy.py), que
+--retry-dead-letters reenvia em lote com as opções originais.
+
+Linhas JSON (campo "event"):
+    result    uma por URL: url, success, type, filename/playlist_title, error, error_class...
+    progress  com --progress, os estados de progresso de cada URL
+    summary   a última linha: total, succeeded, failed, cancelled, elapsed
+
+Códigos de saída:
+    0    todas as extrações concluídas
+    1    parte das extrações falhou
+    2    erro de uso (argumentos inválidos, nenhuma URL)
+    3    todas as extrações falharam
+    130  interrompido (Ctrl+C); as extrações em andamento são canceladas
+"""
+import sys
+import json
+import time
+import argparse
+import itertools
+import threading
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from extraction_core import extract_audio
+from bandwidth_limiter import BandwidthLimiter, BandwidthSchedule, parse_rate
+from retry_policy import RetryPolicy, DeadLetterList
+from circuit_breaker import CircuitBreaker
+from job_control import JobControl, JobCancelled
+from library_layout import LibraryLayout, LAYOUT_PRESETS
+
+EXIT_OK = 0
+EXIT_PARTIAL_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_ALL_FAILED = 3
+EXIT_INTERRUPTED = 130
+
+AUDIO_FORMATS = ['mp3', 'aac', 'wav', 'flac', 'm4a', 'opus', 'vorbis']
+
+
+def iter_urls(urls, input_file=None, stdin=None):
+    """
+    Gera as URLs a processar, sem carregar listas grandes na memória.
+
+    Args:
+        urls (list): URLs passadas como argumento ('-' lê a entrada padrão)
+        input_file (str): Arquivo com uma URL por linha ('-' lê a entrada padrão)
+        stdin (file): Entrada padrão (padrão: sys.stdin)
+
+    Yields:
+        str: Cada URL, na ordem recebida
+    """
+    stdin = stdin or sys.stdin
+    sources = list(urls)
+    if input_file:
+        sources.append(('file', input_file))
+    if not sources and not stdin.isatty():
+        sources.append('-')
+
+    for source in sources:
+        if isinstance(source, tuple):
+            stream = stdin if source[1] == '-' else open(source[1], encoding='utf-8')
+        elif source == '-':
+            stream = stdin
+        else:
+            yield source
+            continue
+        try:
+            for line in stream:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
+        finally:
+            if stream is not stdin:
+                stream.close()
+
+
+class JsonLinesWriter:
+    """Escreve eventos como linhas JSON, de forma segura entre threads."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def write(self, event):
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def extract_one(index, url, options, control, writer, progress=False, verbose=False, limiter=None,
+                job_rate=None):
+    """
+    Extrai uma URL e escreve a linha de resultado.
+
+    `url` também pode ser uma entrada da lista de falhas (dict com 'url' e
+    'options'), reenviada com as opções da extração original.
+
+    Com `limiter`, o download entra na divisão de banda do lote, limitado a
+    `job_rate` bytes/s se informado.
+
+    Returns:
+        dict: O evento 'result' escrito
+    """
+    start = time.monotonic()
+    dead_letter_id = None
+    if isinstance(url, dict):
+        options = dict(options, **url['options'])
+        dead_letter_id = url['id']
+        url = url['url']
+
+    def on_message(text):
+        if verbose:
+            print(f"[{index}] {text}", file=sys.stderr, flush=True)
+
+    def on_progress(state):
+        writer.write(dict(state, event='progress', index=index, url=url))
+
+    limiter = limiter or BandwidthLimiter()
+    if job_rate:
+        limiter.set_job_rate(index, job_rate)
+    try:
+        with limiter.job(index, control=control) as limit_hook:
+            result = extract_audio(url, control=control, on_message=on_message,
+                                   on_progress=on_progress if progress else None,
+                                   progress_hooks=[limit_hook], **options)
+    except JobCancelled:
+        control.cleanup()
+        result = {'success': False, 'cancelled': True, 'error': "Extração cancelada."}
+    finally:
+        if job_rate:
+            limiter.set_job_rate(index, None)
+
+    event = dict(result, event='result', index=index, url=url,
+                 elapsed=round(time.monotonic() - start, 3))
+    writer.write(event)
+    if dead_letter_id is not None:
+        event['dead_letter_id'] = dead_letter_id
+    return event
+
+
+def run_batch(urls, options, concurrency=2, writer=None, progress=False, verbose=False, limiter=None,
+              job_rate=None, on_result=None):
+    """
+    Extrai as URLs com até `concurrency` extrações simultâneas.
+
+    As URLs são consumidas aos poucos (no máximo 2x `concurrency` na fila),
+    então listas com milhares de linhas vindas de um pipe não ficam todas
+    na memória.
+
+    Args:
+        urls (iterable): URLs a processar
+        options (dict): Argumentos repassados a extraction_core.extract_audio
+        concurrency (int): Número máximo de extrações simultâneas
+        writer (JsonLinesWriter): Destino das linhas JSON (padrão: saída padrão)
+        progress (bool): Também escreve os eventos de progresso
+        verbose (bool): Imprime as mensagens de etapa na saída de erro
+        limiter (BandwidthLimiter): Limite de banda dividido entre as extrações (padrão: ilimitado)
+        job_rate (float): Limite de cada extração em bytes/s
+        on_result (callable): Chamado com o evento 'result' de cada extração encerrada
+
+    Returns:
+        dict: Resumo com total, succeeded, failed, cancelled, interrupted e elapsed
+    """
+    writer = writer or JsonLinesWriter()
+    limiter = limiter or BandwidthLimiter()
+    concurrency = max(1, concurrency)
+    summary = {'total': 0, 'succeeded': 0, 'failed': 0, 'cancelled': 0, 'interrupted': False}
+    start = time.monotonic()
+    running = {}  # future -> JobControl
+
+    def collect(futures):
+        for future in futures:
+            running.pop(future)
+            event = future.result()
+            if on_result:
+                on_result(event)
+            if event.get('success'):
+                summary['succeeded'] += 1
+            elif event.get('cancelled'):
+                summary['cancelled'] += 1
+            else:
+                summary['failed'] += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="cli-worker") as executor:
+        try:
+            for index, url in enumerate(urls, start=1):
+                if len(running) >= concurrency * 2:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    collect(done)
+                control = JobControl()
+                future = executor.submit(extract_one, index, url, options, control, writer,
+                                         progress, verbose, limiter, job_rate)
+                running[future] = control
+                summary['total'] += 1
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                collect(done)
+        except KeyboardInterrupt:
+            summary['interrupted'] = True
+            print("Interrompido: cancelando as extrações em andamento...", file=sys.stderr, flush=True)
+            for control in running.values():
+                control.cancel()
+            collect(wait(running).done)
+
+    summary['elapsed'] = round(time.monotonic() - start, 3)
+    return summary
+
+
+def exit_code(summary):
+    """Converte o resumo de um lote no código de saída do processo."""
+    if summary['interrupted']:
+        return EXIT_INTERRUPTED
+    if summary['total'] == 0:
+        return EXIT_USAGE
+    if summary['succeeded'] == summary['total']:
+        return EXIT_OK
+    if summary['succeeded'] == 0:
+        return EXIT_ALL_FAILED
+    return EXIT_PARTIAL_FAILURE
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Extrai o áudio de vídeos e playlists do YouTube em lote, com saída em linhas JSON.")
+    parser.add_argument('urls', nargs='*', help="URLs a extrair ('-' lê da entrada padrão)")
+    parser.add_argument('-i', '--input', help="Arquivo com uma URL por linha ('-' para a entrada padrão)")
+    parser.add_argument('-j', '--concurrency', type=int, default=2, help="Extrações simultâneas (padrão: 2)")
+    parser.add_argument('-f', '--format', default='mp3', choices=AUDIO_FORMATS, help="Formato de áudio")
+    parser.add_argument('-q', '--quality', default='128K', help="Qualidade do áudio (ex: 192K)")
+    parser.add_argument('-o', '--output-directory', default=None, help="Diretório base (padrão: ~/Audios)")
+    parser.add_argument('--layout', default=None,
+                        help=f"Layout da biblioteca: preset ({', '.join(LAYOUT_PRESETS)}) ou padrão")
+    parser.add_argument('--filename-template', default=None,
+                        help="Template de nome, ex: '{playlist_index:03d} - {artist} - {song}'")
+    parser.add_argument('--scratch-directory', default=None,
+                        help="Diretório de rascunho para os arquivos temporários")
+    parser.add_argument('--playlist-items', default=None, help="Faixas das playlists a baixar (ex: 1,3,5-7)")
+    parser.add_argument('--connections', type=int, default=None,
+                        help="Conexões paralelas para o stream de vídeos únicos grandes (ex: 4)")
+    parser.add_argument('--limit-rate', default=None,
+                        help="Banda total do lote, dividida entre as extrações (ex: 2M, 500K)")
+    parser.add_argument('--job-limit-rate', default=None, help="Banda máxima de cada extração (ex: 1M)")
+    parser.add_argument('--bandwidth-schedule', default=None,
+                        help="Banda total por horário, ex: '22:00-07:00=ilimitado;07:00-22:00=2M'")
+    parser.add_argument('--no-retry', action='store_true',
+                        help="Não tenta de novo após falhas temporárias ou bloqueios")
+    parser.add_argument('--dead-letters', default=None,
+                        help="Arquivo da lista de falhas permanentes (padrão: ~/.youtube_audio_extractor)")
+    parser.add_argument('--retry-dead-letters', action='store_true',
+                        help="Reenvia as falhas permanentes registradas, com as opções originais")
+    parser.add_argument('--progress', action='store_true', help="Também escreve os eventos de progresso")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Mostra as etapas na saída de erro")
+    args = parser.parse_args(argv)
+
+    if args.layout:
+        try:
+            LibraryLayout(args.layout)
+        except ValueError as e:
+            parser.error(str(e))
+
+    try:
+        limiter = BandwidthLimiter(global_rate=parse_rate(args.limit_rate),
+                                   schedule=BandwidthSchedule.parse(args.bandwidth_schedule))
+        job_rate = parse_rate(args.job_limit_rate)
+    except ValueError as e:
+        parser.error(str(e))
+
+    options = {
+        'output_directory': args.output_directory,
+        'format': args.format,
+        'quality': args.quality,
+        'layout': args.layout,
+        'filename_template': args.filename_template,
+        'scratch_directory': args.scratch_directory,
+        'playlist_items': args.playlist_items,
+        'connections': args.connections,
+        'retry_policy': RetryPolicy.disabled() if args.no_retry else RetryPolicy(),
+        'dead_letters': DeadLetterList(args.dead_letters),
+        # Compartilhado: bloqueios numa extração suspendem todas as do lote
+        'circuit_breaker': CircuitBreaker(),
+    }
+
+    writer = JsonLinesWriter(sys.stdout)
+    retried = {}  # id -> entrada da lista de falhas ainda sem resultado
+
+    def on_result(event):
+        # Sucesso ou nova falha (que extract_audio registra de novo); canceladas voltam à lista
+        if not event.get('cancelled'):
+            retried.pop(event.get('dead_letter_id'), None)
+
+    try:
+        # FileManager e o yt-dlp imprimem mensagens; só as linhas JSON vão para a saída padrão
+        with redirect_stdout(sys.stderr):
+            urls = iter_urls(args.urls, args.input)
+            if args.retry_dead_letters:
+                entries = options['dead_letters'].take()
+                retried = {entry['id']: entry for entry in entries}
+                print(f"Reenviando {len(entries)} falha(s) registrada(s).", file=sys.stderr)
+                urls = itertools.chain(entries, urls if args.urls or args.input else [])
+            summary = run_batch(urls, options, concurrency=args.concurrency, writer=writer,
+                                progress=args.progress, verbose=args.verbose, limiter=limiter,
+                                job_rate=job_rate, on_result=on_result)
+    except OSError as e:
+        print(f"Erro ao ler a lista de URLs: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    finally:
+        if retried:
+            restored = options['dead_letters'].restore(list(retried.values()))
+            print(f"{restored} falha(s) não reenviada(s) devolvida(s) à lista.", file=sys.stderr)
+
+    if summary['total'] == 0:
+        print("Nenhuma URL informada (use argumentos, --input ou a entrada padrão).", file=sys.stderr)
+    writer.write(dict(summary, event='summary'))
+    print(f"{summary['succeeded']}/{summary['total']} extrações concluídas, {summary['failed']} falha(s), "
+          f"{summary['cancelled']} cancelada(s) em {summary['elapsed']:.1f} s", file=sys.stderr)
+    return exit_code(summary)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Controle adaptativo do número de downloads simultâneos (AIMD).
+
+Um número fixo de workers ou é tímido demais ou provoca bloqueios do
+servidor remoto (HTTP 429/403). O controlador observa a vazão agregada e
+os erros das tarefas e ajusta o limite:
+
+    - aumento aditivo (+1) enquanto a vazão continua crescendo;
+    - redução multiplicativa (x0.5) imediata em erros de bloqueio, ou ao fim
+      da janela se a taxa de erros passar do limite;
+    - se um aumento não trouxe ganho de vazão, volta um passo e só tenta
+      de novo depois de algumas janelas estáveis.
+
+Cada decisão é registrada em `decisions` e exposta por snapshot().
+"""
+import re
+import time
+import threading
+from collections import deque
+
+# Mensagens de erro que indicam bloqueio por excesso de requisições
+THROTTLING_PATTERN = re.compile(
+    r"\b(429|403)\b|too many requests|forbidden|rate.?limit|confirm you.re not a bot", re.IGNORECASE)
+
+
+def is_throttling_error(error):
+    """Indica se a mensagem de erro (ou exceção) é de bloqueio pelo servidor remoto."""
+    return bool(error) and THROTTLING_PATTERN.search(str(error)) is not None
+
+
+class ConcurrencyController:
+    """
+    Controlador AIMD do limite de downloads simultâneos.
+
+    Os eventos chegam de várias threads: job_started/job_finished em cada
+    tarefa e progress_hook como progress_hook do yt-dlp. A reavaliação
+    acontece nesses próprios eventos, quando a janela termina, sem thread
+    dedicada.
+    """
+
+    def __init__(self, initial=2, min_concurrency=1, max_concurrency=8, window=10.0, decrease_factor=0.5,
+                 error_threshold=0.25, growth_threshold=0.1, probe_after=6, on_change=None,
+                 clock=time.monotonic):
+        """
+        Args:
+            initial (int): Limite inicial
+            min_concurrency (int): Limite mínimo
+            max_concurrency (int): Limite máximo
+            window (float): Duração da janela de medição, em segundos
+            decrease_factor (float): Fator da redução multiplicativa
+            error_threshold (float): Taxa de erros (0-1) na janela que provoca redução
+            growth_threshold (float): Ganho relativo de vazão que justifica mais um download
+            probe_after (int): Janelas estáveis até tentar aumentar de novo após um platô
+            on_change (callable): Recebe (novo limite, decisão) quando o limite muda
+            clock (callable): Relógio monotônico (substituível em testes)
+        """
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.limit = min(self.max_concurrency, max(self.min_concurrency, initial))
+        self.window = window
+        self.decrease_factor = decrease_factor
+        self.error_threshold = error_threshold
+        self.growth_threshold = growth_threshold
+        self.probe_after = probe_after
+        self.on_change = on_change
+        self.clock = clock
+
+        self.decisions = deque(maxlen=50)
+        self.throughput = 0.0         # bytes/s da última janela
+        self.active = 0
+        self._lock = threading.Lock()
+        self._window_start = clock()
+        self._bytes = 0
+        self._finished = 0
+        self._errors = 0
+        self._throttled = 0
+        self._last_throttle_cut = None
+        self._baseline = None         # vazão antes do último aumento
+        self._hold_windows = 0        # janelas a esperar antes de sondar de novo
+        self._downloaded = {}         # arquivo -> bytes já contados
+        self._changes = []            # mudanças a notificar fora do lock
+
+    # --- Eventos ---
+
+    def job_started(self):
+        with self._lock:
+            self.active += 1
+
+    def job_finished(self, error=None):
+        """
+        Registra o fim de uma tarefa.
+
+        Args:
+            error (str): Mensagem de erro, ou None se a tarefa foi concluída
+        """
+        with self._lock:
+            self.active = max(0, self.active - 1)
+            self._finished += 1
+            if error:
+                self._errors += 1
+                if is_throttling_error(error):
+                    self._throttled += 1
+                    # Bloqueio: reduzir já, mas no máximo uma vez por janela
+                    now = self.clock()
+                    if self._last_throttle_cut is None or now - self._last_throttle_cut >= self.window:
+                        self._last_throttle_cut = now
+                        self._decrease("bloqueio pelo servidor remoto")
+        self._notify()
+        self._maybe_evaluate()
+
+    def progress_hook(self, d):
+        """Deve ser usado como progress_hook do yt-dlp; soma os bytes baixados."""
+        filename = d.get('filename')
+        downloaded = d.get('downloaded_bytes') or 0
+        with self._lock:
+            previous = self._downloaded.get(filename, 0)
+            if downloaded > previous:
+                self._bytes += downloaded - previous
+            if d.get('status') == 'downloading':
+                self._downloaded[filename] = downloaded
+            else:
+                self._downloaded.pop(filename, None)
+        self._maybe_evaluate()
+
+    # --- Decisões ---
+
+    def _maybe_evaluate(self):
+        # Leitura sem lock só como atalho; _evaluate confirma sob o lock, pois
+        # outra thread pode ter fechado a janela entre a leitura e a chamada
+        if self.clock() - self._window_start >= self.window:
+            try:
+                self._evaluate(only_if_due=True)
+            finally:
+                self._notify()
+
+    def _notify(self):
+        # Fora do lock: o callback pode travar a fila (ex: set_max_concurrent do daemon)
+        with self._lock:
+            changes, self._changes = self._changes, []
+        if self.on_change:
+            for limit, decision in changes:
+                self.on_change(limit, decision)
+
+    def evaluate(self):
+        """Fecha a janela atual e decide o novo limite."""
+        try:
+            return self._evaluate()
+        finally:
+            self._notify()
+
+    def _evaluate(self, only_if_due=False):
+        with self._lock:
+            now = self.clock()
+            elapsed = now - self._window_start
+            if elapsed <= 0 or (only_if_due and elapsed < self.window):
+                return self.limit
+            throughput = self._bytes / elapsed
+            error_rate = self._errors / self._finished if self._finished else 0.0
+            throttled = self._throttled
+            self.throughput = throughput
+            self._window_start = now
+            self._bytes = self._finished = self._errors = self._throttled = 0
+
+            if throttled and (self._last_throttle_cut is None or now - self._last_throttle_cut >= self.window):
+                self._last_throttle_cut = now
+                self._decrease("bloqueio pelo servidor remoto", throughput, error_rate)
+            elif not throttled and error_rate > self.error_threshold:
+                self._decrease(f"taxa de erros {error_rate:.0%}", throughput, error_rate)
+            elif self._baseline is not None:
+                # Janela logo após um aumento: o ganho justificou o download extra?
+                if throughput >= self._baseline * (1 + self.growth_threshold):
+                    if self.active >= self.limit:
+                        self._increase("vazão crescendo", throughput, error_rate)
+                    else:
+                        # O ganho se confirmou, mas há slots livres: mantém o limite sem sondar mais
+                        self._baseline = None
+                else:
+                    self._baseline = None
+                    self._hold_windows = self.probe_after
+                    self._set_limit(self.limit - 1, "platô de vazão", throughput, error_rate)
+            elif self.active >= self.limit and throughput > 0:
+                # Só vale a pena aumentar se todos os slots estão ocupados
+                if self._hold_windows > 0:
+                    self._hold_windows -= 1
+                else:
+                    self._increase("sondando mais vazão", throughput, error_rate)
+            return self.limit
+
+    def _increase(self, reason, throughput, error_rate):
+        if self.limit >= self.max_concurrency:
+            self._baseline = None
+            return
+        self._baseline = throughput
+        self._set_limit(self.limit + 1, reason, throughput, error_rate)
+
+    def _decrease(self, reason, throughput=None, error_rate=None):
+        self._baseline = None
+        self._hold_windows = self.probe_after
+        self._set_limit(int(self.limit * self.decrease_factor), reason, throughput, error_rate)
+
+    def _set_limit(self, limit, reason, throughput=None, error_rate=None):
+        limit = min(self.max_concurrency, max(self.min_concurrency, limit))
+        decision = {
+            'time': time.time(),
+            'limit': limit,
+            'previous': self.limit,
+            'reason': reason,
+            'throughput': throughput if throughput is not None else self.throughput,
+            'error_rate': error_rate,
+        }
+        self.decisions.append(decision)
+        if limit == self.limit:
+            return
+        self.limit = limit
+        self._changes.append((limit, decision))
+
+    def set_limit(self, limit, reason="ajuste manual"):
+        """Define o limite por fora (ex: pela interface), dentro de min/max."""
+        with self._lock:
+            self._baseline = None
+            self._set_limit(limit, reason)
+        self._notify()
+
+    def snapshot(self):
+        """Estado atual para instrumentação (status do daemon, API HTTP)."""
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'min': self.min_concurrency,
+                'max': self.max_concurrency,
+                'active': self.active,
+                'throughput': self.throughput,
+                'decisions': list(self.decisions)[-10:],
+            }
@@ -0,0 +1,206 @@
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal
+from job_queue import DownloadJob
+from extraction_daemon import DaemonClient
+
+
+def _portable_info(info_dict):
+    """
+    Versão do info_dict que pode ir ao daemon, ou None para ele extrair de novo.
+
+    Só vai uma listagem completa e já percorrida: entradas ainda num gerador
+    (ou cortadas em 'entries_truncated') fariam o daemon baixar só parte da playlist.
+    """
+    if not info_dict or info_dict.get('entries_truncated'):
+        return None
+    if 'entries' in info_dict and not isinstance(info_dict['entries'], list):
+        return None
+    import yt_dlp
+    return yt_dlp.YoutubeDL.sanitize_info(info_dict)
+
+
+class RemoteJob(DownloadJob):
+    """Tarefa que já estava no daemon quando a interface se conectou."""
+
+    def run(self):
+        raise RuntimeError("Tarefas remotas são executadas pelo daemon")
+
+
+class _DaemonEventListener(QObject):
+    """
+    Lê os eventos do daemon numa thread Python daemon (e não num QThread),
+    que pode ficar bloqueada no recv() sem impedir o encerramento da interface.
+    """
+
+    event_received = pyqtSignal(dict)
+
+    def __init__(self, client, parent=None):
+        super().__init__(parent)
+        self.client = client
+        self._thread = threading.Thread(target=self._run, name="daemon-events", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        for event in self.client.events():
+            self.event_received.emit(event)
+
+
+class DaemonJobQueue(QObject):
+    """
+    Fila de downloads delegada ao daemon de extração.
+
+    Tem a mesma interface e os mesmos sinais da JobQueue, então janelas e
+    painel não distinguem as duas. As tarefas criadas pelas janelas viram
+    apenas representantes locais: seus dados (url, formato, qualidade...)
+    são enviados ao daemon, e os eventos recebidos dele são reemitidos pelos
+    sinais de cada tarefa. Fechar a interface não interrompe os downloads.
+    """
+
+    job_added = pyqtSignal(object)
+    job_updated = pyqtSignal(object)
+    job_removed = pyqtSignal(object)
+    queue_changed = pyqtSignal()
+
+    def __init__(self, client, parent=None):
+        """
+        Args:
+            client (DaemonClient): Cliente já conectado ao daemon
+            parent (QObject): Objeto pai
+        """
+        super().__init__(parent)
+        self.client = client
+        status = client.status()
+        self.max_concurrent = status['max_concurrent']
+        self.bandwidth_rate = status['bandwidth']['global_rate']
+        self._jobs = {}   # id no daemon -> DownloadJob
+        self._order = []  # ids na ordem informada pelo daemon
+
+        self._listener = _DaemonEventListener(DaemonClient(client.address, client.authkey), self)
+        self._listener.event_received.connect(self._on_event)
+        self._listener.start()
+
+    # --- Mesma interface da JobQueue ---
+
+    def submit(self, job, priority=None):
+        if priority is not None:
+            job.priority = priority
+        spec = {
+            'url': job.url,
+            'title': job.title,
+            'kind': job.kind,
+            'output_directory': getattr(job, 'output_path', None),
+            'format': getattr(job, 'format', 'mp3'),
+            'quality': getattr(job, 'quality', '128K'),
+            'playlist_items': getattr(job, 'playlist_items', None),
+            'info_dict': _portable_info(getattr(job, 'info_dict', None)),
+        }
+        job.daemon_id = self.client.submit(spec, job.priority)
+        self._jobs[job.daemon_id] = job
+        self._order.append(job.daemon_id)
+        self.job_added.emit(job)
+        self.queue_changed.emit()
+        return job
+
+    def jobs(self):
+        return [self._jobs[job_id] for job_id in self._order if job_id in self._jobs]
+
+    def pending_jobs(self):
+        return [job for job in self.jobs() if job.state == DownloadJob.PENDING]
+
+    def running_jobs(self):
+        return [job for job in self.jobs() if job.state == DownloadJob.RUNNING]
+
+    def set_max_concurrent(self, max_concurrent):
+        self.max_concurrent = max(1, max_concurrent)
+        self.client.set_max_concurrent(self.max_concurrent)
+
+    def set_bandwidth_limit(self, rate):
+        self.bandwidth_rate = rate
+        self.client.set_bandwidth(rate=rate)
+
+    def set_job_bandwidth_limit(self, job, rate):
+        self.client.set_bandwidth(job_id=job.daemon_id, job_rate=rate)
+
+    def set_priority(self, job, priority):
+        self.client.set_priority(job.daemon_id, priority)
+
+    def move(self, job, offset):
+        self.client.move(job.daemon_id, offset)
+
+    def remove(self, job):
+        self.client.cancel(job.daemon_id)
+        return True
+
+    def pause(self, job):
+        self.client.pause(job.daemon_id)
+
+    def resume(self, job):
+        self.client.resume(job.daemon_id)
+
+    def cancel(self, job):
+        self.client.cancel(job.daemon_id)
+
+    def clear_finished(self):
+        self.client.clear_finished()
+
+    def shutdown(self):
+        """Desconecta do daemon; as tarefas continuam rodando nele."""
+        self.client.close()
+        self._listener.event_received.disconnect(self._on_event)
+
+    # --- Eventos do daemon (recebidos na thread da interface) ---
+
+    def _on_event(self, event):
+        if event['event'] == 'queue':
+            self._order = [snapshot['job_id'] for snapshot in event['jobs']]
+            known = set(self._order)
+            for job_id in [job_id for job_id in self._jobs if job_id not in known]:
+                self.job_removed.emit(self._jobs.pop(job_id))
+            for snapshot in event['jobs']:
+                self._apply_snapshot(snapshot)
+            self.queue_changed.emit()
+        elif event['event'] == 'job':
+            self._apply_snapshot(event['job'])
+            self.queue_changed.emit()
+        elif event['event'] == 'progress':
+            job = self._jobs.get(event['job_id'])
+            if job is not None:
+                job.progress_state_signal.emit(event['state'])
+        elif event['event'] == 'concurrency':
+            # Limite ajustado pelo controlador adaptativo do daemon
+            self.max_concurrent = event['max_concurrent']
+            self.queue_changed.emit()
+        elif event['event'] == 'bandwidth':
+            # Limite alterado por outro cliente (ex: linha de comando)
+            self.bandwidth_rate = event['bandwidth']['global_rate']
+            self.queue_changed.emit()
+
+    def _apply_snapshot(self, snapshot):
+        job = self._jobs.get(snapshot['job_id'])
+        if job is None:
+            job = RemoteJob(snapshot['title'], kind=snapshot['kind'])
+            job.daemon_id = snapshot['job_id']
+            job.url = snapshot['spec']['url']
+            self._jobs[job.daemon_id] = job
+            self.job_added.emit(job)
+
+        job.priority = snapshot['priority']
+        if snapshot['progress']:
+            job.last_progress = snapshot['progress']
+        if snapshot['state'] == job.state:
+            return
+
+        if snapshot['state'] == DownloadJob.FINISHED:
+            result = snapshot['result'] or {}
+            name = result.get('playlist_title') or result.get('filename') or job.title
+            job.finished_signal.emit(name, result.get('message', 'Download concluído!'))
+        elif snapshot['state'] == DownloadJob.FAILED:
+            job.error_signal.emit(snapshot['error'] or "Erro na extração")
+        elif snapshot['state'] == DownloadJob.PAUSED:
+            job.progress_signal.emit("Download pausado.")
+        elif snapshot['state'] == DownloadJob.CANCELLED:
+            job.progress_signal.emit("Download cancelado.")
+        job.set_state(snapshot['state'])
+        self.job_updated.emit(job)
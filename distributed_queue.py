@@ -0,0 +1,504 @@
+"""
+Fila de extrações compartilhada por workers em vários processos e máquinas.
+
+Os workers pegam tarefas de um broker com um arrendamento (lease) de
+duração limitada e o renovam periodicamente (heartbeat) enquanto a
+extração roda. Se um worker morre, o lease expira e a tarefa volta para a
+fila, onde outro worker a pega. O cancelamento é visto pelo worker no
+próximo heartbeat.
+
+Brokers:
+    SQLiteBroker   arquivo SQLite (ex: num volume compartilhado entre as máquinas)
+    MemoryBroker   em memória, para testes e para vários workers num só processo
+
+Uso:
+    python distributed_queue.py --db /mnt/compartilhado/fila.db submit URL [URL ...]
+    python distributed_queue.py --db /mnt/compartilhado/fila.db worker --concurrency 2
+    python distributed_queue.py --db /mnt/compartilhado/fila.db status
+"""
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import itertools
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from extraction_core import extract_audio
+from job_control import JobControl, JobCancelled
+from circuit_breaker import CircuitBreaker
+from extraction_daemon import PENDING, RUNNING, FINISHED, FAILED, CANCELLED, DONE_STATES
+
+DEFAULT_LEASE_SECONDS = 60
+DEFAULT_MAX_ATTEMPTS = 3
+COMPLETE_RETRIES = 5       # tentativas de gravar o resultado antes de deixar o lease expirar
+
+
+class JobBroker(ABC):
+    """
+    Interface dos brokers. Cada tarefa é um dicionário com job_id, spec,
+    priority, state, worker, lease_expires, attempts, result e error.
+    """
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """
+        Args:
+            max_attempts (int): Leases expirados até a tarefa ser dada como falha
+        """
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    def enqueue(self, spec, priority=0):
+        """Adiciona uma tarefa e retorna seu id."""
+
+    @abstractmethod
+    def lease(self, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Pega a próxima tarefa pendente (ou com lease expirado); None se não houver."""
+
+    @abstractmethod
+    def heartbeat(self, job_id, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Renova o lease. Retorna False se o worker perdeu a tarefa (expirou ou foi cancelada)."""
+
+    @abstractmethod
+    def complete(self, job_id, worker_id, result):
+        """Registra o resultado de extraction_core.extract_audio."""
+
+    @abstractmethod
+    def release(self, job_id, worker_id):
+        """Devolve a tarefa à fila sem contar como tentativa (ex: worker encerrando)."""
+
+    @abstractmethod
+    def cancel(self, job_id):
+        """Cancela a tarefa; um worker que a esteja executando percebe no próximo heartbeat."""
+
+    @abstractmethod
+    def jobs(self):
+        """Todas as tarefas, da mais antiga para a mais nova."""
+
+
+class MemoryBroker(JobBroker):
+    """Broker em memória, com a mesma semântica do SQLiteBroker."""
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS, clock=time.time):
+        super().__init__(max_attempts)
+        self.clock = clock
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def enqueue(self, spec, priority=0):
+        with self._lock:
+            job_id = next(self._ids)
+            self._jobs[job_id] = {'job_id': job_id, 'spec': dict(spec), 'priority': priority,
+                                  'state': PENDING, 'worker': None, 'lease_expires': None,
+                                  'attempts': 0, 'result': None, 'error': None}
+            return job_id
+
+    def lease(self, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        now = self.clock()
+        with self._lock:
+            candidates = []
+            for job in self._jobs.values():
+                expired = job['state'] == RUNNING and job['lease_expires'] < now
+                if expired and job['attempts'] >= self.max_attempts:
+                    job.update(state=FAILED, worker=None, error="Lease expirou em todas as tentativas")
+                elif job['state'] == PENDING or expired:
+                    candidates.append(job)
+            if not candidates:
+                return None
+            job = min(candidates, key=lambda j: (-j['priority'], j['job_id']))
+            job.update(state=RUNNING, worker=worker_id, lease_expires=now + lease_seconds,
+                       attempts=job['attempts'] + 1)
+            return dict(job)
+
+    def _owned(self, job_id, worker_id):
+        job = self._jobs.get(job_id)
+        if job is None or job['state'] != RUNNING or job['worker'] != worker_id:
+            return None
+        return job
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        with self._lock:
+            job = self._owned(job_id, worker_id)
+            if job is None:
+                return False
+            job['lease_expires'] = self.clock() + lease_seconds
+            return True
+
+    def complete(self, job_id, worker_id, result):
+        with self._lock:
+            job = self._owned(job_id, worker_id)
+            if job is None:
+                return False
+            job.update(state=FINISHED if result.get('success') else FAILED, worker=None,
+                       lease_expires=None, result=result, error=result.get('error'))
+            return True
+
+    def release(self, job_id, worker_id):
+        with self._lock:
+            job = self._owned(job_id, worker_id)
+            if job is None:
+                return False
+            job.update(state=PENDING, worker=None, lease_expires=None, attempts=job['attempts'] - 1)
+            return True
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['state'] in DONE_STATES:
+                return False
+            job.update(state=CANCELLED, worker=None, lease_expires=None)
+            return True
+
+    def jobs(self):
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+
+class SQLiteBroker(JobBroker):
+    """
+    Broker num arquivo SQLite, que pode ficar num volume compartilhado.
+
+    O lease é feito numa transação BEGIN IMMEDIATE, que trava o arquivo para
+    escrita: dois workers nunca pegam a mesma tarefa. O journal padrão
+    (DELETE) é usado porque o modo WAL não funciona em sistemas de arquivos
+    de rede. Os horários de expiração usam o relógio de cada máquina, então
+    os relógios devem estar sincronizados (NTP) com folga bem menor que o lease.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            spec TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 0,
+            state TEXT NOT NULL,
+            worker TEXT,
+            lease_expires REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            created REAL NOT NULL,
+            updated REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (state, priority DESC, job_id);
+    """
+
+    def __init__(self, path, max_attempts=DEFAULT_MAX_ATTEMPTS, timeout=30):
+        """
+        Args:
+            path (str): Arquivo do banco (criado se não existir)
+            max_attempts (int): Leases expirados até a tarefa ser dada como falha
+            timeout (float): Espera máxima por uma trava do arquivo, em segundos
+        """
+        super().__init__(max_attempts)
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self):
+        # Conexões SQLite não devem ser compartilhadas entre threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    @staticmethod
+    def _row_to_job(row):
+        job = dict(row)
+        job['spec'] = json.loads(job['spec'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        job.pop('created')
+        job.pop('updated')
+        return job
+
+    def enqueue(self, spec, priority=0):
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "INSERT INTO jobs (spec, priority, state, created, updated) VALUES (?, ?, ?, ?, ?)",
+                (json.dumps(spec), priority, PENDING, now, now))
+            return cursor.lastrowid
+
+    def lease(self, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET state = ?, worker = NULL, error = ?, updated = ? "
+                "WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, "Lease expirou em todas as tentativas", now, RUNNING, now, self.max_attempts))
+            row = connection.execute(
+                "SELECT * FROM jobs WHERE state = ? OR (state = ? AND lease_expires < ?) "
+                "ORDER BY priority DESC, job_id LIMIT 1",
+                (PENDING, RUNNING, now)).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE jobs SET state = ?, worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated = ? WHERE job_id = ?",
+                (RUNNING, worker_id, now + lease_seconds, now, row['job_id']))
+            row = connection.execute("SELECT * FROM jobs WHERE job_id = ?", (row['job_id'],)).fetchone()
+            return self._row_to_job(row)
+
+    def _update_owned(self, job_id, worker_id, assignments, values):
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                f"UPDATE jobs SET {assignments}, updated = ? WHERE job_id = ? AND state = ? AND worker = ?",
+                (*values, time.time(), job_id, RUNNING, worker_id))
+            return cursor.rowcount == 1
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        return self._update_owned(job_id, worker_id, "lease_expires = ?", (time.time() + lease_seconds,))
+
+    def complete(self, job_id, worker_id, result):
+        state = FINISHED if result.get('success') else FAILED
+        return self._update_owned(job_id, worker_id,
+                                  "state = ?, worker = NULL, lease_expires = NULL, result = ?, error = ?",
+                                  (state, json.dumps(result, default=str), result.get('error')))
+
+    def release(self, job_id, worker_id):
+        return self._update_owned(job_id, worker_id,
+                                  "state = ?, worker = NULL, lease_expires = NULL, attempts = attempts - 1",
+                                  (PENDING,))
+
+    def cancel(self, job_id):
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET state = ?, worker = NULL, lease_expires = NULL, updated = ? "
+                "WHERE job_id = ? AND state IN (?, ?)",
+                (CANCELLED, time.time(), job_id, PENDING, RUNNING))
+            return cursor.rowcount == 1
+
+    def jobs(self):
+        rows = self._connection().execute("SELECT * FROM jobs ORDER BY job_id").fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+
+class Worker:
+    """
+    Processo de trabalho: pega tarefas do broker e as executa com o núcleo de extração.
+
+    Cada tarefa em execução tem uma thread de heartbeat que renova o lease a
+    cada `lease_seconds / 3`. Se a renovação falha (a tarefa foi cancelada
+    ou o lease expirou e foi repassado), a extração local é cancelada.
+    """
+
+    def __init__(self, broker, worker_id=None, concurrency=1, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 poll_interval=2.0, options=None):
+        """
+        Args:
+            broker (JobBroker): Fila compartilhada
+            worker_id (str): Identificação do worker. Se None, usa host:pid
+            concurrency (int): Extrações simultâneas neste processo
+            lease_seconds (float): Duração de cada lease
+            poll_interval (float): Espera entre consultas quando a fila está vazia
+            options (dict): Opções locais repassadas a extract_audio (ex: output_directory,
+                            scratch_directory); prevalecem sobre as da tarefa
+        """
+        self.broker = broker
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.options = options or {}
+        # Bloqueios vistos por uma extração seguram as demais deste worker
+        self.circuit_breaker = CircuitBreaker()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._controls = {}
+        self._lock = threading.Lock()
+
+    def run_job(self, job):
+        """Executa uma tarefa já arrendada e registra o resultado."""
+        job_id = job['job_id']
+        control = JobControl()
+        with self._lock:
+            self._controls[job_id] = control
+        lost = threading.Event()
+        control_done = threading.Event()
+
+        def keep_alive():
+            while not control_done.wait(self.lease_seconds / 3):
+                try:
+                    renewed = self.broker.heartbeat(job_id, self.worker_id, self.lease_seconds)
+                except sqlite3.Error as e:
+                    # Falha passageira (ex: banco travado); o lease ainda tem folga
+                    print(f"[{self.worker_id}] Erro no heartbeat da tarefa {job_id}: {e}")
+                    continue
+                if not renewed:
+                    lost.set()
+                    control.cancel()
+                    return
+
+        heartbeat = threading.Thread(target=keep_alive, name=f"heartbeat-{job_id}", daemon=True)
+        heartbeat.start()
+
+        spec = dict(job['spec'])
+        url = spec.pop('url')
+        options = {key: spec[key] for key in ('output_directory', 'format', 'quality', 'layout',
+                                              'filename_template', 'scratch_directory', 'playlist_items',
+                                              'connections')
+                   if spec.get(key) is not None}
+        options.update(self.options)
+        try:
+            result = extract_audio(url, control=control, circuit_breaker=self.circuit_breaker, **options)
+        except JobCancelled:
+            control.cleanup()
+            result = None
+        except Exception as e:
+            # extract_audio devolve os erros de extração; isto é um defeito, registrado como falha da tarefa
+            result = {'success': False, 'error': f"Erro na extração: {e}", 'message': 'Erro na extração.'}
+        finally:
+            control_done.set()
+            heartbeat.join()
+            with self._lock:
+                self._controls.pop(job_id, None)
+
+        if result is None:
+            if self._stopping.is_set() and not lost.is_set():
+                # Encerramento do worker: outra máquina retoma a tarefa (ou a pega quando o lease expirar)
+                try:
+                    self.broker.release(job_id, self.worker_id)
+                    print(f"[{self.worker_id}] Tarefa {job_id} devolvida à fila")
+                except sqlite3.Error as e:
+                    print(f"[{self.worker_id}] Erro ao devolver a tarefa {job_id}: {e}")
+            else:
+                print(f"[{self.worker_id}] Tarefa {job_id} cancelada ou repassada a outro worker")
+            return
+        if not self._complete(job_id, result):
+            return
+        status = "concluída" if result.get('success') else f"falhou: {result.get('error')}"
+        print(f"[{self.worker_id}] Tarefa {job_id} {status}")
+
+    def _complete(self, job_id, result):
+        """
+        Grava o resultado, com novas tentativas se o banco estiver travado.
+
+        Se todas falharem, o lease expira e outro worker executa a tarefa de
+        novo (as faixas já baixadas são encontradas no disco).
+
+        Returns:
+            bool: Se o resultado foi gravado
+        """
+        for attempt in range(COMPLETE_RETRIES):
+            try:
+                self.broker.complete(job_id, self.worker_id, result)
+                return True
+            except sqlite3.Error as e:
+                print(f"[{self.worker_id}] Erro ao gravar o resultado da tarefa {job_id} "
+                      f"({attempt + 1}/{COMPLETE_RETRIES}): {e}")
+                time.sleep(min(0.5 * 2 ** attempt, self.lease_seconds / 3))
+        return False
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            try:
+                job = self.broker.lease(self.worker_id, self.lease_seconds)
+            except sqlite3.Error as e:
+                print(f"[{self.worker_id}] Erro ao consultar a fila: {e}")
+                job = None
+            if job is None:
+                self._stopping.wait(self.poll_interval)
+                continue
+            print(f"[{self.worker_id}] Tarefa {job['job_id']}: {job['spec']['url']}")
+            try:
+                self.run_job(job)
+            except Exception as e:
+                # Um erro numa tarefa não pode matar a thread do worker; o lease expira e a tarefa volta
+                print(f"[{self.worker_id}] Erro ao executar a tarefa {job['job_id']}: {e}")
+
+    def start(self):
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, name=f"worker-{index + 1}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def stop(self, wait=True):
+        """Para de pegar tarefas e interrompe as em andamento, devolvendo-as à fila."""
+        self._stopping.set()
+        with self._lock:
+            controls = list(self._controls.values())
+        for control in controls:
+            control.cancel()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def run_forever(self):
+        self.start()
+        try:
+            while any(thread.is_alive() for thread in self._threads):
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            print("Encerrando o worker...")
+            self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fila distribuída de extrações (workers em várias máquinas).")
+    parser.add_argument('--db', required=True, help="Arquivo SQLite da fila (ex: num volume compartilhado)")
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="Leases expirados até a tarefa falhar")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    submit_parser = subparsers.add_parser('submit', help="Adiciona URLs à fila")
+    submit_parser.add_argument('urls', nargs='+')
+    submit_parser.add_argument('--format', default='mp3')
+    submit_parser.add_argument('--quality', default='128K')
+    submit_parser.add_argument('--layout', default=None)
+    submit_parser.add_argument('--priority', type=int, default=0)
+
+    worker_parser = subparsers.add_parser('worker', help="Executa tarefas da fila")
+    worker_parser.add_argument('--concurrency', type=int, default=1)
+    worker_parser.add_argument('--lease-seconds', type=float, default=DEFAULT_LEASE_SECONDS)
+    worker_parser.add_argument('--output-directory', default=None, help="Diretório base local (padrão: ~/Audios)")
+    worker_parser.add_argument('--scratch-directory', default=None)
+
+    subparsers.add_parser('status', help="Mostra as tarefas da fila")
+    cancel_parser = subparsers.add_parser('cancel', help="Cancela tarefas")
+    cancel_parser.add_argument('job_ids', nargs='+', type=int)
+    args = parser.parse_args(argv)
+
+    broker = SQLiteBroker(args.db, max_attempts=args.max_attempts)
+
+    if args.command == 'submit':
+        for url in args.urls:
+            spec = {'url': url, 'format': args.format, 'quality': args.quality, 'layout': args.layout}
+            print(f"Tarefa {broker.enqueue(spec, args.priority)}: {url}")
+    elif args.command == 'worker':
+        options = {key: value for key, value in (('output_directory', args.output_directory),
+                                                 ('scratch_directory', args.scratch_directory)) if value}
+        worker = Worker(broker, concurrency=args.concurrency, lease_seconds=args.lease_seconds,
+                        options=options)
+        print(f"Worker {worker.worker_id} aguardando tarefas em {args.db}")
+        worker.run_forever()
+    elif args.command == 'status':
+        for job in broker.jobs():
+            owner = f" ({job['worker']})" if job['worker'] else ""
+            print(f"{job['job_id']:>6}  {job['state']:<10} tentativas {job['attempts']}  "
+                  f"{job['spec']['url']}{owner}")
+    elif args.command == 'cancel':
+        for job_id in args.job_ids:
+            print(f"Tarefa {job_id}: {'cancelada' if broker.cancel(job_id) else 'não pôde ser cancelada'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
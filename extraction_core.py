@@ -0,0 +1,532 @@
+"""
+Núcleo de extração de áudio, sem dependência do Qt.
+
+Toda a lógica de download (detecção de vídeo/playlist, opções do yt-dlp,
+staging, renomeação pelo padrão de nomenclatura, pausa e cancelamento) fica
+aqui. Quem usa o núcleo só fornece callbacks:
+
+    on_message(texto)   mensagens de etapa ("Detectada playlist: ...")
+    on_progress(estado) estados numéricos do ProgressAggregator
+
+Falhas passam pela RetryPolicy: erros temporários e bloqueios são tentados
+de novo com backoff, e numa playlist a faixa que falha de vez é pulada
+(e registrada na DeadLetterList) sem perder as demais.
+
+As janelas PyQt5 apenas ligam esses callbacks aos seus sinais; o daemon, a
+linha de comando e servidores sem interface gráfica usam o núcleo direto,
+sem importar o PyQt5. O yt-dlp só é importado na primeira extração, e as
+instâncias do YoutubeDL (com extratores e conexões já abertos) são
+reaproveitadas entre itens e tarefas pelo SessionPool do processo.
+"""
+import os
+from contextlib import ExitStack
+from file_manager import FileManager
+from staging import active_job
+from job_control import JobControl
+from progress_aggregator import ProgressAggregator, format_progress_state
+from retry_policy import RetryPolicy, ERROR_CLASS_LABELS, classify_error, failed_track
+from segmented_download import SegmentedDownload, SegmentError, MIN_SEGMENTED_SIZE, probe_size
+from session_pool import shared_pool
+
+
+def is_playlist_info(info_dict):
+    """Indica se as informações extraídas pelo yt-dlp são de uma playlist (com entradas em lista ou gerador)."""
+    entries = info_dict.get('entries')
+    return info_dict.get('_type') == 'playlist' or (isinstance(entries, list) and len(entries) > 1)
+
+
+def fetch_info(url):
+    """
+    Extrai (sem baixar) as informações de uma URL.
+
+    As entradas de playlists vêm resumidas (extract_flat) e num gerador
+    (ver iter_playlist_entries): as páginas da listagem são consultadas à
+    medida que as entradas são percorridas, então o download começa na
+    primeira página e a memória não cresce com o tamanho do canal.
+
+    Returns:
+        dict: info_dict do yt-dlp
+    """
+    stack = ExitStack()
+    try:
+        ydl = stack.enter_context(shared_pool().session({'quiet': True, 'extract_flat': 'in_playlist'}))
+        # process=False devolve as entradas como gerador, sem percorrer as páginas
+        info_dict = ydl.extract_info(url, download=False, process=False)
+        while info_dict.get('_type') in ('url', 'url_transparent'):
+            info_dict = ydl.extract_info(info_dict['url'], download=False, ie_key=info_dict.get('ie_key'),
+                                         process=False)
+        if info_dict.get('_type') not in ('playlist', 'multi_video'):
+            return ydl.process_ie_result(info_dict, download=False)
+        # O gerador usa a sessão até terminar (ou ser fechado)
+        info_dict['entries'] = iter_playlist_entries(info_dict.get('entries'), stack)
+        stack = None
+        return info_dict
+    finally:
+        if stack is not None:
+            stack.close()
+
+
+def iter_playlist_entries(entries, stack=None):
+    """
+    Gera as entradas de uma playlist à medida que as páginas chegam.
+
+    Args:
+        entries: Entradas do yt-dlp (lista, gerador ou PagedList)
+        stack (ExitStack): Recursos (ex: a sessão da listagem) liberados ao fim do gerador
+
+    Yields:
+        dict: Entradas não vazias, com o 'playlist_index' (a partir de 1) preenchido
+    """
+    try:
+        for index, entry in enumerate(entries or [], start=1):
+            if entry:
+                yield dict(entry, playlist_index=entry.get('playlist_index') or index)
+    finally:
+        if stack is not None:
+            stack.close()
+
+
+def _select_entries(entries, playlist_items):
+    """
+    Filtra as entradas pelo playlist_items (sintaxe do yt-dlp, ex: '1,3,5-7').
+
+    A listagem para depois da última faixa pedida; só índices negativos
+    (contados do fim) exigem percorrer a playlist inteira.
+    """
+    if not playlist_items:
+        yield from entries
+        return
+    from yt_dlp.utils import PlaylistEntries
+
+    specs = list(PlaylistEntries.parse_playlist_items(playlist_items))
+    bounds = [spec for item in specs for spec in ((item.start, item.stop) if isinstance(item, slice) else (item,))]
+    if any(bound is not None and bound < 0 for bound in bounds):
+        entries = list(entries)
+        count = len(entries)
+        specs = [slice(*(count + 1 + v if v is not None and v < 0 else v for v in (s.start, s.stop, s.step)))
+                 if isinstance(s, slice) else (count + 1 + s if s < 0 else s) for s in specs]
+
+    def selected(index):
+        for spec in specs:
+            if not isinstance(spec, slice):
+                if index == spec:
+                    return True
+            elif (spec.start or 1) <= index <= (spec.stop or float('inf')) \
+                    and (index - (spec.start or 1)) % (spec.step or 1) == 0:
+                return True
+        return False
+
+    last = max((spec.stop or float('inf')) if isinstance(spec, slice) else spec for spec in specs)
+    for entry in entries:
+        if entry['playlist_index'] > last:
+            break
+        if selected(entry['playlist_index']):
+            yield entry
+
+
+def _restartable(info_dict):
+    """
+    Uma listagem em gerador só pode ser percorrida uma vez: para uma nova
+    tentativa, as informações são extraídas de novo (as faixas concluídas
+    continuam no arquivo de downloads e não são baixadas outra vez).
+    """
+    if info_dict is not None and is_playlist_info(info_dict) and not isinstance(info_dict.get('entries'), list):
+        entries = info_dict.get('entries')
+        if hasattr(entries, 'close'):
+            entries.close()
+        return None
+    return info_dict
+
+
+def _base_ydl_opts(format, quality, control, aggregator, progress_hooks=None, circuit_breaker=None):
+    ydl_opts = {
+        'quiet': True,
+        'noprogress': True,
+        'format': 'bestaudio/best',
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': format,
+            'preferredquality': quality,
+        }],
+        # Controle primeiro: pausa/cancelamento interrompem antes de notificar quem escuta
+        'progress_hooks': [control.progress_hook, aggregator.update] + list(progress_hooks or []),
+        'postprocessor_hooks': [control.postprocessor_hook],
+    }
+    if circuit_breaker is not None:
+        # Cada vídeo (inclusive as faixas de uma playlist) espera o disjuntor antes de ser consultado
+        ydl_opts['match_filter'] = circuit_breaker.match_filter(control)
+        ydl_opts['progress_hooks'].append(circuit_breaker.progress_hook)
+    return ydl_opts
+
+
+def extract_audio(url, output_directory=None, format='mp3', quality='128K', info_dict=None,
+                  playlist_items=None, layout=None, filename_template=None, scratch_directory=None,
+                  control=None, on_message=None, on_progress=None, progress_rate_hz=10, progress_hooks=None,
+                  retry_policy=None, dead_letters=None, circuit_breaker=None, connections=None):
+    """
+    Extrai o áudio de um vídeo ou playlist.
+
+    Args:
+        url (str): URL do vídeo ou playlist
+        output_directory (str): Diretório base da biblioteca. Se None, usa ~/Audios.
+        format (str): Formato de áudio (mp3, aac, wav, flac, m4a...)
+        quality (str): Qualidade do áudio (ex: '128K')
+        info_dict (dict): Informações já extraídas (ex: na pré-visualização); se None, são extraídas aqui
+        playlist_items (str): Faixas da playlist a baixar (ex: '1,3,5-7'). Se None, baixa todas.
+        layout (str): Layout de subdiretórios da biblioteca (ex: 'artist', 'hash')
+        filename_template (str): Template de nome (ex: '{playlist_index:03d} - {artist} - {song}')
+        scratch_directory (str): Diretório de rascunho para os arquivos temporários
+        control (JobControl): Controle de pausa/cancelamento. Uma pausa ou um cancelamento
+                              interrompem a extração com JobPaused/JobCancelled.
+        on_message (callable): Recebe mensagens de texto sobre as etapas
+        on_progress (callable): Recebe os estados de progresso agregados
+        progress_rate_hz (float): Frequência máxima de chamadas a on_progress
+        progress_hooks (list): progress_hooks extras do yt-dlp (ex: ConcurrencyController.progress_hook)
+        retry_policy (RetryPolicy): Novas tentativas por classe de erro. Se None, usa a política padrão.
+        dead_letters (DeadLetterList): Onde registrar as falhas permanentes (vídeo, playlist ou faixa)
+        circuit_breaker (CircuitBreaker): Disjuntor compartilhado entre as tarefas; enquanto
+                                          aberto, nenhuma requisição nova é feita
+        connections (int): Conexões paralelas para o stream de um vídeo único grande
+                           (download segmentado); None ou 1 usa o download normal do yt-dlp
+
+    Returns:
+        dict: 'success' e 'message', mais 'type' ('video' ou 'playlist') e os dados
+              dos arquivos gerados (playlists também trazem 'failed_tracks'), ou
+              'error', 'error_class' e 'attempts' se a extração falhou
+    """
+    control = control or JobControl()
+    policy = retry_policy or RetryPolicy()
+    message = on_message or (lambda text: None)
+    aggregator = ProgressAggregator(on_progress or (lambda state: None), rate_hz=progress_rate_hz)
+    file_manager = FileManager(output_directory, layout=layout, filename_template=filename_template)
+    options = {key: value for key, value in (('output_directory', output_directory), ('format', format),
+                                             ('quality', quality), ('layout', layout),
+                                             ('filename_template', filename_template),
+                                             ('scratch_directory', scratch_directory)) if value}
+
+    # Faixa em download, para saber qual falhou quando a mensagem de erro não diz
+    current_track = {}
+
+    def track_hook(d):
+        if (d.get('info_dict') or {}).get('id'):
+            current_track['entry'] = d['info_dict']
+
+    def on_entry(entry):
+        # A faixa é conhecida antes da extração, que também pode falhar
+        current_track['entry'] = entry
+
+    progress_hooks = list(progress_hooks or []) + [track_hook]
+    failures = {}        # id da faixa (None = extração inteira) -> falhas
+    failed_tracks = []   # faixas puladas após esgotar as tentativas
+
+    try:
+        while True:
+            try:
+                if circuit_breaker is not None:
+                    circuit_breaker.wait(control, on_wait=message)
+                control.checkpoint()
+                if info_dict is None:
+                    message("Obtendo informações...")
+                    info_dict = fetch_info(url)
+                control.checkpoint()
+
+                if is_playlist_info(info_dict):
+                    result = download_playlist(info_dict, file_manager, format, quality, control, aggregator,
+                                               message, playlist_items=playlist_items,
+                                               scratch_directory=scratch_directory, progress_hooks=progress_hooks,
+                                               circuit_breaker=circuit_breaker, on_entry=on_entry)
+                    # Faixas de tentativas anteriores (e de antes de uma pausa) também contam
+                    result['tracks'] = max(result['tracks'], len(control.completed) - len(failed_tracks))
+                    result['failed_tracks'] = failed_tracks
+                    return result
+                return download_video(info_dict, file_manager, format, quality, control, aggregator, message,
+                                      scratch_directory=scratch_directory, progress_hooks=progress_hooks,
+                                      circuit_breaker=circuit_breaker, connections=connections)
+            except Exception as e:
+                # JobPaused e JobCancelled não derivam de Exception e chegam a quem chamou.
+                # Um FFmpeg encerrado pelo cancelamento aparece como erro do pós-processador
+                control.checkpoint()
+                error = str(e)
+
+            error_class = classify_error(error)
+            if circuit_breaker is not None:
+                circuit_breaker.record_failure(error)
+            label = ERROR_CLASS_LABELS[error_class]
+            track = None
+            if info_dict is not None and is_playlist_info(info_dict):
+                track = _find_failed_track(error, info_dict, current_track.pop('entry', None), control.completed)
+            attempt = failures[track and track['id']] = failures.get(track and track['id'], 0) + 1
+
+            if policy.should_retry(error_class, attempt):
+                delay = policy.delay(error_class, attempt)
+                message(f"Erro {label}: {error}. Nova tentativa ({attempt}/{policy.max_retries(error_class)}) "
+                        f"em {delay:.0f} s...")
+                policy.wait(delay, control)
+                info_dict = _restartable(info_dict)
+                continue
+
+            if track:
+                # Só a faixa falhou: ela vai para a lista de falhas e a playlist continua sem ela
+                message(f"Faixa \"{track['title']}\" ignorada ({label}): {error}")
+                control.completed.add(f"{track['extractor']} {track['id']}")
+                failed_tracks.append(dict(track, error=error, error_class=error_class, attempts=attempt))
+                if dead_letters is not None:
+                    playlist_title = info_dict.get('title', 'Unknown Playlist')
+                    playlist_path = os.path.join(file_manager.base_directory,
+                                                 file_manager.sanitize_filename(playlist_title))
+                    dead_letters.add(track['url'], error, error_class, attempt,
+                                     options=dict(options, output_directory=playlist_path),
+                                     title=track['title'], playlist_url=url)
+                info_dict = _restartable(info_dict)
+                continue
+
+            if dead_letters is not None:
+                dead_letters.add(url, error, error_class, attempt, options=options,
+                                 title=info_dict.get('title') if info_dict else None)
+            return {
+                'success': False,
+                'error': f"Erro na extração: {error}",
+                'error_class': error_class,
+                'attempts': attempt,
+                'message': 'Erro na extração.'
+            }
+    finally:
+        if circuit_breaker is not None:
+            circuit_breaker.release()
+
+
+def _find_failed_track(error, info_dict, current_entry, completed):
+    """
+    Identifica a faixa da playlist que causou o erro: a citada na mensagem
+    do yt-dlp ou, se nenhuma for citada, a última que estava sendo baixada
+    (desde que ainda não esteja no arquivo de downloads `completed`).
+
+    Returns:
+        dict: 'id', 'extractor', 'title' e 'url' da faixa, ou None se o erro
+              não é de uma faixa (ex: da própria playlist)
+    """
+    found = failed_track(error)
+    if found is None and current_entry:
+        found = ((current_entry.get('extractor_key') or current_entry.get('ie_key') or 'youtube').lower(),
+                 current_entry['id'])
+    if found is None or found[1] == info_dict.get('id') or f"{found[0]} {found[1]}" in completed:
+        return None
+
+    extractor, video_id = found
+    entries = info_dict.get('entries')
+    entry = {}
+    if isinstance(entries, list):
+        entry = next((e for e in entries if e and e.get('id') == video_id), None)
+        if entry is None:
+            return None
+    elif current_entry and current_entry.get('id') == video_id:
+        # Listagem em gerador: a faixa em andamento é a única ainda conhecida
+        entry = current_entry
+    url = entry.get('webpage_url') or entry.get('url')
+    if not url:
+        url = f"https://www.youtube.com/watch?v={video_id}" if extractor == 'youtube' else video_id
+    return {'id': video_id, 'extractor': extractor, 'title': entry.get('title') or video_id, 'url': url}
+
+
+def download_video(info_dict, file_manager, format, quality, control, aggregator, message,
+                   scratch_directory=None, progress_hooks=None, circuit_breaker=None, connections=None):
+    """Baixa um vídeo único e o renomeia pelo padrão de nomenclatura."""
+    video_title = info_dict.get('title', 'Unknown Video')
+    video_author = info_dict.get('uploader', 'Unknown')
+    message(f"Detectado vídeo: {video_title}")
+
+    final_filename = file_manager.generate_filename(video_title, format, info_dict)
+    final_path = file_manager.get_full_path(video_title, format, filename=final_filename)
+
+    output_files = []
+
+    def postprocessor_hook(d):
+        if d['status'] == 'finished' and d.get('postprocessor') == 'MoveFilesAfterDownload':
+            output_files.append(d['info_dict'].get('filepath'))
+
+    with ExitStack() as stack:
+        # Com staging, tudo é baixado e convertido no diretório de rascunho
+        # (uma pausa mantém o staging para a retomada, ver JobControl.staging_area)
+        staging = stack.enter_context(control.staging_area(scratch_directory)) if scratch_directory else None
+        download_directory = staging.path if staging else file_manager.base_directory
+
+        ydl_opts = _base_ydl_opts(format, quality, control, aggregator, progress_hooks, circuit_breaker)
+        ydl_opts['outtmpl'] = os.path.join(download_directory, '%(title)s.%(ext)s')
+        ydl_opts['noplaylist'] = True
+        ydl_opts['postprocessor_hooks'].insert(0, postprocessor_hook)
+
+        # Reaproveitar as informações já extraídas em vez de consultar a URL de novo
+        with active_job(download_directory), control.subprocesses(), shared_pool().session(ydl_opts) as ydl:
+            if connections and connections > 1:
+                info_dict = _segmented_prefetch(ydl, ydl_opts, info_dict, connections, control, message)
+            ydl.process_ie_result(info_dict, download=True)
+
+        # Renomear o arquivo baixado para o nome padronizado
+        temp_file_path = next((path for path in output_files if path and os.path.exists(path)), None)
+        if temp_file_path is None and staging:
+            temp_file_path = staging.find_output(format)
+        # O yt-dlp pode já ter gravado com o nome final; renomear criaria uma cópia "(1)"
+        if temp_file_path and os.path.abspath(temp_file_path) != os.path.abspath(final_path):
+            message("Renomeando arquivo...")
+            renamed_path = file_manager.rename_file(temp_file_path, video_title, format, filename=final_filename)
+            if renamed_path:
+                final_filename = os.path.basename(renamed_path)
+                final_path = renamed_path
+
+    artist, song = file_manager.extract_artist_and_song(video_title)
+    return {
+        'success': True,
+        'type': 'video',
+        'video_title': video_title,
+        'video_author': video_author,
+        'artist': artist,
+        'song': song,
+        'filename': final_filename,
+        'full_path': final_path,
+        'format': format,
+        'quality': quality,
+        'message': 'Áudio extraído com sucesso!'
+    }
+
+
+def _segmented_prefetch(ydl, ydl_opts, info_dict, connections, control, message):
+    """
+    Baixa o stream escolhido pelo yt-dlp em segmentos paralelos, no mesmo
+    caminho que o yt-dlp usaria. Ao encontrar o arquivo pronto, o yt-dlp
+    pula o download e segue direto para a conversão (FFmpegExtractAudio).
+
+    Streams pequenos, não HTTP ou servidores sem suporte a Range ficam com
+    o download normal, assim como qualquer falha do download segmentado.
+
+    Returns:
+        dict: info_dict com o formato já selecionado, para o download
+    """
+    resolved = ydl.process_ie_result(info_dict, download=False)
+    size = resolved.get('filesize') or resolved.get('filesize_approx')
+    if resolved.get('protocol') not in ('http', 'https') or not resolved.get('url') or \
+            (size and size < MIN_SEGMENTED_SIZE):
+        return resolved
+
+    filename = ydl.prepare_filename(resolved)
+    if os.path.exists(filename):
+        return resolved
+    total_size = probe_size(resolved['url'], resolved.get('http_headers'))
+    if not total_size or total_size < MIN_SEGMENTED_SIZE:
+        return resolved
+
+    def progress(d):
+        for hook in ydl_opts['progress_hooks']:
+            hook(dict(d, info_dict=resolved))
+
+    message(f"Baixando {total_size / (1024 * 1024):.0f} MB em {connections} conexões paralelas...")
+    download = SegmentedDownload(resolved['url'], filename, total_size, connections=connections,
+                                 http_headers=resolved.get('http_headers'), progress=progress, control=control)
+    try:
+        download.run()
+    except SegmentError as e:
+        message(f"Download segmentado falhou ({e}); usando o download normal...")
+        download.discard()
+    return resolved
+
+
+def download_playlist(info_dict, file_manager, format, quality, control, aggregator, message,
+                      playlist_items=None, scratch_directory=None, progress_hooks=None, circuit_breaker=None,
+                      on_entry=None):
+    """
+    Baixa as faixas de uma playlist num subdiretório com o nome dela.
+
+    As entradas são baixadas uma a uma à medida que a listagem avança
+    (info_dict['entries'] pode ser um gerador, ver fetch_info), com o id do
+    vídeo como nome temporário, e cada faixa concluída é renomeada pelo
+    padrão de nomenclatura logo em seguida, mesmo se a extração for
+    interrompida. As faixas concluídas ficam no arquivo de downloads do
+    JobControl, e uma retomada após pausa não as baixa de novo.
+    """
+    playlist_title = info_dict.get('title', 'Unknown Playlist')
+    message(f"Detectada playlist: {playlist_title}")
+
+    playlist_path = os.path.join(file_manager.base_directory, file_manager.sanitize_filename(playlist_title))
+    file_manager.ensure_directory_exists(playlist_path)
+    playlist_manager = FileManager(playlist_path, layout=file_manager.layout,
+                                   filename_template=file_manager.filename_template)
+
+    # Faixas concluídas e ainda não renomeadas, registradas à medida que o yt-dlp as finaliza
+    finished_entries = []
+    tracks = 0
+
+    def postprocessor_hook(d):
+        if d['status'] == 'finished' and d.get('postprocessor') == 'MoveFilesAfterDownload':
+            finished_entries.append(d['info_dict'])
+
+    ydl_opts = _base_ydl_opts(format, quality, control, aggregator, progress_hooks, circuit_breaker)
+    ydl_opts['noplaylist'] = False
+    ydl_opts['download_archive'] = control.completed
+    # Antes do controle: uma pausa lançada por ele não pode perder a faixa concluída
+    ydl_opts['postprocessor_hooks'].insert(0, postprocessor_hook)
+
+    entries = info_dict.get('entries')
+    # Os campos que o yt-dlp acrescenta às faixas quando processa a playlist inteira
+    playlist_info = {
+        'playlist': playlist_title,
+        'playlist_id': info_dict.get('id'),
+        'playlist_title': playlist_title,
+        'playlist_uploader': info_dict.get('uploader'),
+        'n_entries': len(entries) if isinstance(entries, list) else info_dict.get('playlist_count'),
+    }
+
+    with ExitStack() as stack:
+        staging = stack.enter_context(control.staging_area(scratch_directory)) if scratch_directory else None
+        download_directory = staging.path if staging else playlist_path
+        ydl_opts['outtmpl'] = os.path.join(download_directory, '%(id)s.%(ext)s')
+
+        def rename_finished():
+            nonlocal tracks
+            tracks += len(finished_entries)
+            rename_playlist_files(finished_entries, download_directory, format, playlist_manager)
+            finished_entries.clear()
+
+        # Registrado depois do staging: roda antes da limpeza dele.
+        # Mesmo se o job falhar ou for pausado, as faixas concluídas são preservadas
+        stack.callback(rename_finished)
+        with active_job(download_directory), control.subprocesses(), shared_pool().session(ydl_opts) as ydl:
+            for entry in _select_entries(iter_playlist_entries(entries), playlist_items):
+                control.checkpoint()
+                if on_entry:
+                    on_entry(entry)
+                if ydl.in_download_archive(entry):
+                    continue
+                if circuit_breaker is not None:
+                    circuit_breaker.wait(control, on_wait=message)
+                ydl.process_ie_result(entry, download=True,
+                                      extra_info=dict(playlist_info, playlist_index=entry['playlist_index']))
+                rename_finished()
+
+    return {
+        'success': True,
+        'type': 'playlist',
+        'playlist_title': playlist_title,
+        'output_path': playlist_path,
+        'tracks': tracks,
+        'message': 'Playlist baixada com sucesso!'
+    }
+
+
+def rename_playlist_files(entries, download_directory, format, file_manager):
+    """
+    Renomeia as faixas baixadas como '<id>.<formato>' usando nomes gerados em lote,
+    movendo-as de download_directory para o diretório do file_manager.
+    """
+    entries = [entry for entry in entries if entry]
+    filenames = file_manager.generate_playlist_filenames(entries, format)
+    for entry, filename in zip(entries, filenames):
+        temp_file_path = entry.get('filepath') or os.path.join(download_directory, f"{entry.get('id')}.{format}")
+        if os.path.exists(temp_file_path):
+            file_manager.rename_file(temp_file_path, entry.get('title', ''), format, filename=filename)
+
+
+def print_progress(state):
+    """Callback on_progress que imprime o progresso no console."""
+    if state['status'] == 'downloading':
+        print(f"Progresso: {format_progress_state(state) or 'baixando...'}")
+    elif state['status'] == 'finished':
+        print("Download concluído, processando...")
@@ -0,0 +1,978 @@
+import os
+import sys
+import time
+import getpass
+import secrets
+import argparse
+import itertools
+import queue
+import threading
+import subprocess
+from collections import OrderedDict
+from multiprocessing.connection import Listener, Client
+
+from job_control import JobControl, JobPaused, JobCancelled
+from extraction_core import extract_audio, fetch_info, is_playlist_info
+from concurrency_controller import ConcurrencyController
+from bandwidth_limiter import BandwidthLimiter, BandwidthSchedule, parse_rate, format_rate
+from retry_policy import DeadLetterList
+from circuit_breaker import CircuitBreaker, STATE_LABELS as CIRCUIT_LABELS
+from session_pool import shared_pool
+
+# Diretório de estado do daemon (chave de autenticação, socket e log)
+APP_DIRECTORY = os.path.join(os.path.expanduser("~"), ".youtube_audio_extractor")
+
+# Mesmos valores de DownloadJob (job_queue.py), que não pode ser importado sem Qt
+PENDING = 'pending'
+RUNNING = 'running'
+PAUSED = 'paused'
+FINISHED = 'finished'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+DONE_STATES = (FINISHED, FAILED, CANCELLED)
+
+# Eventos pendentes por assinante antes de descartar progresso
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class DaemonError(Exception):
+    """Erro devolvido pelo daemon a uma requisição."""
+
+
+def default_address():
+    """Endereço local do daemon: named pipe no Windows, socket Unix nos demais sistemas."""
+    if sys.platform == 'win32':
+        return r'\\.\pipe\youtube-audio-extractor-' + getpass.getuser()
+    return os.path.join(APP_DIRECTORY, 'daemon.sock')
+
+
+def load_authkey(create=False):
+    """
+    Lê a chave que autentica clientes do daemon, criando-a se necessário.
+
+    A chave fica num arquivo legível apenas pelo usuário, de modo que outros
+    usuários da máquina não conseguem se conectar ao daemon.
+    """
+    path = os.path.join(APP_DIRECTORY, 'daemon.key')
+    if not os.path.exists(path):
+        if not create:
+            return None
+        os.makedirs(APP_DIRECTORY, exist_ok=True)
+        key = secrets.token_bytes(32)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(key)
+        return key
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class DaemonJob:
+    """
+    Tarefa mantida pelo daemon; `spec` descreve o que baixar.
+
+    O 'info_dict' opcional do spec (já resolvido pelo cliente) fica fora do
+    spec, que vai em todos os eventos da tarefa.
+    """
+
+    def __init__(self, job_id, spec, priority=0):
+        self.job_id = job_id
+        self.spec = dict(spec)
+        self.info_dict = self.spec.pop('info_dict', None)
+        self.priority = priority
+        self.title = spec.get('title') or spec['url']
+        self.kind = spec.get('kind', 'video')
+        self.state = PENDING
+        self.progress = None
+        self.error = None
+        self.result = None
+        self.control = JobControl()
+
+    def snapshot(self):
+        """Estado serializável da tarefa, enviado aos clientes."""
+        return {
+            'job_id': self.job_id,
+            'title': self.title,
+            'kind': self.kind,
+            'priority': self.priority,
+            'state': self.state,
+            'progress': self.progress,
+            'error': self.error,
+            'result': self.result,
+            'spec': self.spec,
+        }
+
+
+class _Subscriber:
+    """
+    Conexão inscrita nos eventos do daemon.
+
+    Uma thread própria envia os eventos, de modo que um cliente lento não
+    segura os workers que os publicam; com a fila cheia, eventos de
+    progresso são descartados.
+    """
+
+    def __init__(self, connection, on_closed):
+        self.connection = connection
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._on_closed = on_closed
+        self._thread = threading.Thread(target=self._run, name="DaemonSubscriber", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Cliente lento: descartar progresso é seguro, o próximo estado o substitui
+            if event['event'] != 'progress':
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    self.queue.put_nowait(event)
+                except queue.Full:
+                    pass
+
+    def _run(self):
+        try:
+            while True:
+                self.connection.send(self.queue.get())
+        except (OSError, EOFError, ValueError):
+            pass
+        finally:
+            self._on_closed(self)
+            self.connection.close()
+
+
+class ExtractionDaemon:
+    """
+    Processo de longa duração que mantém a fila de downloads.
+
+    As janelas e a linha de comando se conectam por um socket local
+    (multiprocessing.connection, autenticado pela chave de load_authkey) e
+    enviam requisições como dicionários {'cmd': ...}. Como o yt-dlp fica
+    carregado e as tarefas pertencem ao daemon, reabrir a interface é
+    instantâneo e os downloads sobrevivem ao fechamento das janelas.
+    """
+
+    INFO_CACHE_TTL = 600       # segundos
+    INFO_CACHE_SIZE = 64       # URLs guardadas; as usadas há mais tempo saem primeiro
+    RESOLVE_MAX_ENTRIES = 200  # entradas de playlist devolvidas por resolve
+
+    def __init__(self, address=None, max_concurrent=2, authkey=None, adaptive_max=None, bandwidth_rate=None,
+                 bandwidth_schedule=None):
+        """
+        Args:
+            address (str): Endereço do socket. Se None, usa default_address()
+            max_concurrent (int): Número máximo de downloads simultâneos (inicial, se adaptativo)
+            authkey (bytes): Chave de autenticação. Se None, usa load_authkey(create=True)
+            adaptive_max (int): Se informado, o limite é ajustado por um ConcurrencyController
+                                entre 1 e adaptive_max
+            bandwidth_rate (float): Banda total em bytes/s, dividida entre os downloads (None = ilimitado)
+            bandwidth_schedule (BandwidthSchedule): Banda total por faixa de horário
+        """
+        self.address = address or default_address()
+        self.authkey = authkey or load_authkey(create=True)
+        self.max_concurrent = max(1, max_concurrent)
+        self.controller = None
+        if adaptive_max:
+            self.controller = ConcurrencyController(initial=self.max_concurrent, max_concurrency=adaptive_max,
+                                                    on_change=self._on_concurrency_change)
+        self.bandwidth = BandwidthLimiter(global_rate=bandwidth_rate, schedule=bandwidth_schedule)
+        self.dead_letters = DeadLetterList()
+        self.circuit_breaker = CircuitBreaker(
+            on_change=lambda snapshot: self._broadcast({'event': 'circuit', 'circuit': snapshot}))
+
+        self._jobs = {}      # job_id -> DaemonJob, em ordem de criação
+        self._pending = []   # fila, em ordem de saída
+        self._running = 0
+        self._workers = []
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._stopping = False
+
+        self._subscribers = []  # _Subscriber
+        self._listeners = []    # callables que recebem os eventos no mesmo processo
+        self._subscribers_lock = threading.Lock()
+
+        self._info_cache = OrderedDict()  # (url, max_entries) -> (momento, info_dict), do menos ao mais recente
+        self._info_cache_lock = threading.Lock()
+        self._listener = None
+
+    # --- Fila ---
+
+    def submit(self, spec, priority=0):
+        if not spec.get('url'):
+            raise DaemonError("A tarefa precisa de uma URL")
+        with self._condition:
+            job = DaemonJob(next(self._ids), dict(spec), priority)
+            self._jobs[job.job_id] = job
+            self._insert_pending(job)
+            self._condition.notify()
+        self._broadcast_queue()
+        return job
+
+    def _insert_pending(self, job):
+        # Depois de todas as pendentes com prioridade maior ou igual
+        position = len(self._pending)
+        for i, pending in enumerate(self._pending):
+            if pending.priority < job.priority:
+                position = i
+                break
+        self._pending.insert(position, job)
+
+    def get_job(self, job_id):
+        """Retorna a tarefa com esse id, ou None."""
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    def _get(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise DaemonError(f"Tarefa {job_id} não encontrada")
+        return job
+
+    def pause(self, job_id):
+        with self._condition:
+            job = self._get(job_id)
+            if job.state == RUNNING:
+                job.control.pause()
+                return
+            if job.state != PENDING:
+                return
+            self._pending.remove(job)
+            job.state = PAUSED
+        self._broadcast_queue()
+
+    def resume(self, job_id):
+        with self._condition:
+            job = self._get(job_id)
+            job.control.resume()
+            if job.state != PAUSED:
+                return
+            job.state = PENDING
+            self._insert_pending(job)
+            self._condition.notify()
+        self._broadcast_queue()
+
+    def cancel(self, job_id):
+        with self._condition:
+            job = self._get(job_id)
+            if job.state == RUNNING:
+                job.control.cancel()
+                return
+            if job.state not in (PENDING, PAUSED):
+                return
+            if job in self._pending:
+                self._pending.remove(job)
+            job.control.cancel()
+            job.control.cleanup()
+            job.state = CANCELLED
+        self._broadcast_queue()
+
+    def move(self, job_id, offset):
+        with self._condition:
+            job = self._get(job_id)
+            if job not in self._pending:
+                return
+            index = self._pending.index(job)
+            target = max(0, min(len(self._pending) - 1, index + offset))
+            if target == index:
+                return
+            self._pending.pop(index)
+            self._pending.insert(target, job)
+            neighbour = self._pending[target + 1] if offset < 0 else self._pending[target - 1]
+            if offset < 0:
+                job.priority = max(job.priority, neighbour.priority)
+            else:
+                job.priority = min(job.priority, neighbour.priority)
+        self._broadcast_queue()
+
+    def set_priority(self, job_id, priority):
+        with self._condition:
+            job = self._get(job_id)
+            job.priority = priority
+            if job in self._pending:
+                self._pending.remove(job)
+                self._insert_pending(job)
+        self._broadcast_queue()
+
+    def set_max_concurrent(self, max_concurrent):
+        with self._condition:
+            self.max_concurrent = max(1, max_concurrent)
+            self._start_workers()
+            self._condition.notify_all()
+
+    def set_bandwidth(self, request):
+        """
+        Altera o limite de banda em tempo de execução.
+
+        Args:
+            request (dict): Campos opcionais 'rate' (banda total, ex: '2M' ou 'ilimitado'),
+                            'schedule' (agenda, '' remove) e 'job_id' com 'job_rate'
+                            (limite próprio da tarefa, 'ilimitado' remove)
+        """
+        try:
+            if 'rate' in request:
+                self.bandwidth.set_global_rate(parse_rate(request['rate']))
+            if 'schedule' in request:
+                self.bandwidth.set_schedule(BandwidthSchedule.parse(request['schedule']))
+            if 'job_id' in request:
+                self._get(request['job_id'])
+                self.bandwidth.set_job_rate(request['job_id'], parse_rate(request.get('job_rate')))
+        except ValueError as e:
+            raise DaemonError(str(e))
+        snapshot = self.bandwidth.snapshot()
+        print(f"Limite de banda: {format_rate(snapshot['effective_rate'])}"
+              + (f" (agenda {snapshot['schedule']})" if snapshot['schedule'] else ""))
+        self._broadcast({'event': 'bandwidth', 'bandwidth': snapshot})
+
+    def retry_dead_letters(self, ids=None):
+        """
+        Reenvia para a fila as falhas permanentes registradas.
+
+        Args:
+            ids (list): Ids das entradas; se None, todas
+
+        Returns:
+            list: Ids das tarefas criadas
+        """
+        job_ids = []
+        for entry in self.dead_letters.take(ids):
+            spec = dict(entry['options'], url=entry['url'], title=entry['title'] or entry['url'])
+            job_ids.append(self.submit(spec).job_id)
+        print(f"{len(job_ids)} falha(s) reenviada(s) para a fila.")
+        return job_ids
+
+    def _on_concurrency_change(self, limit, decision):
+        self.set_max_concurrent(limit)
+        print(f"Downloads simultâneos: {decision['previous']} -> {limit} ({decision['reason']})")
+        self._broadcast({'event': 'concurrency', 'max_concurrent': limit, 'decision': decision})
+
+    def clear_finished(self, keep=0):
+        """
+        Esquece as tarefas encerradas.
+
+        Args:
+            keep (int): Quantidade das encerradas mais recentes mantidas
+
+        Returns:
+            int: Quantidade de tarefas removidas
+        """
+        with self._condition:
+            done = [j.job_id for j in self._jobs.values() if j.state in DONE_STATES]
+            removed = done[:len(done) - keep] if keep > 0 else done
+            for job_id in removed:
+                del self._jobs[job_id]
+                self.bandwidth.set_job_rate(job_id, None)
+        if removed:
+            self._broadcast_queue()
+        return len(removed)
+
+    def ordered_jobs(self):
+        """Tarefas em andamento, pendentes (na ordem da fila), pausadas e encerradas."""
+        with self._condition:
+            jobs = list(self._jobs.values())
+            running = [j for j in jobs if j.state == RUNNING]
+            paused = [j for j in jobs if j.state == PAUSED]
+            done = [j for j in jobs if j.state in DONE_STATES]
+            return running + list(self._pending) + paused + done
+
+    # --- Execução ---
+
+    def _start_workers(self):
+        # Workers extras ficam ociosos se o limite diminuir
+        while len(self._workers) < self.max_concurrent:
+            worker = threading.Thread(target=self._worker_loop, name=f"daemon-worker-{len(self._workers) + 1}",
+                                      daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                while not self._stopping and (not self._pending or self._running >= self.max_concurrent):
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                job = self._pending.pop(0)
+                job.state = RUNNING
+                self._running += 1
+            self._broadcast_queue()
+            try:
+                self._execute(job)
+            finally:
+                with self._condition:
+                    self._running -= 1
+                    self._condition.notify_all()
+                self._broadcast_job(job)
+
+    def _execute(self, job):
+        spec = job.spec
+        job.error = None
+        job.control.release_partial_files()
+        if self.controller:
+            self.controller.job_started()
+        interrupted = False
+        try:
+            with self.bandwidth.job(job.job_id, control=job.control) as limit_hook:
+                result = extract_audio(
+                    spec['url'],
+                    output_directory=spec.get('output_directory'),
+                    format=spec.get('format', 'mp3'),
+                    quality=spec.get('quality', '128K'),
+                    info_dict=job.info_dict,
+                    playlist_items=spec.get('playlist_items'),
+                    layout=spec.get('layout'),
+                    filename_template=spec.get('filename_template'),
+                    scratch_directory=spec.get('scratch_directory'),
+                    connections=spec.get('connections'),
+                    control=job.control,
+                    on_progress=lambda state: self._on_progress(job, state),
+                    progress_rate_hz=4,
+                    progress_hooks=[limit_hook] + ([self.controller.progress_hook] if self.controller else []),
+                    dead_letters=self.dead_letters,
+                    circuit_breaker=self.circuit_breaker,
+                )
+        except JobPaused:
+            interrupted = True
+            # Sob a condição: resume() e cancel() veem a tarefa ainda RUNNING até aqui
+            with self._condition:
+                if job.control.is_cancelled():
+                    job.control.cleanup()
+                    job.state = CANCELLED
+                elif job.control.is_paused():
+                    job.control.hold_partial_files()
+                    job.state = PAUSED
+                else:
+                    # Retomada pedida enquanto a pausa era processada: volta para a fila
+                    job.state = PENDING
+                    self._insert_pending(job)
+                    self._condition.notify()
+            return
+        except JobCancelled:
+            interrupted = True
+            with self._condition:
+                job.control.cleanup()
+                job.state = CANCELLED
+            return
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        finally:
+            # Não pelo estado: uma tarefa devolvida à fila pode já estar RUNNING em outro worker
+            if self.controller and interrupted:
+                # Pausas e cancelamentos contam como término sem erro
+                self.controller.job_finished()
+
+        with self._condition:
+            job.result = result
+            if result.get('success'):
+                job.state = FINISHED
+            else:
+                job.error = result.get('error') or result.get('message')
+                job.state = FAILED
+        if self.controller:
+            self.controller.job_finished(job.error)
+
+    def _on_progress(self, job, state):
+        job.progress = state
+        self._broadcast({'event': 'progress', 'job_id': job.job_id, 'state': state})
+
+    # --- Metadados ---
+
+    def resolve(self, url, max_entries=None):
+        """
+        Extrai (sem baixar) as informações de uma URL, com cache por INFO_CACHE_TTL.
+
+        A listagem de uma playlist é percorrida só até `max_entries` entradas
+        (ver extraction_core.fetch_info); 'entries_truncated' indica se havia mais.
+
+        Args:
+            url (str): URL do vídeo ou playlist
+            max_entries (int): Máximo de entradas devolvidas. Se None, usa RESOLVE_MAX_ENTRIES
+
+        Returns:
+            dict: info_dict do yt-dlp, sanitizado para ser enviado pelo socket
+        """
+        max_entries = max_entries or self.RESOLVE_MAX_ENTRIES
+        key = (url, max_entries)
+        with self._info_cache_lock:
+            self._evict_expired_info()
+            cached = self._info_cache.get(key)
+            if cached:
+                self._info_cache.move_to_end(key)
+                return cached[1]
+
+        info_dict = fetch_info(url)
+        if is_playlist_info(info_dict):
+            entries = info_dict['entries']
+            try:
+                listed = list(itertools.islice(entries, max_entries + 1))
+            finally:
+                if hasattr(entries, 'close'):
+                    entries.close()
+            info_dict['entries'] = listed[:max_entries]
+            info_dict['entries_truncated'] = len(listed) > max_entries
+        import yt_dlp
+        info_dict = yt_dlp.YoutubeDL.sanitize_info(info_dict)
+
+        with self._info_cache_lock:
+            self._info_cache[key] = (time.monotonic(), info_dict)
+            self._info_cache.move_to_end(key)
+            while len(self._info_cache) > self.INFO_CACHE_SIZE:
+                self._info_cache.popitem(last=False)
+        return info_dict
+
+    def _evict_expired_info(self):
+        # Chamado com _info_cache_lock; a ordem é de uso, não de inserção, então a varredura é completa
+        now = time.monotonic()
+        for key in [key for key, (moment, _) in self._info_cache.items() if now - moment >= self.INFO_CACHE_TTL]:
+            del self._info_cache[key]
+
+    # --- Eventos ---
+
+    def add_listener(self, listener):
+        """Registra um callable que recebe os eventos (chamado nas threads do daemon)."""
+        with self._subscribers_lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self._subscribers_lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _broadcast(self, event):
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(event)
+        for subscriber in subscribers:
+            subscriber.put(event)
+
+    def _remove_subscriber(self, subscriber):
+        with self._subscribers_lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def _broadcast_job(self, job):
+        self._broadcast({'event': 'job', 'job': job.snapshot()})
+
+    def _broadcast_queue(self):
+        self._broadcast({'event': 'queue', 'jobs': [j.snapshot() for j in self.ordered_jobs()]})
+
+    # --- Servidor ---
+
+    def _handle(self, request):
+        cmd = request.get('cmd')
+        if cmd == 'ping':
+            return {'ok': True, 'pid': os.getpid()}
+        if cmd == 'status':
+            return {'ok': True, 'pid': os.getpid(), 'max_concurrent': self.max_concurrent,
+                    'controller': self.controller.snapshot() if self.controller else None,
+                    'bandwidth': self.bandwidth.snapshot(),
+                    'circuit': self.circuit_breaker.snapshot(),
+                    'sessions': shared_pool().stats(),
+                    'jobs': [j.snapshot() for j in self.ordered_jobs()]}
+        if cmd == 'submit':
+            job = self.submit(request['spec'], request.get('priority', 0))
+            return {'ok': True, 'job_id': job.job_id}
+        if cmd in ('pause', 'resume', 'cancel'):
+            getattr(self, cmd)(request['job_id'])
+            return {'ok': True}
+        if cmd == 'move':
+            self.move(request['job_id'], request['offset'])
+            return {'ok': True}
+        if cmd == 'set_priority':
+            self.set_priority(request['job_id'], request['priority'])
+            return {'ok': True}
+        if cmd == 'set_max_concurrent':
+            if self.controller:
+                # O controlador passa a partir do valor escolhido (e o aplica via on_change)
+                self.controller.set_limit(request['max_concurrent'])
+            self.set_max_concurrent(request['max_concurrent'])
+            return {'ok': True}
+        if cmd == 'set_bandwidth':
+            self.set_bandwidth(request)
+            return {'ok': True, 'bandwidth': self.bandwidth.snapshot()}
+        if cmd == 'reset_circuit':
+            self.circuit_breaker.reset()
+            return {'ok': True}
+        if cmd == 'dead_letters':
+            return {'ok': True, 'entries': self.dead_letters.entries()}
+        if cmd == 'retry_dead_letters':
+            job_ids = self.retry_dead_letters(request.get('ids'))
+            return {'ok': True, 'job_ids': job_ids}
+        if cmd == 'clear_finished':
+            self.clear_finished()
+            return {'ok': True}
+        if cmd == 'resolve':
+            return {'ok': True, 'info': self.resolve(request['url'], request.get('max_entries'))}
+        if cmd == 'shutdown':
+            threading.Thread(target=self.stop, daemon=True).start()
+            return {'ok': True}
+        raise DaemonError(f"Comando desconhecido: {cmd}")
+
+    def _serve_connection(self, connection):
+        try:
+            while True:
+                request = connection.recv()
+                if request.get('cmd') == 'subscribe':
+                    # A conexão passa a receber apenas eventos
+                    connection.send({'ok': True, 'max_concurrent': self.max_concurrent,
+                                     'jobs': [j.snapshot() for j in self.ordered_jobs()]})
+                    subscriber = _Subscriber(connection, self._remove_subscriber)
+                    with self._subscribers_lock:
+                        self._subscribers.append(subscriber)
+                    subscriber.start()
+                    return
+                try:
+                    reply = self._handle(request)
+                except DaemonError as e:
+                    reply = {'ok': False, 'error': str(e)}
+                except Exception as e:
+                    reply = {'ok': False, 'error': f"Erro no daemon: {e}"}
+                connection.send(reply)
+        except (EOFError, OSError):
+            connection.close()
+
+    def start(self):
+        """Inicia os workers sem abrir o socket (ex: dentro do servidor HTTP)."""
+        import preload
+        # Mantém o yt-dlp carregado para todos os clientes
+        preload.start_preload()
+        with self._condition:
+            self._start_workers()
+
+    def serve_forever(self):
+        """
+        Aceita conexões até stop() ser chamado.
+
+        Returns:
+            bool: False se outro daemon já responde no mesmo endereço
+        """
+        if not sys.platform == 'win32' and os.path.exists(self.address):
+            if is_daemon_running(self.address, authkey=self.authkey):
+                print(f"Outro daemon de extração já está ouvindo em {self.address}; encerrando.")
+                return False
+            # Socket deixado por um daemon que terminou sem limpar
+            os.remove(self.address)
+        self._listener = Listener(self.address, authkey=self.authkey)
+        self.start()
+        print(f"Daemon de extração ouvindo em {self.address} (pid {os.getpid()})")
+
+        while not self._stopping:
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError):
+                if self._stopping:
+                    break
+                continue
+            except Exception as e:
+                # Cliente sem a chave correta
+                print(f"Conexão recusada: {e}")
+                continue
+            threading.Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+        return True
+
+    def stop(self):
+        """Para o daemon, cancelando os downloads em andamento."""
+        with self._condition:
+            self._stopping = True
+            for job in self._jobs.values():
+                if job.state == RUNNING:
+                    job.control.cancel()
+            self._condition.notify_all()
+        if self._listener is not None:
+            # Acorda o accept() bloqueado com uma conexão descartável
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except OSError:
+                pass
+            self._listener.close()
+        shared_pool().close()
+
+
+class DaemonClient:
+    """Cliente do ExtractionDaemon; cada instância mantém uma conexão de requisições."""
+
+    def __init__(self, address=None, authkey=None):
+        self.address = address or default_address()
+        self.authkey = authkey
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        if self._connection is None:
+            authkey = self.authkey or load_authkey()
+            if authkey is None:
+                raise ConnectionRefusedError("Daemon nunca foi iniciado (chave inexistente)")
+            self._connection = Client(self.address, authkey=authkey)
+        return self
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def request(self, cmd, **kwargs):
+        """Envia uma requisição e devolve a resposta, lançando DaemonError em caso de erro."""
+        with self._lock:
+            self.connect()
+            self._connection.send(dict(kwargs, cmd=cmd))
+            reply = self._connection.recv()
+        if not reply.get('ok'):
+            raise DaemonError(reply.get('error', 'Erro desconhecido'))
+        return reply
+
+    def ping(self):
+        return self.request('ping')['pid']
+
+    def status(self):
+        return self.request('status')
+
+    def submit(self, spec, priority=0):
+        """
+        Envia uma tarefa ao daemon.
+
+        Args:
+            spec (dict): url e, opcionalmente, output_directory, format, quality,
+                         layout, filename_template, scratch_directory, playlist_items,
+                         title e kind
+            priority (int): Prioridade; valores maiores saem da fila primeiro
+
+        Returns:
+            int: Identificador da tarefa no daemon
+        """
+        return self.request('submit', spec=spec, priority=priority)['job_id']
+
+    def pause(self, job_id):
+        self.request('pause', job_id=job_id)
+
+    def resume(self, job_id):
+        self.request('resume', job_id=job_id)
+
+    def cancel(self, job_id):
+        self.request('cancel', job_id=job_id)
+
+    def move(self, job_id, offset):
+        self.request('move', job_id=job_id, offset=offset)
+
+    def set_priority(self, job_id, priority):
+        self.request('set_priority', job_id=job_id, priority=priority)
+
+    def set_max_concurrent(self, max_concurrent):
+        self.request('set_max_concurrent', max_concurrent=max_concurrent)
+
+    def set_bandwidth(self, **fields):
+        """Altera o limite de banda (ver ExtractionDaemon.set_bandwidth)."""
+        return self.request('set_bandwidth', **fields)['bandwidth']
+
+    def reset_circuit(self):
+        self.request('reset_circuit')
+
+    def dead_letters(self):
+        return self.request('dead_letters')['entries']
+
+    def retry_dead_letters(self, ids=None):
+        return self.request('retry_dead_letters', ids=ids)['job_ids']
+
+    def clear_finished(self):
+        self.request('clear_finished')
+
+    def resolve(self, url, max_entries=None):
+        return self.request('resolve', url=url, max_entries=max_entries)['info']
+
+    def shutdown(self):
+        self.request('shutdown')
+
+    def events(self):
+        """
+        Gera os eventos do daemon numa conexão separada.
+
+        O primeiro evento é {'event': 'queue', 'jobs': [...]} com o estado
+        atual; depois vêm eventos 'queue', 'job' e 'progress'. Termina quando
+        o daemon fecha a conexão.
+        """
+        authkey = self.authkey or load_authkey()
+        connection = Client(self.address, authkey=authkey)
+        try:
+            connection.send({'cmd': 'subscribe'})
+            reply = connection.recv()
+            yield {'event': 'queue', 'jobs': reply['jobs'], 'max_concurrent': reply['max_concurrent']}
+            while True:
+                yield connection.recv()
+        except (EOFError, OSError):
+            return
+        finally:
+            connection.close()
+
+
+def is_daemon_running(address=None, authkey=None):
+    try:
+        client = DaemonClient(address, authkey=authkey).connect()
+    except (OSError, EOFError):
+        return False
+    try:
+        client.ping()
+        return True
+    except (OSError, EOFError, DaemonError):
+        return False
+    finally:
+        client.close()
+
+
+def spawn_daemon():
+    """Inicia o daemon num processo desacoplado deste (sobrevive ao fechamento da interface)."""
+    if getattr(sys, 'frozen', False):
+        # Executável do PyInstaller: o app.py repassa --daemon para main()
+        command = [sys.executable, '--daemon']
+    else:
+        command = [sys.executable, os.path.abspath(__file__), 'serve']
+
+    os.makedirs(APP_DIRECTORY, exist_ok=True)
+    log = open(os.path.join(APP_DIRECTORY, 'daemon.log'), 'ab')
+    kwargs = {'stdin': subprocess.DEVNULL, 'stdout': log, 'stderr': subprocess.STDOUT}
+    if sys.platform == 'win32':
+        kwargs['creationflags'] = (getattr(subprocess, 'DETACHED_PROCESS', 0) |
+                                   getattr(subprocess, 'CREATE_NEW_PROCESS_GROUP', 0))
+    else:
+        kwargs['start_new_session'] = True
+    subprocess.Popen(command, **kwargs)
+    log.close()
+
+
+def ensure_daemon(address=None, timeout=15):
+    """
+    Conecta ao daemon, iniciando-o se ainda não estiver rodando.
+
+    Returns:
+        DaemonClient: Cliente conectado
+
+    Raises:
+        TimeoutError: Se o daemon não responder dentro de `timeout` segundos
+    """
+    if not is_daemon_running(address):
+        spawn_daemon()
+        deadline = time.monotonic() + timeout
+        while not is_daemon_running(address):
+            if time.monotonic() > deadline:
+                raise TimeoutError("O daemon de extração não respondeu")
+            time.sleep(0.1)
+    return DaemonClient(address).connect()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Daemon de extração do YouTube Audio Extractor.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="Executa o daemon em primeiro plano")
+    serve_parser.add_argument('--max-concurrent', type=int, default=2)
+    serve_parser.add_argument('--adaptive-max', type=int, default=None,
+                              help="Ajusta o número de downloads simultâneos sozinho, até este limite")
+    serve_parser.add_argument('--limit-rate', default=None,
+                              help="Banda total, dividida entre os downloads (ex: 2M, 500K)")
+    serve_parser.add_argument('--bandwidth-schedule', default=None,
+                              help="Banda total por horário, ex: '22:00-07:00=ilimitado;07:00-22:00=2M'")
+    subparsers.add_parser('start', help="Inicia o daemon em segundo plano")
+    subparsers.add_parser('status', help="Mostra as tarefas do daemon")
+    subparsers.add_parser('stop', help="Para o daemon")
+    subparsers.add_parser('reset-circuit', help="Fecha o disjuntor e retoma os downloads na hora")
+    limit_parser = subparsers.add_parser('limit', help="Altera o limite de banda do daemon")
+    limit_parser.add_argument('rate', nargs='?', help="Banda total (ex: 2M, 500K, ilimitado)")
+    limit_parser.add_argument('--job', type=int, help="Aplica RATE só a esta tarefa")
+    limit_parser.add_argument('--schedule', help="Agenda por horário ('' remove a agenda)")
+    dead_parser = subparsers.add_parser('dead-letters', help="Lista (ou reenvia) as falhas permanentes")
+    dead_parser.add_argument('ids', nargs='*', help="Ids das entradas a reenviar (padrão: todas)")
+    dead_parser.add_argument('--retry', action='store_true', help="Reenvia as entradas para a fila")
+    submit_parser = subparsers.add_parser('submit', help="Envia URLs para a fila do daemon")
+    submit_parser.add_argument('urls', nargs='+')
+    submit_parser.add_argument('--format', default='mp3')
+    submit_parser.add_argument('--quality', default='128K')
+    submit_parser.add_argument('--output-directory')
+    submit_parser.add_argument('--connections', type=int, help="Conexões paralelas para vídeos únicos grandes")
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        try:
+            bandwidth_rate = parse_rate(args.limit_rate)
+            bandwidth_schedule = BandwidthSchedule.parse(args.bandwidth_schedule)
+        except ValueError as e:
+            parser.error(str(e))
+        daemon = ExtractionDaemon(max_concurrent=args.max_concurrent, adaptive_max=args.adaptive_max,
+                                  bandwidth_rate=bandwidth_rate, bandwidth_schedule=bandwidth_schedule)
+        return 0 if daemon.serve_forever() else 1
+
+    try:
+        if args.command == 'start':
+            print(f"Daemon ativo (pid {ensure_daemon().ping()})")
+        elif args.command == 'status':
+            status = DaemonClient().status()
+            print(f"Daemon pid {status['pid']}, até {status['max_concurrent']} downloads simultâneos")
+            if status.get('controller'):
+                for decision in status['controller']['decisions']:
+                    print(f"  {time.strftime('%H:%M:%S', time.localtime(decision['time']))} "
+                          f"{decision['previous']} -> {decision['limit']}: {decision['reason']}")
+            bandwidth = status['bandwidth']
+            print(f"Banda: {format_rate(bandwidth['effective_rate'])}"
+                  + (f" (agenda {bandwidth['schedule']})" if bandwidth['schedule'] else ""))
+            circuit = status['circuit']
+            print(f"Disjuntor: {CIRCUIT_LABELS[circuit['state']]}"
+                  + (f" (mais {circuit['remaining']:.0f} s)" if circuit['remaining'] else ""))
+            sessions = status['sessions']
+            print(f"Sessões do yt-dlp: {sessions['created']} criadas, {sessions['reused']} reaproveitadas, "
+                  f"{sessions['idle']} ociosas")
+            for job in status['jobs']:
+                print(f"{job['job_id']:>5}  {job['state']:<10} {job['title']}")
+        elif args.command == 'limit':
+            fields = {}
+            if args.job is not None:
+                fields.update(job_id=args.job, job_rate=args.rate)
+            elif args.rate is not None:
+                fields['rate'] = args.rate
+            if args.schedule is not None:
+                fields['schedule'] = args.schedule
+            if not fields:
+                parser.error("informe RATE e/ou --schedule")
+            bandwidth = DaemonClient().set_bandwidth(**fields)
+            print(f"Banda: {format_rate(bandwidth['effective_rate'])}"
+                  + (f" (agenda {bandwidth['schedule']})" if bandwidth['schedule'] else ""))
+            for job_id, job in bandwidth['jobs'].items():
+                if job['cap']:
+                    print(f"  tarefa {job_id}: até {format_rate(job['cap'])}")
+        elif args.command == 'dead-letters':
+            client = DaemonClient()
+            if args.retry:
+                job_ids = client.retry_dead_letters(args.ids or None)
+                print(f"{len(job_ids)} falha(s) reenviada(s): tarefas {', '.join(map(str, job_ids)) or '-'}")
+            else:
+                for entry in client.dead_letters():
+                    print(f"{entry['id']}  {entry['error_class']:<11} {entry['attempts']}x  "
+                          f"{entry['title'] or entry['url']}: {entry['error']}")
+        elif args.command == 'reset-circuit':
+            DaemonClient().reset_circuit()
+            print("Disjuntor fechado.")
+        elif args.command == 'stop':
+            DaemonClient().shutdown()
+            print("Daemon encerrado.")
+        elif args.command == 'submit':
+            client = ensure_daemon()
+            for url in args.urls:
+                job_id = client.submit({'url': url, 'format': args.format, 'quality': args.quality,
+                                        'output_directory': args.output_directory,
+                                        'connections': args.connections})
+                print(f"Tarefa {job_id}: {url}")
+    except (OSError, EOFError) as e:
+        print(f"Não foi possível falar com o daemon: {e}")
+        return 1
+    except DaemonError as e:
+        print(f"Erro: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,21 +2,36 @@ import os
 import re
 import unicodedata
 from pathlib import Path
+from library_layout import LibraryLayout
+from filename_template import compile_template
+from staging import atomic_move
 
 class FileManager:
-    def __init__(self, base_directory=None):
+    def __init__(self, base_directory=None, layout=None, filename_template=None):
         """
         Inicializa o gerenciador de arquivos.
         
         Args:
             base_directory (str): Diretório base para salvar os arquivos. 
                                  Se None, usa ~/Audios
+            layout (str|LibraryLayout): Layout de subdiretórios (preset ou padrão).
+                                        Se None, salva tudo direto no diretório base
+            filename_template (str): Template de nome, ex: '{playlist_index:03d} - {artist} - {song}'.
+                                     Se None, usa o padrão "Artista - Música"
         """
         if base_directory is None:
             self.base_directory = os.path.join(os.path.expanduser("~"), "Audios")
         else:
             self.base_directory = base_directory
         
+        if layout is None or isinstance(layout, LibraryLayout):
+            self.layout = layout or LibraryLayout()
+        else:
+            self.layout = LibraryLayout(layout)
+        
+        # O template é compilado uma única vez e reaproveitado em todas as chamadas
+        self.filename_template = compile_template(filename_template) if filename_template else None
+        
         self.ensure_directory_exists(self.base_directory)
     
     def ensure_directory_exists(self, directory_path):
@@ -125,25 +140,31 @@ class FileManager:
         
         return filename
     
-    def generate_filename(self, video_title, audio_format):
+    def generate_filename(self, video_title, audio_format, info_dict=None):
         """
-        Gera o nome do arquivo seguindo o padrão: artista - música.formato
+        Gera o nome do arquivo seguindo o padrão: artista - música.formato,
+        ou o template configurado pelo usuário.
         
         Args:
             video_title (str): Título do vídeo
             audio_format (str): Formato do áudio (mp3, wav, etc.)
+            info_dict (dict): Metadados do yt-dlp usados pelo template (opcional)
             
         Returns:
             str: Nome do arquivo formatado
         """
-        artist, song = self.extract_artist_and_song(video_title)
-        
-        if artist and song:
-            # Formato: artista - música.formato
-            filename = f"{artist} - {song}"
+        if self.filename_template:
+            values = self.template_values(video_title, audio_format, info_dict)
+            filename = self.filename_template.render(values)
         else:
-            # Se não conseguir extrair, usa o título limpo
-            filename = song  # song contém o título limpo quando artist é None
+            artist, song = self.extract_artist_and_song(video_title)
+            
+            if artist and song:
+                # Formato: artista - música.formato
+                filename = f"{artist} - {song}"
+            else:
+                # Se não conseguir extrair, usa o título limpo
+                filename = song  # song contém o título limpo quando artist é None
         
         # Sanitizar o nome do arquivo
         filename = self.sanitize_filename(filename)
@@ -151,21 +172,78 @@ class FileManager:
         # Adicionar extensão
         return f"{filename}.{audio_format}"
     
-    def get_full_path(self, video_title, audio_format):
+    def template_values(self, video_title, audio_format, info_dict=None):
+        """
+        Monta os campos disponíveis para o template de nome.
+        
+        Args:
+            video_title (str): Título do vídeo
+            audio_format (str): Formato do áudio
+            info_dict (dict): Metadados do yt-dlp (opcional)
+            
+        Returns:
+            dict: Campos do info dict mais artist, song, title e ext
+        """
+        artist, song = self.extract_artist_and_song(video_title)
+        values = {
+            'title': video_title,
+            'artist': artist,
+            'song': song,
+            'ext': audio_format,
+        }
+        if info_dict:
+            for key, value in info_dict.items():
+                if value is not None and key not in ('artist', 'ext'):
+                    values[key] = value
+            # Preferir o artista informado pelo site quando existir
+            if info_dict.get('artist'):
+                values['artist'] = info_dict['artist']
+        return values
+    
+    def generate_playlist_filenames(self, entries, audio_format):
+        """
+        Gera os nomes de todas as faixas de uma playlist de uma só vez.
+        
+        Args:
+            entries (list): Entradas (info dicts) da playlist
+            audio_format (str): Formato do áudio
+            
+        Returns:
+            list: Nomes de arquivo na mesma ordem das entradas
+        """
+        entries = [entry for entry in entries if entry]
+        if not self.filename_template:
+            return [self.generate_filename(entry.get('title', ''), audio_format, entry) for entry in entries]
+        
+        values_list = []
+        for position, entry in enumerate(entries, start=1):
+            values = self.template_values(entry.get('title', ''), audio_format, entry)
+            values.setdefault('playlist_index', position)
+            values_list.append(values)
+        
+        return [f"{self.sanitize_filename(name)}.{audio_format}"
+                for name in self.filename_template.render_many(values_list)]
+    
+    def get_full_path(self, video_title, audio_format, info_dict=None, filename=None):
         """
         Retorna o caminho completo para salvar o arquivo.
         
         Args:
             video_title (str): Título do vídeo
             audio_format (str): Formato do áudio
+            info_dict (dict): Metadados do yt-dlp usados pelo template (opcional)
+            filename (str): Nome já gerado (ex: em lote); se None, é gerado aqui
             
         Returns:
             str: Caminho completo do arquivo
         """
-        filename = self.generate_filename(video_title, audio_format)
-        return os.path.join(self.base_directory, filename)
+        if filename is None:
+            filename = self.generate_filename(video_title, audio_format, info_dict)
+        artist, song = self.extract_artist_and_song(video_title)
+        relative_path = self.layout.relative_path(filename, artist, song, self.sanitize_filename)
+        return os.path.join(self.base_directory, relative_path)
     
-    def rename_file(self, current_path, video_title, audio_format):
+    def rename_file(self, current_path, video_title, audio_format, info_dict=None, filename=None):
         """
         Renomeia um arquivo existente para seguir o padrão de nomenclatura.
         
@@ -173,6 +251,8 @@ class FileManager:
             current_path (str): Caminho atual do arquivo
             video_title (str): Título do vídeo
             audio_format (str): Formato do áudio
+            info_dict (dict): Metadados do yt-dlp usados pelo template (opcional)
+            filename (str): Nome já gerado (ex: em lote); se None, é gerado aqui
             
         Returns:
             str: Novo caminho do arquivo ou None se falhou
@@ -181,8 +261,7 @@ class FileManager:
             print(f"Arquivo não encontrado: {current_path}")
             return None
         
-        new_filename = self.generate_filename(video_title, audio_format)
-        new_path = os.path.join(self.base_directory, new_filename)
+        new_path = self.get_full_path(video_title, audio_format, info_dict, filename)
         
         try:
             # Evitar sobrescrever arquivos existentes
@@ -193,7 +272,8 @@ class FileManager:
                 new_path = f"{name} ({counter}){ext}"
                 counter += 1
             
-            os.rename(current_path, new_path)
+            # Atômico mesmo quando o arquivo vem de outro disco (diretório de staging)
+            atomic_move(current_path, new_path)
             print(f"Arquivo renomeado: {os.path.basename(new_path)}")
             return new_path
         except OSError as e:
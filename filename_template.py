@@ -0,0 +1,102 @@
+import string
+from functools import lru_cache
+
+# Valor usado quando um campo do template não existe no info dict
+MISSING_VALUE = "NA"
+
+
+class FilenameTemplate:
+    """
+    Template de nome de arquivo definido pelo usuário, ex:
+    '{playlist_index:03d} - {artist} - {song}' ou '{upload_date} {title} [{id}]'.
+
+    O template é analisado uma única vez na construção e transformado em uma
+    lista de partes pré-compiladas; formatar um nome é apenas percorrer essa
+    lista, sem nenhuma análise de texto por chamada.
+    """
+
+    def __init__(self, template):
+        """
+        Args:
+            template (str): Template no formato de str.format, sem extensão
+        """
+        self.template = template
+        self.fields = []
+        self._parts = []
+
+        formatter = string.Formatter()
+        try:
+            parsed = list(formatter.parse(template))
+        except ValueError as e:
+            raise ValueError(f"Template de nome inválido '{template}': {e}")
+
+        for literal, field, format_spec, conversion in parsed:
+            if literal:
+                self._parts.append(literal)
+            if field is None:
+                continue
+            if not field or not field.isidentifier():
+                raise ValueError(f"Campo inválido no template de nome: '{{{field}}}'")
+            self.fields.append(field)
+            self._parts.append(self._compile_field(field, format_spec, conversion))
+
+    @staticmethod
+    def _compile_field(field, format_spec, conversion):
+        if conversion == 'r':
+            convert = repr
+        elif conversion == 'a':
+            convert = ascii
+        else:
+            convert = None
+
+        def render(values):
+            value = values.get(field)
+            if value is None or value == '':
+                return MISSING_VALUE
+            if convert:
+                value = convert(value)
+            try:
+                return format(value, format_spec)
+            except (ValueError, TypeError):
+                # Ex: '{playlist_index:03d}' com valor textual
+                return str(value)
+
+        return render
+
+    def render(self, values):
+        """
+        Formata o nome usando os valores fornecidos.
+
+        Args:
+            values (dict): Campos disponíveis (info dict do yt-dlp e campos derivados)
+
+        Returns:
+            str: Nome formatado, ainda sem sanitização e sem extensão
+        """
+        return ''.join(part if isinstance(part, str) else part(values) for part in self._parts)
+
+    def render_many(self, values_list):
+        """Formata vários nomes de uma vez (ex: todas as faixas de uma playlist)."""
+        render = self.render
+        return [render(values) for values in values_list]
+
+
+@lru_cache(maxsize=32)
+def compile_template(template):
+    """
+    Retorna o FilenameTemplate compilado, reaproveitando compilações anteriores.
+
+    Args:
+        template (str): Texto do template
+
+    Returns:
+        FilenameTemplate: Template compilado
+    """
+    return FilenameTemplate(template)
+
+
+if __name__ == "__main__":
+    template = compile_template("{playlist_index:03d} - {artist} - {song} [{id}]")
+    print(f"Campos: {template.fields}")
+    print(template.render({'playlist_index': 7, 'artist': 'Queen', 'song': 'Bohemian Rhapsody', 'id': 'fJ9rUzIMcZQ'}))
+    print(template.render({'artist': 'Queen', 'song': 'Bohemian Rhapsody'}))
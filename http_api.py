@@ -0,0 +1,356 @@
+"""
+API HTTP local para enfileirar e acompanhar extrações sem sessão gráfica.
+
+A fila, os workers, a pausa e o cancelamento são os do ExtractionDaemon
+(rodando no mesmo processo); este módulo só traduz HTTP para ele. O laço
+de requisições é assíncrono (asyncio): consultas de status apenas leem os
+snapshots das tarefas e nunca esperam pelos workers, e o progresso é
+transmitido por Server-Sent Events. Só as MAX_FINISHED_JOBS tarefas
+encerradas mais recentes são mantidas.
+
+Endpoints (JSON):
+    GET    /health                 estado do servidor
+    GET    /jobs                   todas as tarefas
+    POST   /jobs                   {"url": ...} ou {"urls": [...]}, mais format, quality,
+                                   layout, filename_template, playlist_items e priority
+    DELETE /jobs?state=done        esquece as tarefas encerradas
+    GET    /jobs/<id>              uma tarefa
+    POST   /jobs/<id>/pause        pausa
+    POST   /jobs/<id>/resume       retoma
+    POST   /jobs/<id>/cancel       cancela (DELETE /jobs/<id> também)
+    GET    /events                 eventos de todas as tarefas (SSE)
+    GET    /jobs/<id>/events       eventos de uma tarefa (SSE)
+
+Uso:
+    python http_api.py --port 8765 --max-concurrent 4 --token segredo
+    curl -H "Authorization: Bearer segredo" -d '{"url": "..."}' http://127.0.0.1:8765/jobs
+"""
+import sys
+import hmac
+import json
+import asyncio
+import argparse
+from urllib.parse import urlsplit, parse_qs
+
+from extraction_daemon import ExtractionDaemon, DaemonError, DONE_STATES
+
+# Campos da tarefa que os clientes podem definir; o diretório de saída é do servidor
+CLIENT_SPEC_FIELDS = ('url', 'title', 'format', 'quality', 'layout', 'filename_template', 'playlist_items',
+                      'connections')
+
+MAX_BODY_SIZE = 1024 * 1024
+SSE_KEEPALIVE = 15      # segundos entre comentários de keep-alive
+SUBSCRIBER_QUEUE_SIZE = 256
+MAX_FINISHED_JOBS = 500  # tarefas encerradas mantidas; as mais antigas são esquecidas
+
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class _Subscriber:
+    """Cliente de um fluxo SSE; job_id None recebe os eventos de todas as tarefas."""
+
+    def __init__(self, job_id=None):
+        self.job_id = job_id
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.last_state = None
+
+    def accepts(self, event):
+        """Filtra o evento para este cliente, retornando o que deve ser enviado (ou None)."""
+        if self.job_id is None:
+            return event
+        if event['event'] == 'progress':
+            return event if event['job_id'] == self.job_id else None
+        if event['event'] not in ('queue', 'job'):
+            return None
+        # Mudanças de estado de tarefas pendentes só aparecem nos eventos 'queue'
+        snapshots = event['jobs'] if event['event'] == 'queue' else [event['job']]
+        for snapshot in snapshots:
+            if snapshot['job_id'] == self.job_id:
+                if event['event'] == 'queue' and snapshot['state'] == self.last_state:
+                    return None
+                self.last_state = snapshot['state']
+                return {'event': 'job', 'job': snapshot}
+        return None
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Cliente lento: descartar progresso é seguro, o próximo estado o substitui
+            if event['event'] != 'progress':
+                self.queue.get_nowait()
+                self.queue.put_nowait(event)
+
+
+class ExtractionHttpServer:
+    """Servidor HTTP assíncrono sobre um ExtractionDaemon local."""
+
+    def __init__(self, host='127.0.0.1', port=8765, max_concurrent=2, output_directory=None,
+                 scratch_directory=None, token=None, adaptive_max=None):
+        """
+        Args:
+            host (str): Endereço de escuta (padrão: apenas a máquina local)
+            port (int): Porta TCP
+            max_concurrent (int): Número máximo de extrações simultâneas
+            output_directory (str): Diretório base das extrações. Se None, usa ~/Audios
+            scratch_directory (str): Diretório de rascunho para os arquivos temporários
+            token (str): Se informado, exigido em "Authorization: Bearer <token>"
+            adaptive_max (int): Se informado, ajusta as extrações simultâneas sozinho até esse limite
+        """
+        self.host = host
+        self.port = port
+        self.output_directory = output_directory
+        self.scratch_directory = scratch_directory
+        self.token = token
+        self.daemon = ExtractionDaemon(max_concurrent=max_concurrent, adaptive_max=adaptive_max)
+        self._subscribers = set()
+        self._loop = None
+        self._server = None
+
+    # --- Eventos do daemon (chegam nas threads dos workers) ---
+
+    def _on_daemon_event(self, event):
+        self._loop.call_soon_threadsafe(self._dispatch_event, event)
+
+    def _dispatch_event(self, event):
+        for subscriber in list(self._subscribers):
+            filtered = subscriber.accepts(event)
+            if filtered is not None:
+                subscriber.put(filtered)
+
+    # --- Rotas ---
+
+    def _find_job(self, job_id):
+        job = self.daemon.get_job(job_id)
+        if job is not None:
+            return job
+        raise HttpError(404, f"Tarefa {job_id} não encontrada")
+
+    def _submit(self, body):
+        urls = body.get('urls') or ([body['url']] if body.get('url') else [])
+        if not urls or not all(isinstance(url, str) for url in urls):
+            raise HttpError(400, "Informe 'url' ou 'urls'")
+        priority = body.get('priority', 0)
+        if not isinstance(priority, int):
+            raise HttpError(400, "'priority' deve ser um inteiro")
+
+        job_ids = []
+        for url in urls:
+            spec = {key: body[key] for key in CLIENT_SPEC_FIELDS if body.get(key) is not None}
+            spec.update(url=url, output_directory=self.output_directory,
+                        scratch_directory=self.scratch_directory)
+            job_ids.append(self.daemon.submit(spec, priority).job_id)
+        self.daemon.clear_finished(keep=MAX_FINISHED_JOBS)
+        return {'job_ids': job_ids} if 'urls' in body else {'job_id': job_ids[0]}
+
+    def route(self, method, path, body, query=None):
+        """Executa uma requisição comum e retorna (status, objeto JSON)."""
+        query = query or {}
+        parts = [part for part in path.split('/') if part]
+        if parts == ['health']:
+            jobs = self.daemon.ordered_jobs()
+            controller = self.daemon.controller
+            return 200, {'ok': True, 'max_concurrent': self.daemon.max_concurrent,
+                         'jobs': len(jobs), 'active': sum(1 for j in jobs if j.state not in DONE_STATES),
+                         'controller': controller.snapshot() if controller else None,
+                         'circuit': self.daemon.circuit_breaker.snapshot()}
+        if parts == ['jobs']:
+            if method == 'GET':
+                return 200, {'jobs': [job.snapshot() for job in self.daemon.ordered_jobs()]}
+            if method == 'POST':
+                return 201, self._submit(body)
+            if method == 'DELETE':
+                if query.get('state') != ['done']:
+                    raise HttpError(400, "Só as tarefas encerradas podem ser removidas (?state=done)")
+                return 200, {'removed': self.daemon.clear_finished()}
+            raise HttpError(405, "Método não permitido")
+        if len(parts) in (2, 3) and parts[0] == 'jobs':
+            try:
+                job_id = int(parts[1])
+            except ValueError:
+                raise HttpError(404, "Tarefa não encontrada")
+            job = self._find_job(job_id)
+            if len(parts) == 2 and method == 'GET':
+                return 200, job.snapshot()
+            action = parts[2] if len(parts) == 3 else ('cancel' if method == 'DELETE' else None)
+            if action in ('pause', 'resume', 'cancel') and method in ('POST', 'DELETE'):
+                getattr(self.daemon, action)(job_id)
+                return 200, job.snapshot()
+            raise HttpError(405 if action is None else 404, "Rota não encontrada")
+        raise HttpError(404, "Rota não encontrada")
+
+    # --- Protocolo ---
+
+    async def handle_connection(self, reader, writer):
+        try:
+            method, path, query, headers, body = await self._read_request(reader)
+            if self.token and not hmac.compare_digest(headers.get('authorization', ''), f"Bearer {self.token}"):
+                raise HttpError(401, "Token inválido")
+
+            parts = [part for part in path.split('/') if part]
+            if method == 'GET' and parts and parts[-1] == 'events' and len(parts) in (1, 3):
+                job_id = None
+                if len(parts) == 3:
+                    try:
+                        job_id = self._find_job(int(parts[1])).job_id
+                    except ValueError:
+                        raise HttpError(404, "Tarefa não encontrada")
+                await self._stream_events(writer, job_id)
+                return
+
+            status, payload = self.route(method, path, body, query)
+            await self._send_json(writer, status, payload)
+        except HttpError as e:
+            await self._send_json(writer, e.status, {'error': str(e)})
+        except DaemonError as e:
+            await self._send_json(writer, 400, {'error': str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            print(f"Erro ao atender requisição: {e}")
+            await self._send_json(writer, 500, {'error': "Erro interno"})
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        try:
+            method, target, _version = request_line.split(' ', 2)
+        except ValueError:
+            raise HttpError(400, "Requisição inválida")
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise HttpError(400, "Content-Length inválido")
+        if length < 0:
+            raise HttpError(400, "Content-Length inválido")
+        if length > MAX_BODY_SIZE:
+            raise HttpError(413, "Corpo muito grande")
+        body = {}
+        if length:
+            try:
+                body = json.loads(await reader.readexactly(length))
+            except ValueError:
+                raise HttpError(400, "JSON inválido")
+            if not isinstance(body, dict):
+                raise HttpError(400, "O corpo deve ser um objeto JSON")
+        target = urlsplit(target)
+        return method.upper(), target.path, parse_qs(target.query), headers, body
+
+    async def _send_json(self, writer, status, payload):
+        data = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                "Connection: close\r\n\r\n")
+        try:
+            writer.write(head.encode('latin-1') + data)
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _stream_events(self, writer, job_id):
+        """Transmite os eventos (SSE) até o cliente desconectar ou a tarefa terminar."""
+        subscriber = _Subscriber(job_id)
+        self._subscribers.add(subscriber)
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+            # Estado atual primeiro, para o cliente não depender do próximo evento
+            if job_id is None:
+                initial = {'event': 'queue', 'jobs': [j.snapshot() for j in self.daemon.ordered_jobs()]}
+            else:
+                initial = {'event': 'job', 'job': self._find_job(job_id).snapshot()}
+                subscriber.last_state = initial['job']['state']
+            writer.write(_sse(initial))
+            await writer.drain()
+            if job_id is not None and initial['job']['state'] in DONE_STATES:
+                return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                    await writer.drain()
+                    continue
+                writer.write(_sse(event))
+                await writer.drain()
+                if job_id is not None and event['event'] == 'job' and event['job']['state'] in DONE_STATES:
+                    return
+        finally:
+            self._subscribers.discard(subscriber)
+
+    # --- Ciclo de vida ---
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self.daemon.add_listener(self._on_daemon_event)
+        self.daemon.start()
+        self._server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        print(f"API HTTP ouvindo em http://{self.host}:{self.port}")
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        except asyncio.CancelledError:
+            # close() encerra o serve_forever cancelando-o
+            pass
+        finally:
+            self.daemon.remove_listener(self._on_daemon_event)
+            self.daemon.stop()
+
+    def close(self):
+        if self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+
+
+def _sse(event):
+    data = json.dumps(event, ensure_ascii=False, default=str)
+    return f"event: {event['event']}\ndata: {data}\n\n".encode('utf-8')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP de extração do YouTube Audio Extractor.")
+    parser.add_argument('--host', default='127.0.0.1', help="Endereço de escuta (padrão: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-concurrent', type=int, default=2, help="Extrações simultâneas")
+    parser.add_argument('--output-directory', default=None, help="Diretório base (padrão: ~/Audios)")
+    parser.add_argument('--scratch-directory', default=None,
+                        help="Diretório de rascunho para os arquivos temporários")
+    parser.add_argument('--token', default=None, help="Token exigido no cabeçalho Authorization")
+    parser.add_argument('--adaptive-max', type=int, default=None,
+                        help="Ajusta as extrações simultâneas sozinho (AIMD), até este limite")
+    args = parser.parse_args(argv)
+
+    if args.host not in ('127.0.0.1', 'localhost', '::1') and not args.token:
+        print("Aviso: servidor exposto na rede sem --token")
+
+    server = ExtractionHttpServer(args.host, args.port, max_concurrent=args.max_concurrent,
+                                  output_directory=args.output_directory,
+                                  scratch_directory=args.scratch_directory, token=args.token,
+                                  adaptive_max=args.adaptive_max)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        print("Servidor encerrado.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,11 @@
 import yt_dlp
 import os
+from contextlib import ExitStack
 from file_manager import FileManager
+from staging import StagingArea, atomic_move, active_job
 
-def extract_audio_with_file_management(video_url, output_directory=None, format='mp3', quality='128'):
+def extract_audio_with_file_management(video_url, output_directory=None, format='mp3', quality='128', layout=None,
+                                       scratch_directory=None):
     """
     Extrai o áudio de um vídeo do YouTube com gerenciamento automático de arquivos e nomenclatura.
 
@@ -11,14 +14,23 @@ def extract_audio_with_file_management(video_url, output_directory=None, format=
         output_directory (str): O diretório para salvar o arquivo de áudio. Se None, usa ~/Audios.
         format (str): O formato de áudio desejado (ex: 'mp3', 'aac', 'wav', 'flac', 'm4a').
         quality (str): A qualidade do áudio (ex: '64', '128', '192', '320').
+        layout (str): Layout de subdiretórios da biblioteca (ex: 'artist', 'hash'). Se None, salva direto no diretório.
+        scratch_directory (str): Diretório de rascunho (ex: SSD local ou tmpfs) para arquivos temporários.
+                                 Se informado, só o arquivo final é movido para a biblioteca.
     
     Returns:
         dict: Informações sobre o arquivo extraído
     """
     # Inicializar o gerenciador de arquivos
-    file_manager = FileManager(output_directory)
+    file_manager = FileManager(output_directory, layout=layout)
     
+    stack = ExitStack()
     try:
+        # Com staging, os arquivos temporários ficam no diretório de rascunho e são
+        # removidos ao final, mesmo em caso de erro
+        staging = stack.enter_context(StagingArea(scratch_directory)) if scratch_directory else None
+        download_directory = staging.path if staging else file_manager.base_directory
+        
         # Primeiro, obter informações do vídeo sem baixar
         ydl_opts_info = {'quiet': True}
         with yt_dlp.YoutubeDL(ydl_opts_info) as ydl:
@@ -31,7 +43,7 @@ def extract_audio_with_file_management(video_url, output_directory=None, format=
         
         # Gerar nome do arquivo usando o gerenciador
         final_filename = file_manager.generate_filename(video_title, format)
-        final_path = os.path.join(file_manager.base_directory, final_filename)
+        final_path = file_manager.get_full_path(video_title, format)
         
         print(f"Nome do arquivo final: {final_filename}")
 
@@ -54,18 +66,18 @@ def extract_audio_with_file_management(video_url, output_directory=None, format=
                 'preferredcodec': format,
                 'preferredquality': quality,
             }],
-            'outtmpl': os.path.join(file_manager.base_directory, temp_filename),
+            'outtmpl': os.path.join(download_directory, temp_filename),
             'noplaylist': True,
             'progress_hooks': [progress_hook],
         }
 
         # Baixar o áudio
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with active_job(download_directory), yt_dlp.YoutubeDL(ydl_opts) as ydl:
             ydl.download([video_url])
         
         # Encontrar o arquivo baixado (yt-dlp pode ter modificado o nome)
         downloaded_files = []
-        for file in os.listdir(file_manager.base_directory):
+        for file in os.listdir(download_directory):
             if file.startswith("temp_") and file.endswith(f".{format}"):
                 downloaded_files.append(file)
         
@@ -73,7 +85,7 @@ def extract_audio_with_file_management(video_url, output_directory=None, format=
             raise Exception("Arquivo baixado não encontrado")
         
         # Assumir que o arquivo mais recente é o que acabamos de baixar
-        temp_file_path = os.path.join(file_manager.base_directory, downloaded_files[-1])
+        temp_file_path = os.path.join(download_directory, downloaded_files[-1])
         
         # Renomear para o nome final
         if os.path.exists(temp_file_path):
@@ -86,7 +98,7 @@ def extract_audio_with_file_management(video_url, output_directory=None, format=
                 final_filename = os.path.basename(final_path)
                 counter += 1
             
-            os.rename(temp_file_path, final_path)
+            atomic_move(temp_file_path, final_path)
             print(f"Arquivo renomeado para: {final_filename}")
         
         # Extrair informações de artista e música para retorno
@@ -110,6 +122,8 @@ def extract_audio_with_file_management(video_url, output_directory=None, format=
             'success': False,
             'error': str(e)
         }
+    finally:
+        stack.close()
 
 if __name__ == '__main__':
     # Exemplo de uso
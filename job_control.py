@@ -0,0 +1,250 @@
+import os
+import threading
+from contextlib import contextmanager, ExitStack
+
+from staging import StagingArea, register_active_path, release_active_path
+from artifact_cleaner import shared_ledger
+
+# JobControl da extração em andamento em cada thread (ver JobControl.subprocesses)
+_current = threading.local()
+_popen_lock = threading.Lock()
+_popen_installed = False
+
+
+def _install_popen_tracking():
+    """
+    Troca o Popen usado pelos pós-processadores FFmpeg do yt-dlp por um que
+    registra cada processo no JobControl da thread, para que um
+    cancelamento encerre o FFmpeg na hora. Os pós-processadores rodam na
+    mesma thread do download, então a associação por thread basta.
+    """
+    global _popen_installed
+    with _popen_lock:
+        if _popen_installed:
+            return
+        from yt_dlp.postprocessor import ffmpeg
+
+        class TrackedPopen(ffmpeg.Popen):
+            def __init__(self, args, *popen_args, **kwargs):
+                self._control = getattr(_current, 'control', None)
+                super().__init__(args, *popen_args, **kwargs)
+                if self._control is None:
+                    return
+                executable = os.path.basename(str(args[0])).lower()
+                if executable.startswith(('ffmpeg', 'avconv')):
+                    # A saída é o último argumento ('file:caminho'); pela metade num cancelamento
+                    output = str(args[-1])
+                    self._control.track_file(output[len('file:'):] if output.startswith('file:') else output)
+                self._control.track_process(self)
+
+            def __exit__(self, *exc_info):
+                try:
+                    return super().__exit__(*exc_info)
+                finally:
+                    if self._control is not None:
+                        self._control.untrack_process(self)
+
+        ffmpeg.Popen = TrackedPopen
+        _popen_installed = True
+
+
+class JobInterrupted(BaseException):
+    """
+    Interrompe um download a partir de dentro dos hooks do yt-dlp.
+
+    Deriva de BaseException (como KeyboardInterrupt) para atravessar os
+    `except Exception` do yt-dlp e das funções de extração, que de outro
+    modo transformariam a interrupção num erro comum.
+    """
+
+
+class JobPaused(JobInterrupted):
+    """O download foi pausado; os arquivos .part ficam no disco."""
+
+
+class JobCancelled(JobInterrupted):
+    """O download foi cancelado; os arquivos temporários devem ser removidos."""
+
+
+class JobControl:
+    """
+    Controle cooperativo de pausa e cancelamento de um download.
+
+    O yt-dlp não oferece uma forma de interromper um download por fora, então
+    a interrupção acontece no próximo callback: progress_hook e
+    postprocessor_hook chamam checkpoint(), que lança JobPaused ou
+    JobCancelled. Os arquivos temporários vistos pelos hooks são registrados
+    para que um cancelamento possa apagá-los e uma pausa possa protegê-los
+    do coletor de artefatos até a retomada.
+    """
+
+    def __init__(self):
+        self._paused = threading.Event()
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._temp_files = set()
+        self._held_directories = set()
+        self._processes = set()
+        self._staging = None  # StagingArea mantida por uma pausa, reaproveitada na retomada
+        # Faixas já concluídas (download_archive do yt-dlp em memória); sobrevive à pausa
+        self.completed = set()
+
+    # --- Comandos (chamados pela interface) ---
+
+    def pause(self):
+        self._paused.set()
+
+    def resume(self):
+        """Limpa o pedido de pausa (a tarefa precisa ser executada de novo)."""
+        self._paused.clear()
+
+    def cancel(self):
+        """Pede o cancelamento e encerra imediatamente processos externos (ffmpeg)."""
+        self._cancelled.set()
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            try:
+                process.terminate()
+            except OSError:
+                pass
+
+    def is_paused(self):
+        return self._paused.is_set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def checkpoint(self):
+        """Lança JobCancelled ou JobPaused se houver um pedido pendente."""
+        if self._cancelled.is_set():
+            raise JobCancelled()
+        if self._paused.is_set():
+            raise JobPaused()
+
+    # --- Hooks do yt-dlp ---
+
+    def progress_hook(self, d):
+        """Deve vir antes dos demais progress_hooks do yt-dlp."""
+        for key in ('tmpfilename', 'filename'):
+            if d.get(key):
+                self.track_file(d[key])
+        self.checkpoint()
+
+    def postprocessor_hook(self, d):
+        # Chamado antes e depois de cada pós-processamento (ex: FFmpegExtractAudio)
+        if d.get('status') == 'finished':
+            # O arquivo resultante já é definitivo e não deve ser apagado num cancelamento
+            filepath = (d.get('info_dict') or {}).get('filepath')
+            if filepath:
+                with self._lock:
+                    self._temp_files.discard(os.path.abspath(filepath))
+                shared_ledger().forget(filepath)
+        self.checkpoint()
+
+    # --- Arquivos e processos ---
+
+    def track_file(self, path):
+        """
+        Registra um arquivo temporário a remover se o download for cancelado.
+
+        O arquivo também vai para o ArtifactLedger, para o coletor de
+        artefatos removê-lo se o processo terminar antes de limpá-lo.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            if path in self._temp_files:
+                return
+            self._temp_files.add(path)
+        shared_ledger().record(path)
+
+    def track_process(self, process):
+        """Registra um subprocesso a ser terminado se o download for cancelado."""
+        with self._lock:
+            self._processes.add(process)
+        if self._cancelled.is_set():
+            process.terminate()
+
+    def untrack_process(self, process):
+        with self._lock:
+            self._processes.discard(process)
+
+    @contextmanager
+    def subprocesses(self):
+        """
+        Registra neste controle os processos do FFmpeg abertos pelo yt-dlp
+        (FFmpegExtractAudio) na thread atual durante o bloco `with`.
+        """
+        _install_popen_tracking()
+        previous = getattr(_current, 'control', None)
+        _current.control = self
+        try:
+            yield self
+        finally:
+            _current.control = previous
+
+    @contextmanager
+    def staging_area(self, scratch_directory):
+        """
+        StagingArea do download no diretório de rascunho.
+
+        Uma pausa mantém o diretório (com os .part) e a retomada o
+        reaproveita; conclusão, erro e cancelamento o removem.
+        """
+        with self._lock:
+            staging, self._staging = self._staging, None
+        with ExitStack() as stack:
+            if staging is not None and staging.scratch_directory == scratch_directory and \
+                    staging.path and os.path.isdir(staging.path):
+                stack.callback(staging.cleanup)
+            else:
+                if staging is not None:
+                    staging.cleanup()
+                staging = stack.enter_context(StagingArea(scratch_directory))
+            try:
+                yield staging
+            except JobPaused:
+                stack.pop_all()
+                with self._lock:
+                    self._staging = staging
+                raise
+
+    def hold_partial_files(self):
+        """Protege do coletor de artefatos os diretórios com .part de um download pausado."""
+        with self._lock:
+            directories = {os.path.dirname(path) for path in self._temp_files} - self._held_directories
+            self._held_directories |= directories
+        for directory in directories:
+            register_active_path(directory)
+
+    def release_partial_files(self):
+        with self._lock:
+            directories, self._held_directories = self._held_directories, set()
+        for directory in directories:
+            release_active_path(directory)
+
+    def cleanup(self):
+        """
+        Remove os arquivos temporários registrados (.part, .ytdl e arquivos
+        baixados ainda não convertidos).
+
+        Returns:
+            int: Quantidade de arquivos removidos
+        """
+        self.release_partial_files()
+        with self._lock:
+            files, self._temp_files = self._temp_files, set()
+            staging, self._staging = self._staging, None
+        if staging is not None:
+            staging.cleanup()
+
+        removed = 0
+        for path in files:
+            for candidate in (path, path + '.part', path + '.ytdl'):
+                if os.path.exists(candidate):
+                    try:
+                        os.remove(candidate)
+                        removed += 1
+                    except OSError as e:
+                        print(f"Erro ao remover arquivo temporário {candidate}: {e}")
+        return removed
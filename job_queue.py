@@ -0,0 +1,349 @@
+import itertools
+from abc import ABCMeta, abstractmethod
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from job_control import JobControl, JobPaused, JobCancelled
+from bandwidth_limiter import BandwidthLimiter
+from circuit_breaker import CircuitBreaker
+
+
+class _DownloadJobMeta(type(QObject), ABCMeta):
+    """Metaclasse do QObject combinada com ABCMeta, para DownloadJob ter métodos abstratos."""
+
+
+class DownloadJob(QObject, metaclass=_DownloadJobMeta):
+    """
+    Tarefa de download executada pela JobQueue.
+
+    Substitui o QThread por janela: a subclasse implementa run(), que é
+    executado numa thread do pool, e comunica o andamento pelos mesmos
+    sinais que as threads de extração usavam. Pausa e cancelamento passam
+    por `self.control`, cujos hooks devem ser incluídos nas opções do yt-dlp,
+    assim como `self.bandwidth_hook` (limite de banda da fila) nos progress_hooks
+    e `self.circuit_breaker` (disjuntor da fila) em extract_audio.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    PAUSED = 'paused'
+    FINISHED = 'finished'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    STATE_LABELS = {
+        PENDING: "Na fila",
+        RUNNING: "Em andamento",
+        PAUSED: "Pausado",
+        FINISHED: "Concluído",
+        FAILED: "Erro",
+        CANCELLED: "Cancelado",
+    }
+
+    progress_signal = pyqtSignal(str)
+    progress_state_signal = pyqtSignal(dict)  # Estado numérico agregado (bytes, velocidade, ETA)
+    finished_signal = pyqtSignal(str, str)
+    error_signal = pyqtSignal(str)
+    state_changed = pyqtSignal(object)
+
+    _ids = itertools.count(1)
+
+    def __init__(self, title, kind='video', priority=0):
+        """
+        Args:
+            title (str): Texto exibido no painel da fila
+            kind (str): Tipo da tarefa ('video' ou 'playlist')
+            priority (int): Prioridade; valores maiores saem da fila primeiro
+        """
+        super().__init__()
+        self.job_id = next(self._ids)
+        self.title = title
+        self.kind = kind
+        self.priority = priority
+        self.state = self.PENDING
+        self.error_message = None
+        self.last_progress = None
+        self.control = JobControl()
+        self.bandwidth = None       # BandwidthLimiter da fila, definido em JobQueue.submit
+        self.bandwidth_hook = None  # progress_hook do limite de banda, válido durante run()
+        self.circuit_breaker = None  # CircuitBreaker da fila, definido em JobQueue.submit
+
+        # Conexões diretas: executam na thread do pool, no momento da emissão
+        self.error_signal.connect(self._remember_error, Qt.DirectConnection)
+        self.progress_state_signal.connect(self._remember_progress, Qt.DirectConnection)
+
+    def _remember_error(self, message):
+        self.error_message = message
+
+    def _remember_progress(self, state):
+        self.last_progress = state
+
+    def set_state(self, state):
+        self.state = state
+        self.state_changed.emit(self)
+
+    def is_done(self):
+        return self.state in (self.FINISHED, self.FAILED, self.CANCELLED)
+
+    @abstractmethod
+    def run(self):
+        """Executa o download (na thread do pool); implementado pelas subclasses."""
+
+    def execute(self):
+        """Executa a tarefa (na thread do pool) e registra o estado final."""
+        self.error_message = None
+        # Numa retomada, os .part voltam a ser usados pelo próprio download
+        self.control.release_partial_files()
+        limiter = self.bandwidth or BandwidthLimiter()
+        try:
+            with limiter.job(self.job_id, control=self.control) as self.bandwidth_hook:
+                self.control.checkpoint()
+                self.run()
+        except JobPaused:
+            self.control.hold_partial_files()
+            self.progress_signal.emit("Download pausado.")
+            self.set_state(self.PAUSED)
+            return
+        except JobCancelled:
+            removed = self.control.cleanup()
+            self.progress_signal.emit(f"Download cancelado ({removed} arquivo(s) temporário(s) removido(s)).")
+            self.set_state(self.CANCELLED)
+            return
+        except Exception as e:
+            self.error_signal.emit(f"Erro na extração: {str(e)}")
+        self.set_state(self.FAILED if self.error_message else self.FINISHED)
+
+
+class _JobRunnable(QRunnable):
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+
+    def run(self):
+        self.job.execute()
+
+
+class JobQueue(QObject):
+    """
+    Fila global de downloads, compartilhada por todas as janelas.
+
+    As tarefas ficam numa lista de pendentes ordenada por prioridade e só
+    são entregues ao QThreadPool quando há vaga, o que permite reordenar a
+    fila e mudar o limite de downloads simultâneos a qualquer momento.
+    """
+
+    job_added = pyqtSignal(object)
+    job_updated = pyqtSignal(object)
+    job_removed = pyqtSignal(object)
+    queue_changed = pyqtSignal()
+
+    def __init__(self, max_concurrent=2, parent=None):
+        """
+        Args:
+            max_concurrent (int): Número máximo de downloads simultâneos
+            parent (QObject): Objeto pai
+        """
+        super().__init__(parent)
+        self.max_concurrent = max(1, max_concurrent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(self.max_concurrent)
+        self.bandwidth = BandwidthLimiter()
+        self.circuit_breaker = CircuitBreaker()
+
+        self._pending = []
+        self._running = []
+        self._paused = []
+        self._done = []
+
+    def submit(self, job, priority=None):
+        """
+        Coloca uma tarefa na fila.
+
+        A tarefa entra depois das pendentes com prioridade maior ou igual à
+        sua, ou seja, tarefas de mesma prioridade saem na ordem de chegada.
+
+        Returns:
+            DownloadJob: A própria tarefa
+        """
+        if priority is not None:
+            job.priority = priority
+        job.bandwidth = self.bandwidth
+        job.circuit_breaker = self.circuit_breaker
+        job.state_changed.connect(self._on_job_state_changed)
+        self._insert_pending(job)
+
+        self.job_added.emit(job)
+        self.queue_changed.emit()
+        self._dispatch()
+        return job
+
+    def jobs(self):
+        """Retorna todas as tarefas: em andamento, pendentes (na ordem da fila), pausadas e encerradas."""
+        return self._running + self._pending + self._paused + self._done
+
+    def pending_jobs(self):
+        return list(self._pending)
+
+    def running_jobs(self):
+        return list(self._running)
+
+    def set_max_concurrent(self, max_concurrent):
+        """Altera o limite de downloads simultâneos; vagas novas são ocupadas na hora."""
+        self.max_concurrent = max(1, max_concurrent)
+        # Tarefas já em andamento não são interrompidas se o limite diminuir
+        self.pool.setMaxThreadCount(self.max_concurrent)
+        self._dispatch()
+
+    @property
+    def bandwidth_rate(self):
+        """Banda total em bytes/s (None = ilimitado)."""
+        return self.bandwidth.global_rate
+
+    def set_bandwidth_limit(self, rate):
+        """Altera a banda total, dividida entre os downloads em andamento; vale na hora."""
+        self.bandwidth.set_global_rate(rate)
+        self.queue_changed.emit()
+
+    def set_job_bandwidth_limit(self, job, rate):
+        """Limita a banda de uma tarefa (None remove o limite próprio)."""
+        self.bandwidth.set_job_rate(job.job_id, rate)
+
+    def set_priority(self, job, priority):
+        """Muda a prioridade de uma tarefa pendente e a reposiciona na fila."""
+        if job not in self._pending:
+            return
+        self._pending.remove(job)
+        job.priority = priority
+        self._insert_pending(job)
+        self.queue_changed.emit()
+
+    def move(self, job, offset):
+        """
+        Move uma tarefa pendente `offset` posições na fila (negativo = para frente).
+
+        A tarefa assume a prioridade da vizinha que ultrapassou, para que a
+        ordem escolhida continue consistente com as próximas inserções.
+        """
+        if job not in self._pending:
+            return
+        index = self._pending.index(job)
+        target = max(0, min(len(self._pending) - 1, index + offset))
+        if target == index:
+            return
+        self._pending.pop(index)
+        self._pending.insert(target, job)
+        neighbour = self._pending[target + 1] if offset < 0 else self._pending[target - 1]
+        if offset < 0:
+            job.priority = max(job.priority, neighbour.priority)
+        else:
+            job.priority = min(job.priority, neighbour.priority)
+        self.queue_changed.emit()
+
+    def remove(self, job):
+        """Retira da fila uma tarefa pendente, marcando-a como cancelada."""
+        if job not in self._pending:
+            return False
+        self._pending.remove(job)
+        self._done.append(job)
+        job.set_state(DownloadJob.CANCELLED)
+        return True
+
+    def pause(self, job):
+        """
+        Pausa uma tarefa.
+
+        Uma tarefa em andamento para no próximo callback do yt-dlp e libera
+        sua vaga; o arquivo .part fica no disco para a retomada continuar do
+        mesmo ponto. Uma tarefa pendente apenas sai da fila.
+        """
+        if job in self._running:
+            job.control.pause()
+        elif job in self._pending:
+            self._pending.remove(job)
+            self._paused.append(job)
+            job.set_state(DownloadJob.PAUSED)
+
+    def resume(self, job):
+        """Devolve uma tarefa pausada à fila, respeitando sua prioridade."""
+        job.control.resume()
+        if job not in self._paused:
+            return
+        self._paused.remove(job)
+        self._insert_pending(job)
+        job.set_state(DownloadJob.PENDING)
+        self._dispatch()
+
+    def cancel(self, job):
+        """
+        Cancela uma tarefa em qualquer estado não encerrado.
+
+        Tarefas em andamento param no próximo callback (ou na hora, se
+        estiverem num subprocesso do FFmpeg) e removem seus temporários.
+        """
+        if job in self._running:
+            job.control.cancel()
+        elif job in self._paused:
+            job.control.cancel()
+            job.control.cleanup()
+            self._paused.remove(job)
+            self._done.append(job)
+            job.set_state(DownloadJob.CANCELLED)
+        else:
+            self.remove(job)
+
+    def clear_finished(self):
+        """Esquece as tarefas já encerradas."""
+        finished, self._done = self._done, []
+        for job in finished:
+            self.bandwidth.set_job_rate(job.job_id, None)
+            self.job_removed.emit(job)
+        self.queue_changed.emit()
+
+    def shutdown(self):
+        """
+        Cancela as tarefas pendentes e em andamento (usado ao fechar a aplicação).
+
+        Tarefas pausadas são mantidas com seus .part, como estão.
+        """
+        for job in list(self._pending):
+            self.remove(job)
+        for job in list(self._running):
+            job.control.cancel()
+
+    def _insert_pending(self, job):
+        # Depois de todas as pendentes com prioridade maior ou igual
+        position = len(self._pending)
+        for i, pending in enumerate(self._pending):
+            if pending.priority < job.priority:
+                position = i
+                break
+        self._pending.insert(position, job)
+
+    def _dispatch(self):
+        while self._pending and len(self._running) < self.max_concurrent:
+            job = self._pending.pop(0)
+            self._running.append(job)
+            job.set_state(DownloadJob.RUNNING)
+            self.pool.start(_JobRunnable(job))
+
+    def _on_job_state_changed(self, job):
+        # Executa na thread da interface (conexão enfileirada)
+        if job in self._running and (job.is_done() or job.state == DownloadJob.PAUSED):
+            self._running.remove(job)
+            if job.state == DownloadJob.PAUSED and job.control.is_cancelled():
+                # Cancelada enquanto a pausa era processada
+                job.control.cleanup()
+                self._done.append(job)
+                job.set_state(DownloadJob.CANCELLED)
+            elif job.state == DownloadJob.PAUSED and not job.control.is_paused():
+                # Retomada enquanto a pausa era processada: resume() não a encontrou em _paused
+                self._insert_pending(job)
+                job.set_state(DownloadJob.PENDING)
+            elif job.state == DownloadJob.PAUSED:
+                self._paused.append(job)
+            else:
+                self._done.append(job)
+            self.job_updated.emit(job)
+            self.queue_changed.emit()
+            self._dispatch()
+            return
+        self.job_updated.emit(job)
+        self.queue_changed.emit()
@@ -0,0 +1,249 @@
+import os
+import re
+import sys
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Layouts pré-definidos. Os campos disponíveis são:
+#   {artist}, {artist_initial}, {song}, {ext}, {filename},
+#   {hash2} e {hash4} (prefixos do hash do nome do arquivo)
+LAYOUT_PRESETS = {
+    'flat': '{filename}',
+    'artist': '{artist_initial}/{artist}/{filename}',
+    'hash': '{hash2}/{hash4}/{filename}',
+}
+
+UNKNOWN_ARTIST = "Desconhecido"
+
+_FIELD_PATTERN = re.compile(r'\{(\w+)\}')
+_KNOWN_FIELDS = {'artist', 'artist_initial', 'song', 'ext', 'filename', 'hash2', 'hash4'}
+
+
+class LibraryLayout:
+    """
+    Motor de layout que decide em qual subdiretório cada arquivo é salvo.
+
+    Bibliotecas muito grandes ficam lentas quando tudo está num único
+    diretório; o layout distribui os arquivos em subpastas (por artista
+    ou por prefixo de hash) mantendo cada diretório pequeno.
+    """
+
+    def __init__(self, pattern='flat'):
+        """
+        Args:
+            pattern (str): Nome de um preset de LAYOUT_PRESETS ou um padrão
+                           como '{artist_initial}/{artist}/{song}.{ext}'
+        """
+        self.pattern = LAYOUT_PRESETS.get(pattern, pattern)
+
+        unknown = set(_FIELD_PATTERN.findall(self.pattern)) - _KNOWN_FIELDS
+        if unknown:
+            raise ValueError(f"Campos de layout desconhecidos: {', '.join(sorted(unknown))}")
+
+    def relative_path(self, filename, artist, song, sanitize):
+        """
+        Calcula o caminho relativo (ao diretório base) de um arquivo.
+
+        Args:
+            filename (str): Nome final do arquivo, já com extensão
+            artist (str): Artista extraído do título (pode ser None)
+            song (str): Música extraída do título
+            sanitize (callable): Função usada para sanitizar cada componente
+
+        Returns:
+            str: Caminho relativo usando o separador do sistema
+        """
+        stem, ext = os.path.splitext(filename)
+        artist_name = sanitize(artist) if artist else UNKNOWN_ARTIST
+        digest = hashlib.md5(stem.lower().encode('utf-8')).hexdigest()
+
+        initial = artist_name[:1].upper()
+        if not initial.isalnum():
+            initial = '#'
+
+        fields = {
+            'artist': artist_name,
+            'artist_initial': initial,
+            'song': sanitize(song) if song else stem,
+            'ext': ext.lstrip('.'),
+            'filename': filename,
+            'hash2': digest[:2],
+            'hash4': digest[2:4],
+        }
+
+        parts = self.pattern.format(**fields).split('/')
+        # Sanitizar apenas os diretórios; o nome do arquivo já vem sanitizado
+        parts = [sanitize(part) or UNKNOWN_ARTIST for part in parts[:-1]] + [parts[-1]]
+        return os.path.join(*parts)
+
+
+def _parse_library_filename(file_manager, filename):
+    """Recupera artista e música de um arquivo no padrão 'Artista - Música.ext'."""
+    stem, ext = os.path.splitext(filename)
+    artist, song = file_manager.extract_artist_and_song(stem)
+    return artist, song, ext.lstrip('.')
+
+
+def _library_root(file_manager, path, layouts):
+    """
+    Diretório a partir do qual o arquivo segue um layout: o diretório base
+    ou, para faixas de playlist, a pasta da playlist (download_playlist
+    salva em base/<playlist>/<layout>).
+
+    Um arquivo está na raiz da biblioteca se está direto no diretório base
+    ou na posição que um dos `layouts` daria a ele; senão, pertence à pasta
+    de primeiro nível em que está.
+    """
+    base = file_manager.base_directory
+    relative = os.path.normpath(os.path.relpath(path, base))
+    parts = relative.split(os.sep)
+    if len(parts) == 1:
+        return base
+    name = parts[-1]
+    artist, song, _ext = _parse_library_filename(file_manager, name)
+    for layout in layouts:
+        placed = layout.relative_path(name, artist, song, file_manager.sanitize_filename)
+        if os.path.normpath(placed) == relative:
+            return base
+    return os.path.join(base, parts[0])
+
+
+def plan_migration(file_manager, layout, source_layouts=None):
+    """
+    Calcula os movimentos necessários para reorganizar a biblioteca.
+
+    Cada pasta de playlist é reorganizada em relação a si mesma, como os
+    downloads novos de playlists; os arquivos não saem dela.
+
+    Args:
+        file_manager (FileManager): Gerenciador com o diretório base atual
+        layout (LibraryLayout): Layout de destino
+        source_layouts (list): Layouts em que a biblioteca pode estar, para
+                               distinguir as pastas do layout das pastas de
+                               playlist. Se None, os presets e o de destino
+
+    Returns:
+        list: Lista de tuplas (origem, destino)
+    """
+    from library_watcher import AUDIO_EXTENSIONS
+
+    if source_layouts is None:
+        source_layouts = [LibraryLayout(preset) for preset in LAYOUT_PRESETS]
+    known_layouts = list(source_layouts) + [layout]
+
+    moves = []
+    for root, _dirs, files in os.walk(file_manager.base_directory):
+        for name in files:
+            if not name.lower().endswith(AUDIO_EXTENSIONS):
+                continue
+            source = os.path.join(root, name)
+            artist, song, _ext = _parse_library_filename(file_manager, name)
+            target = os.path.join(
+                _library_root(file_manager, source, known_layouts),
+                layout.relative_path(name, artist, song, file_manager.sanitize_filename)
+            )
+            if os.path.normpath(source) != os.path.normpath(target):
+                moves.append((source, target))
+    return moves
+
+
+def migrate_library(file_manager, layout, workers=8, dry_run=False, source_layouts=None):
+    """
+    Reorganiza uma biblioteca existente para um novo layout, em paralelo.
+
+    Args:
+        file_manager (FileManager): Gerenciador com o diretório base atual
+        layout (LibraryLayout): Layout de destino
+        workers (int): Número de threads usadas para mover os arquivos
+        dry_run (bool): Se True, apenas lista os movimentos sem executá-los
+        source_layouts (list): Layouts em que a biblioteca pode estar (ver plan_migration)
+
+    Returns:
+        dict: Contagem de arquivos movidos e de falhas
+    """
+    moves = plan_migration(file_manager, layout, source_layouts)
+    if dry_run:
+        for source, target in moves:
+            print(f"{source} -> {target}")
+        return {'planned': len(moves), 'moved': 0, 'failed': 0}
+
+    reserved = set()
+    reserve_lock = threading.Lock()
+    results = {'planned': len(moves), 'moved': 0, 'failed': 0}
+    results_lock = threading.Lock()
+
+    def reserve_target(target):
+        # Evita que duas threads escolham o mesmo destino
+        with reserve_lock:
+            counter = 1
+            candidate = target
+            while candidate in reserved or os.path.exists(candidate):
+                name, ext = os.path.splitext(target)
+                candidate = f"{name} ({counter}){ext}"
+                counter += 1
+            reserved.add(candidate)
+            return candidate
+
+    def move(item):
+        source, target = item
+        try:
+            file_manager.ensure_directory_exists(os.path.dirname(target))
+            os.rename(source, reserve_target(target))
+            outcome = 'moved'
+        except OSError as e:
+            print(f"Erro ao mover {source}: {e}")
+            outcome = 'failed'
+        with results_lock:
+            results[outcome] += 1
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(move, moves))
+
+    _remove_empty_directories(file_manager.base_directory)
+    return results
+
+
+def _remove_empty_directories(base_directory):
+    for root, _dirs, _files in os.walk(base_directory, topdown=False):
+        if root != base_directory:
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass  # Não está vazio
+
+
+def main(argv=None):
+    """Linha de comando para migrar uma biblioteca existente."""
+    from file_manager import FileManager
+
+    parser = argparse.ArgumentParser(description="Reorganiza a biblioteca de áudio em um novo layout.")
+    parser.add_argument('layout', help=f"Preset ({', '.join(LAYOUT_PRESETS)}) ou padrão de layout")
+    parser.add_argument('--directory', default=None, help="Diretório base da biblioteca (padrão: ~/Audios)")
+    parser.add_argument('--workers', type=int, default=8, help="Número de threads para mover arquivos")
+    parser.add_argument('--dry-run', action='store_true', help="Apenas mostra o que seria movido")
+    parser.add_argument('--from', dest='source_layout', default=None,
+                        help="Layout atual, se não for um preset (separa as pastas do layout das de playlist)")
+    args = parser.parse_args(argv)
+
+    try:
+        layout = LibraryLayout(args.layout)
+        source_layouts = None
+        if args.source_layout:
+            source_layouts = [LibraryLayout(preset) for preset in LAYOUT_PRESETS] + \
+                [LibraryLayout(args.source_layout)]
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return 2
+
+    file_manager = FileManager(args.directory)
+    results = migrate_library(file_manager, layout, workers=args.workers, dry_run=args.dry_run,
+                              source_layouts=source_layouts)
+    print(f"Arquivos planejados: {results['planned']}, movidos: {results['moved']}, "
+          f"falhas: {results['failed']}")
+    return 1 if results['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
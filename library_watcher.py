@@ -0,0 +1,457 @@
+import os
+import sys
+import time
+import struct
+import select
+import threading
+
+# Extensões de áudio consideradas parte da biblioteca
+AUDIO_EXTENSIONS = ('.mp3', '.aac', '.wav', '.flac', '.m4a')
+
+
+class LibraryIndex:
+    """
+    Índice em memória dos arquivos de áudio sob o diretório base.
+
+    Cada entrada mapeia o caminho relativo do arquivo para uma tupla
+    (tamanho, mtime). O índice é atualizado de forma incremental pelo
+    LibraryWatcher, evitando varreduras completas a cada mudança.
+    """
+
+    def __init__(self, base_directory):
+        self.base_directory = os.path.abspath(base_directory)
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    def is_audio_file(self, path):
+        return path.lower().endswith(AUDIO_EXTENSIONS)
+
+    def relative_path(self, path):
+        return os.path.relpath(os.path.abspath(path), self.base_directory)
+
+    def full_scan(self):
+        """
+        Reconstrói o índice do zero percorrendo todo o diretório base.
+
+        Returns:
+            int: Número de arquivos indexados
+        """
+        entries = {}
+        for root, _dirs, files in os.walk(self.base_directory):
+            for name in files:
+                if not self.is_audio_file(name):
+                    continue
+                full_path = os.path.join(root, name)
+                try:
+                    stat = os.stat(full_path)
+                except OSError:
+                    continue
+                entries[self.relative_path(full_path)] = (stat.st_size, stat.st_mtime)
+
+        with self._lock:
+            self.entries = entries
+        return len(entries)
+
+    def add_or_update(self, path, stat=None):
+        """
+        Adiciona ou atualiza um arquivo no índice.
+
+        Args:
+            path (str): Caminho do arquivo
+            stat (os.stat_result): Resultado de stat já obtido (opcional)
+
+        Returns:
+            bool: True se o índice mudou
+        """
+        if not self.is_audio_file(path):
+            return False
+        if stat is None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return self.remove(path)
+
+        key = self.relative_path(path)
+        value = (stat.st_size, stat.st_mtime)
+        with self._lock:
+            if self.entries.get(key) == value:
+                return False
+            self.entries[key] = value
+        return True
+
+    def remove(self, path):
+        """
+        Remove um arquivo do índice.
+
+        Returns:
+            bool: True se o arquivo estava indexado
+        """
+        with self._lock:
+            return self.entries.pop(self.relative_path(path), None) is not None
+
+    def remove_tree(self, directory):
+        """
+        Remove do índice todos os arquivos sob um diretório.
+
+        Returns:
+            list: Caminhos completos das entradas removidas
+        """
+        prefix = self.relative_path(directory) + os.sep
+        with self._lock:
+            stale = [key for key in self.entries if key.startswith(prefix)]
+            for key in stale:
+                del self.entries[key]
+        return [os.path.join(self.base_directory, key) for key in stale]
+
+    def contains(self, path):
+        with self._lock:
+            return self.relative_path(path) in self.entries
+
+    def snapshot(self):
+        """Retorna uma cópia das entradas (caminho relativo -> (tamanho, mtime))."""
+        with self._lock:
+            return dict(self.entries)
+
+    def files(self):
+        """Retorna a lista de caminhos relativos indexados."""
+        with self._lock:
+            return sorted(self.entries)
+
+    def __len__(self):
+        with self._lock:
+            return len(self.entries)
+
+
+class _Inotify:
+    """Acesso mínimo à API inotify do Linux via ctypes."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+                  IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+
+    def add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            raise OSError("inotify_add_watch falhou para: " + path)
+        return wd
+
+    def rm_watch(self, wd):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout):
+        """Lê os eventos pendentes, aguardando no máximo `timeout` segundos."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, name_len = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b'\0')
+            offset += name_len
+            events.append((wd, mask, cookie, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class LibraryWatcher:
+    """
+    Acompanha mudanças no diretório base do FileManager e aplica
+    atualizações incrementais ao LibraryIndex.
+
+    Usa inotify quando disponível (Linux). Nos demais sistemas, faz uma
+    varredura periódica: cada diretório conhecido é listado com scandir e
+    comparado com a listagem anterior ({nome: (tamanho, mtime)}), o que
+    também pega arquivos regravados no lugar, que não mudam o mtime do
+    diretório. No Windows o scandir já traz o stat de cada entrada.
+    """
+
+    def __init__(self, file_manager, index=None, poll_interval=5.0, on_change=None):
+        """
+        Args:
+            file_manager (FileManager): Gerenciador cujo base_directory será observado
+            index (LibraryIndex): Índice a manter sincronizado. Se None, cria um novo
+            poll_interval (float): Intervalo entre varreduras no modo polling (segundos)
+            on_change (callable): Chamado com (evento, caminho) a cada alteração no
+                                  índice; evento é 'added', 'updated' ou 'removed'
+        """
+        self.base_directory = os.path.abspath(file_manager.base_directory)
+        self.index = index or LibraryIndex(self.base_directory)
+        self.poll_interval = poll_interval
+        self.on_change = on_change
+
+        self.backend = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        # Estado do modo inotify
+        self._inotify = None
+        self._watch_dirs = {}  # wd -> diretório
+
+        # Estado do modo polling: diretório -> {nome: (tamanho, mtime)}
+        self._dir_listings = {}
+
+    def start(self):
+        """Faz a varredura inicial e inicia o acompanhamento em segundo plano."""
+        self.index.full_scan()
+
+        try:
+            if not sys.platform.startswith('linux'):
+                raise OSError("inotify indisponível nesta plataforma")
+            self._inotify = _Inotify()
+            self._watch_tree(self.base_directory)
+            self.backend = 'inotify'
+            target = self._run_inotify
+        except (OSError, AttributeError) as e:
+            print(f"Usando varredura periódica da biblioteca: {e}")
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+            self._snapshot_directories(self.base_directory)
+            self.backend = 'polling'
+            target = self._run_polling
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=target, name="LibraryWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Interrompe o acompanhamento."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self.poll_interval, 1.0) + 1.0)
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._watch_dirs.clear()
+
+    def _notify(self, event, path):
+        if self.on_change:
+            try:
+                self.on_change(event, path)
+            except Exception as e:
+                print(f"Erro no callback do observador da biblioteca: {e}")
+
+    def _index_file(self, path, stat=None):
+        existed = self.index.contains(path)
+        if self.index.add_or_update(path, stat):
+            self._notify('updated' if existed else 'added', path)
+
+    def _unindex_file(self, path):
+        if self.index.remove(path):
+            self._notify('removed', path)
+
+    def _unindex_tree(self, directory):
+        for path in self.index.remove_tree(directory):
+            self._notify('removed', path)
+
+    def _index_tree(self, directory):
+        for root, _dirs, files in os.walk(directory):
+            for name in files:
+                self._index_file(os.path.join(root, name))
+
+    # --- inotify ---
+
+    def _watch_tree(self, directory):
+        for root, _dirs, _files in os.walk(directory):
+            try:
+                wd = self._inotify.add_watch(root)
+            except OSError:
+                continue
+            self._watch_dirs[wd] = root
+
+    def _unwatch_tree(self, directory):
+        """
+        Remove os watches de um diretório removido ou movido e dos seus subdiretórios.
+
+        Um diretório movido continua com o mesmo watch no inotify; sem isso,
+        os eventos seguintes seriam indexados sob o caminho antigo.
+        """
+        prefix = directory + os.sep
+        for wd, path in list(self._watch_dirs.items()):
+            if path == directory or path.startswith(prefix):
+                del self._watch_dirs[wd]
+                try:
+                    self._inotify.rm_watch(wd)
+                except OSError:
+                    pass
+
+    def _rescan(self):
+        """Refaz o índice e os watches do zero (ex: eventos perdidos na fila do inotify)."""
+        print("Fila de eventos da biblioteca estourou; varrendo tudo de novo")
+        before = self.index.snapshot()
+        self.index.full_scan()
+        after = self.index.snapshot()
+        for key in before.keys() - after.keys():
+            self._notify('removed', os.path.join(self.base_directory, key))
+        for key, value in after.items():
+            if key not in before:
+                self._notify('added', os.path.join(self.base_directory, key))
+            elif before[key] != value:
+                self._notify('updated', os.path.join(self.base_directory, key))
+
+        for wd in list(self._watch_dirs):
+            try:
+                self._inotify.rm_watch(wd)
+            except OSError:
+                pass
+        self._watch_dirs.clear()
+        self._watch_tree(self.base_directory)
+
+    def _run_inotify(self):
+        while not self._stop_event.is_set():
+            for wd, mask, _cookie, name in self._inotify.read_events(0.5):
+                if mask & _Inotify.IN_Q_OVERFLOW:
+                    self._rescan()
+                    continue
+                directory = self._watch_dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & _Inotify.IN_IGNORED:
+                    self._watch_dirs.pop(wd, None)
+                    continue
+                if not name:
+                    continue
+
+                path = os.path.join(directory, name)
+                if mask & _Inotify.IN_ISDIR:
+                    if mask & (_Inotify.IN_CREATE | _Inotify.IN_MOVED_TO):
+                        self._watch_tree(path)
+                        self._index_tree(path)
+                    elif mask & (_Inotify.IN_DELETE | _Inotify.IN_MOVED_FROM):
+                        self._unwatch_tree(path)
+                        self._unindex_tree(path)
+                elif mask & (_Inotify.IN_CLOSE_WRITE | _Inotify.IN_MOVED_TO):
+                    self._index_file(path)
+                elif mask & (_Inotify.IN_DELETE | _Inotify.IN_MOVED_FROM):
+                    self._unindex_file(path)
+
+    # --- polling ---
+
+    def _snapshot_directories(self, directory):
+        for root, _dirs, _files in os.walk(directory):
+            listing = self._list_directory(root)
+            if listing is not None:
+                self._dir_listings[root] = listing[0]
+
+    def _list_directory(self, directory):
+        """
+        Lista um diretório.
+
+        Returns:
+            tuple: ({nome: (tamanho, mtime)} dos arquivos de áudio, conjunto
+                   dos subdiretórios), ou None se o diretório não existe mais
+        """
+        files = {}
+        subdirectories = set()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.add(entry.path)
+                        elif entry.is_file() and self.index.is_audio_file(entry.name):
+                            stat = entry.stat()
+                            files[entry.name] = (stat.st_size, stat.st_mtime)
+                    except OSError:
+                        continue  # removido durante a listagem
+        except OSError:
+            return None
+        return files, subdirectories
+
+    def _run_polling(self):
+        while not self._stop_event.wait(self.poll_interval):
+            self.poll_once()
+
+    def poll_once(self):
+        """
+        Executa uma rodada de varredura incremental.
+
+        Cada diretório conhecido é listado uma vez e comparado com a
+        listagem anterior; só os arquivos que mudaram tocam o índice.
+        """
+        for directory in list(self._dir_listings):
+            if directory in self._dir_listings:  # senão, removido nesta mesma rodada
+                self._rescan_directory(directory)
+
+    def _forget_directory(self, directory):
+        prefix = directory + os.sep
+        for known in list(self._dir_listings):
+            if known == directory or known.startswith(prefix):
+                del self._dir_listings[known]
+        self._unindex_tree(directory)
+
+    def _rescan_directory(self, directory):
+        listing = self._list_directory(directory)
+        if listing is None:
+            self._forget_directory(directory)
+            return
+        files, subdirectories = listing
+        previous = self._dir_listings[directory]
+        self._dir_listings[directory] = files
+
+        for name, value in files.items():
+            if previous.get(name) != value:
+                self._index_file(os.path.join(directory, name))
+        for name in previous.keys() - files.keys():
+            self._unindex_file(os.path.join(directory, name))
+
+        # Subdiretórios novos e os que sumiram
+        for subdirectory in subdirectories:
+            if subdirectory not in self._dir_listings:
+                self._snapshot_directories(subdirectory)
+                self._index_tree(subdirectory)
+        for known in list(self._dir_listings):
+            if os.path.dirname(known) == directory and known not in subdirectories:
+                self._forget_directory(known)
+
+
+# Exemplo de uso
+if __name__ == "__main__":
+    from file_manager import FileManager
+
+    file_manager = FileManager()
+    watcher = LibraryWatcher(
+        file_manager,
+        on_change=lambda event, path: print(f"[{event}] {path}")
+    )
+    watcher.start()
+    print(f"Observando {watcher.base_directory} ({watcher.backend}), "
+          f"{len(watcher.index)} arquivos indexados. Ctrl+C para sair.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
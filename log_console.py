@@ -0,0 +1,96 @@
+import os
+import logging
+import logging.handlers
+import threading
+from collections import deque
+from PyQt5.QtWidgets import QPlainTextEdit
+from PyQt5.QtCore import QTimer
+
+# Histórico completo dos consoles das janelas de download
+LOG_FILE = os.path.join(os.path.expanduser("~"), ".youtube_audio_extractor", "console.log")
+
+# Um logger só para todos os consoles; cada arquivo recebe um único handler
+logger = logging.getLogger(__name__)
+logger.propagate = False
+logger.setLevel(logging.INFO)
+_file_handlers = {}
+_file_handlers_lock = threading.Lock()
+
+
+class LogConsole(QPlainTextEdit):
+    """
+    Console de log com memória e custo de inserção constantes.
+
+    O documento guarda no máximo `max_blocks` linhas (as mais antigas são
+    descartadas pelo próprio Qt) e as mensagens são acumuladas num buffer
+    circular e inseridas em lote por um timer, em vez de um append por linha.
+    Opcionalmente, o histórico completo é gravado num arquivo rotativo,
+    compartilhado pelos consoles que usam o mesmo arquivo.
+    """
+
+    def __init__(self, parent=None, max_blocks=1000, flush_interval=200,
+                 log_file=None, max_file_bytes=5 * 1024 * 1024, backup_count=3):
+        """
+        Args:
+            parent (QWidget): Widget pai
+            max_blocks (int): Número máximo de linhas mantidas na tela
+            flush_interval (int): Intervalo entre inserções em lote, em milissegundos
+            log_file (str): Arquivo para o histórico completo (opcional)
+            max_file_bytes (int): Tamanho máximo de cada arquivo antes da rotação
+            backup_count (int): Quantidade de arquivos antigos mantidos
+        """
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(max_blocks)
+
+        # Linhas além de max_blocks seriam descartadas de qualquer forma
+        self._pending = deque(maxlen=max_blocks)
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(flush_interval)
+        self._flush_timer.timeout.connect(self.flush)
+
+        self._file_log = False
+        if log_file:
+            self.enable_file_log(log_file, max_file_bytes, backup_count)
+
+    def enable_file_log(self, log_file, max_file_bytes=5 * 1024 * 1024, backup_count=3):
+        """Passa a gravar todas as mensagens num arquivo de log rotativo."""
+        log_file = os.path.abspath(log_file)
+        with _file_handlers_lock:
+            if log_file not in _file_handlers:
+                try:
+                    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+                    handler = logging.handlers.RotatingFileHandler(
+                        log_file, maxBytes=max_file_bytes, backupCount=backup_count, encoding='utf-8'
+                    )
+                except OSError as e:
+                    print(f"Erro ao abrir o arquivo de log {log_file}: {e}")
+                    return
+                handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+                logger.addHandler(handler)
+                _file_handlers[log_file] = handler
+        self._file_log = True
+
+    def log(self, line):
+        """Enfileira uma linha para ser exibida no próximo lote."""
+        self._pending.append(line)
+        if self._file_log:
+            logger.info(line)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        """Insere de uma vez todas as linhas pendentes."""
+        if not self._pending:
+            self._flush_timer.stop()
+            return
+
+        lines = list(self._pending)
+        self._pending.clear()
+
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() == scrollbar.maximum()
+        self.appendPlainText('\n'.join(lines))
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
@@ -0,0 +1,149 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class PlaylistTrackModel(QAbstractTableModel):
+    """
+    Modelo de tabela com as faixas de uma playlist.
+
+    As linhas são acrescentadas em lotes à medida que as páginas da playlist
+    chegam (append_entries). Como é um QAbstractTableModel, a QTableView só
+    consulta os dados das linhas visíveis, então playlists com milhares de
+    faixas não custam mais para desenhar do que uma com dez.
+    """
+
+    COLUMN_SELECTED = 0
+    COLUMN_INDEX = 1
+    COLUMN_TITLE = 2
+    COLUMN_DURATION = 3
+    COLUMN_STATUS = 4
+    COLUMN_PROGRESS = 5
+
+    HEADERS = ["", "#", "Título", "Duração", "Status", "Progresso"]
+
+    STATUS_LABELS = {
+        'pending': "Pendente",
+        'downloading': "Baixando",
+        'finished': "Concluído",
+        'error': "Erro",
+        'skipped': "Ignorado",
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._tracks = []
+        self._row_by_index = {}  # playlist_index -> linha
+
+    def clear(self):
+        self.beginResetModel()
+        self._tracks = []
+        self._row_by_index = {}
+        self.endResetModel()
+
+    def append_entries(self, entries):
+        """Acrescenta um lote de entradas (info dicts planos do yt-dlp)."""
+        if not entries:
+            return
+        first = len(self._tracks)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        for entry in entries:
+            playlist_index = entry.get('playlist_index') or len(self._tracks) + 1
+            self._row_by_index[playlist_index] = len(self._tracks)
+            self._tracks.append({
+                'entry': entry,
+                'playlist_index': playlist_index,
+                'selected': True,
+                'status': 'pending',
+                'percent': None,
+            })
+        self.endInsertRows()
+
+    def entries(self):
+        """Retorna todas as entradas, na ordem da playlist."""
+        return [track['entry'] for track in self._tracks]
+
+    def selected_indices(self):
+        """Retorna os playlist_index das faixas marcadas."""
+        return [track['playlist_index'] for track in self._tracks if track['selected']]
+
+    def set_all_selected(self, selected):
+        for track in self._tracks:
+            track['selected'] = selected
+        if self._tracks:
+            self.dataChanged.emit(self.index(0, self.COLUMN_SELECTED),
+                                  self.index(len(self._tracks) - 1, self.COLUMN_SELECTED))
+
+    def set_track_progress(self, playlist_index, status, percent=None):
+        """Atualiza status e progresso de uma faixa, redesenhando só a sua linha."""
+        row = self._row_by_index.get(playlist_index)
+        if row is None:
+            return
+        track = self._tracks[row]
+        if track['status'] == status and track['percent'] == percent:
+            return
+        track['status'] = status
+        track['percent'] = percent
+        self.dataChanged.emit(self.index(row, self.COLUMN_STATUS),
+                              self.index(row, self.COLUMN_PROGRESS))
+
+    def reset_progress(self):
+        """Marca as faixas selecionadas como pendentes e as demais como ignoradas."""
+        for track in self._tracks:
+            track['status'] = 'pending' if track['selected'] else 'skipped'
+            track['percent'] = None
+        if self._tracks:
+            self.dataChanged.emit(self.index(0, self.COLUMN_STATUS),
+                                  self.index(len(self._tracks) - 1, self.COLUMN_PROGRESS))
+
+    # --- Interface do QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._tracks)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == self.COLUMN_SELECTED:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        track = self._tracks[index.row()]
+        column = index.column()
+
+        if role == Qt.CheckStateRole and column == self.COLUMN_SELECTED:
+            return Qt.Checked if track['selected'] else Qt.Unchecked
+
+        if role != Qt.DisplayRole:
+            return None
+
+        if column == self.COLUMN_INDEX:
+            return track['playlist_index']
+        if column == self.COLUMN_TITLE:
+            return track['entry'].get('title') or track['entry'].get('id') or "N/A"
+        if column == self.COLUMN_DURATION:
+            duration = track['entry'].get('duration')
+            if not duration:
+                return ""
+            minutes, seconds = divmod(int(duration), 60)
+            return f"{minutes}:{seconds:02d}"
+        if column == self.COLUMN_STATUS:
+            return self.STATUS_LABELS.get(track['status'], track['status'])
+        if column == self.COLUMN_PROGRESS:
+            return f"{track['percent']}%" if track['percent'] is not None else ""
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role == Qt.CheckStateRole and index.column() == self.COLUMN_SELECTED:
+            self._tracks[index.row()]['selected'] = value == Qt.Checked
+            self.dataChanged.emit(index, index)
+            return True
+        return False
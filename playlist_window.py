@@ -2,179 +2,82 @@ import sys
 import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
                              QWidget, QLabel, QLineEdit, QPushButton, QComboBox, 
-                             QProgressBar, QTextEdit, QGroupBox, QGridLayout, 
-                             QMessageBox, QFileDialog)
-from PyQt5.QtCore import QThread, pyqtSignal, Qt
+                             QProgressBar, QGroupBox, QGridLayout, 
+                             QMessageBox, QFileDialog, QTableView, QHeaderView,
+                             QAbstractItemView)
+from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtGui import QFont, QPixmap
-from integrated_audio_extractor_playlist import extract_audio_from_url
+from log_console import LogConsole, LOG_FILE
+from progress_aggregator import format_progress_state
+from url_resolver import UrlResolver
+from job_queue import DownloadJob, JobQueue
+from extraction_core import extract_audio
+from retry_policy import DeadLetterList
+from playlist_track_model import PlaylistTrackModel
 
-class PlaylistExtractorThread(QThread):
-    progress_signal = pyqtSignal(str)
-    progress_percentage_signal = pyqtSignal(int)  # Novo sinal para progresso em porcentagem
-    finished_signal = pyqtSignal(str, str)
-    error_signal = pyqtSignal(str)
-
-    def __init__(self, url, output_path, format, quality):
-        super().__init__()
+class PlaylistExtractionJob(DownloadJob):
+    def __init__(self, url, output_path, format, quality, info_dict=None, playlist_items=None):
+        title = info_dict.get('title') if info_dict else None
+        super().__init__(title or url, kind='playlist')
         self.url = url
+        self.info_dict = info_dict  # Informações já resolvidas na pré-visualização
+        self.playlist_items = playlist_items  # Faixas selecionadas (ex: "1,3,5"); None baixa todas
         self.output_path = output_path
         self.format = format
         self.quality = quality
 
     def run(self):
-        try:
-            self.progress_signal.emit("Iniciando extração de playlist...")
-            
-            # Usar a função integrada de extração de áudio com callback de progresso
-            result = self.extract_audio_with_progress(
-                url=self.url,
-                output_directory=self.output_path,
-                format=self.format,
-                quality=self.quality
-            )
-            
-            if result['success']:
-                if result['type'] == 'playlist':
-                    self.finished_signal.emit(result['playlist_title'], result['message'])
-                else:
-                    self.finished_signal.emit(result.get('filename', 'Arquivo'), result['message'])
-            else:
-                self.error_signal.emit(result['error'])
-                
-        except Exception as e:
-            self.error_signal.emit(f"Erro na extração: {str(e)}")
-    
-    def extract_audio_with_progress(self, url, output_directory=None, format='mp3', quality='128K'):
-        """Versão modificada da função de extração com callback de progresso"""
-        import yt_dlp
-        import os
-        from file_manager import FileManager
-        
-        # Inicializar o gerenciador de arquivos
-        file_manager = FileManager(output_directory)
-        
-        try:
-            # Primeiro, obter informações do vídeo sem baixar
-            ydl_opts_info = {'quiet': True}
-            with yt_dlp.YoutubeDL(ydl_opts_info) as ydl:
-                info_dict = ydl.extract_info(url, download=False)
-                
-            # Verificar se é playlist ou vídeo único
-            if info_dict.get('_type') == 'playlist' or ('entries' in info_dict and len(info_dict['entries']) > 1):
-                # Lógica para playlist
-                playlist_title = info_dict.get('title', 'Unknown Playlist')
-                playlist_author = info_dict.get('uploader', 'Unknown')
-                
-                # Criar diretório para a playlist
-                playlist_dir_name = file_manager.sanitize_filename(playlist_title)
-                playlist_path = os.path.join(file_manager.base_directory, playlist_dir_name)
-                os.makedirs(playlist_path, exist_ok=True)
-                
-                def progress_hook(d):
-                    if d['status'] == 'downloading':
-                        percent_str = d.get('_percent_str', 'N/A')
-                        self.progress_signal.emit(f"Baixando: {percent_str}")
-                        
-                        # Extrair porcentagem numérica e emitir sinal
-                        if percent_str != 'N/A' and '%' in percent_str:
-                            try:
-                                percent_value = int(float(percent_str.replace('%', '')))
-                                self.progress_percentage_signal.emit(percent_value)
-                            except (ValueError, TypeError):
-                                pass
-                    elif d['status'] == 'finished':
-                        self.progress_signal.emit("Download concluído, processando...")
-                        self.progress_percentage_signal.emit(100)
-                
-                ydl_opts = {
-                    'format': 'bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': format,
-                        'preferredquality': quality,
-                    }],
-                    'outtmpl': os.path.join(playlist_path, '%(title)s.%(ext)s'),
-                    'noplaylist': False,
-                    'progress_hooks': [progress_hook],
-                }
-                
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([url])
-                
-                return {
-                    'success': True,
-                    'type': 'playlist',
-                    'playlist_title': playlist_title,
-                    'playlist_path': playlist_path,
-                    'message': 'Playlist baixada com sucesso!'
-                }
-            else:
-                # Lógica para vídeo único
-                video_title = info_dict.get('title', 'Unknown Video')
-                video_author = info_dict.get('uploader', 'Unknown')
-                
-                final_filename = file_manager.generate_filename(video_title, format)
-                final_path = os.path.join(file_manager.base_directory, final_filename)
-                
-                def progress_hook(d):
-                    if d['status'] == 'downloading':
-                        percent_str = d.get('_percent_str', 'N/A')
-                        self.progress_signal.emit(f"Baixando: {percent_str}")
-                        
-                        # Extrair porcentagem numérica e emitir sinal
-                        if percent_str != 'N/A' and '%' in percent_str:
-                            try:
-                                percent_value = int(float(percent_str.replace('%', '')))
-                                self.progress_percentage_signal.emit(percent_value)
-                            except (ValueError, TypeError):
-                                pass
-                    elif d['status'] == 'finished':
-                        self.progress_signal.emit("Download concluído, processando...")
-                        self.progress_percentage_signal.emit(100)
-                
-                ydl_opts = {
-                    'format': 'bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': format,
-                        'preferredquality': quality,
-                    }],
-                    'outtmpl': os.path.join(file_manager.base_directory, '%(title)s.%(ext)s'),
-                    'noplaylist': True,
-                    'progress_hooks': [progress_hook],
-                }
-                
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([url])
-                
-                # Renomear o arquivo baixado para o nome padronizado
-                downloaded_files = [f for f in os.listdir(file_manager.base_directory) if f.startswith(video_title) and f.endswith(f'.{format}')]
-                if downloaded_files:
-                    temp_file_path = os.path.join(file_manager.base_directory, downloaded_files[0])
-                    os.rename(temp_file_path, final_path)
-                
-                return {
-                    'success': True,
-                    'type': 'video',
-                    'filename': final_filename,
-                    'file_path': final_path,
-                    'message': 'Áudio extraído com sucesso!'
-                }
-                
-        except Exception as e:
-            return {
-                'success': False,
-                'error': f"Erro na extração: {str(e)}"
-            }
+        self.progress_signal.emit("Iniciando extração de playlist...")
+
+        # O núcleo faz a extração; aqui os callbacks só viram sinais Qt
+        result = extract_audio(
+            self.url,
+            output_directory=self.output_path,
+            format=self.format,
+            quality=self.quality,
+            info_dict=self.info_dict,
+            playlist_items=self.playlist_items,
+            control=self.control,
+            on_message=self.progress_signal.emit,
+            on_progress=self.progress_state_signal.emit,
+            progress_hooks=[self.bandwidth_hook],
+            dead_letters=DeadLetterList(),
+            circuit_breaker=self.circuit_breaker,
+        )
+
+        if result['success']:
+            name = result['playlist_title'] if result['type'] == 'playlist' else result['filename']
+            self.finished_signal.emit(name, result['message'])
+        else:
+            self.error_signal.emit(result['error'])
 
 class PlaylistWindow(QMainWindow):
     # Sinal para voltar ao menu principal
     back_to_menu_requested = pyqtSignal()
     
-    def __init__(self):
+    # Sinal para abrir o painel da fila de downloads
+    queue_panel_requested = pyqtSignal()
+    
+    def __init__(self, job_queue=None):
         super().__init__()
         self.output_directory = ""  # Correção: inicializa o atributo antes de usar
+        # Fila global da aplicação; sozinha, a janela usa uma fila própria
+        self.job_queue = job_queue or JobQueue(max_concurrent=1, parent=self)
+        self.current_job = None
         self.init_ui()
+        
+        # Resolução de URL fora da thread da interface; o resultado é reaproveitado no download
+        self.resolved_url = None
+        self.resolved_info = None
+        # As faixas chegam em lotes e são acrescentadas à tabela conforme a listagem avança
+        self.url_resolver = UrlResolver(stream_entries=True, parent=self)
+        self.url_resolver.started.connect(self.on_resolve_started)
+        self.url_resolver.resolved.connect(self.on_url_resolved)
+        self.url_resolver.entries_received.connect(self.on_entries_received)
+        self.url_resolver.listing_finished.connect(self.on_listing_finished)
+        self.url_resolver.failed.connect(self.on_resolve_failed)
+        self.url_resolver.cancelled.connect(self.on_resolve_cancelled)
+        self.url_input.textChanged.connect(self.on_url_text_changed)
         self.output_directory = os.path.join(os.path.expanduser("~"), "Audios")
         
         # Criar diretório de saída se não existir
@@ -183,7 +86,7 @@ class PlaylistWindow(QMainWindow):
 
     def init_ui(self):
         self.setWindowTitle("YouTube Audio Extractor - Playlist")
-        self.setFixedSize(800, 650)  # Tamanho fixo para melhor centralização
+        self.setFixedSize(800, 860)  # Tamanho fixo para melhor centralização
         
         # Centralizar na tela
         self.center_on_screen()
@@ -219,6 +122,20 @@ class PlaylistWindow(QMainWindow):
         self.process_url_button.clicked.connect(self.process_url)
         self.process_url_button.setMinimumHeight(35)
         url_button_layout.addWidget(self.process_url_button)
+        
+        # Indicador de consulta em andamento e botão para cancelá-la
+        self.resolve_spinner = QProgressBar()
+        self.resolve_spinner.setRange(0, 0)  # Animação indeterminada
+        self.resolve_spinner.setTextVisible(False)
+        self.resolve_spinner.setMaximumWidth(120)
+        self.resolve_spinner.setVisible(False)
+        url_button_layout.addWidget(self.resolve_spinner)
+        
+        self.cancel_resolve_button = QPushButton("Cancelar")
+        self.cancel_resolve_button.clicked.connect(self.cancel_process_url)
+        self.cancel_resolve_button.setMinimumHeight(35)
+        self.cancel_resolve_button.setVisible(False)
+        url_button_layout.addWidget(self.cancel_resolve_button)
         url_button_layout.addStretch()
         
         url_layout.addLayout(url_button_layout)
@@ -252,6 +169,40 @@ class PlaylistWindow(QMainWindow):
         info_group.setLayout(info_layout)
         main_layout.addWidget(info_group)
         
+        # Tabela de faixas: o modelo só fornece os dados das linhas visíveis
+        tracks_group = QGroupBox("Faixas")
+        tracks_layout = QVBoxLayout()
+        
+        self.track_model = PlaylistTrackModel(self)
+        self.track_table = QTableView()
+        self.track_table.setModel(self.track_model)
+        self.track_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.track_table.setAlternatingRowColors(True)
+        self.track_table.verticalHeader().setVisible(False)
+        # Altura fixa de linha evita medir cada linha ao rolar ou inserir lotes
+        self.track_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.track_table.verticalHeader().setDefaultSectionSize(22)
+        header = self.track_table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setSectionResizeMode(PlaylistTrackModel.COLUMN_TITLE, QHeaderView.Stretch)
+        header.resizeSection(PlaylistTrackModel.COLUMN_SELECTED, 30)
+        header.resizeSection(PlaylistTrackModel.COLUMN_INDEX, 50)
+        self.track_table.setMinimumHeight(200)
+        tracks_layout.addWidget(self.track_table)
+        
+        selection_layout = QHBoxLayout()
+        self.select_all_button = QPushButton("Marcar Todas")
+        self.select_all_button.clicked.connect(lambda: self.track_model.set_all_selected(True))
+        selection_layout.addWidget(self.select_all_button)
+        self.select_none_button = QPushButton("Desmarcar Todas")
+        self.select_none_button.clicked.connect(lambda: self.track_model.set_all_selected(False))
+        selection_layout.addWidget(self.select_none_button)
+        selection_layout.addStretch()
+        tracks_layout.addLayout(selection_layout)
+        
+        tracks_group.setLayout(tracks_layout)
+        main_layout.addWidget(tracks_group)
+        
         # Grupo de configurações
         config_group = QGroupBox("Configurações de Conversão")
         config_layout = QGridLayout()
@@ -315,19 +266,32 @@ class PlaylistWindow(QMainWindow):
         main_layout.addWidget(self.download_button)
         
         # Barra de progresso
+        # Barra de progresso com controles de pausa e cancelamento do download atual
+        progress_layout = QHBoxLayout()
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
         self.progress_bar.setMinimumHeight(25)
-        main_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.progress_bar)
+        
+        self.pause_button = QPushButton("Pausar")
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.pause_button.setVisible(False)
+        progress_layout.addWidget(self.pause_button)
+        
+        self.cancel_download_button = QPushButton("Cancelar")
+        self.cancel_download_button.clicked.connect(self.cancel_download)
+        self.cancel_download_button.setVisible(False)
+        progress_layout.addWidget(self.cancel_download_button)
+        main_layout.addLayout(progress_layout)
         
         # Log de status
         status_label = QLabel("Log de Status:")
         status_label.setStyleSheet("font-weight: bold; margin-top: 10px;")
         main_layout.addWidget(status_label)
         
-        self.status_log = QTextEdit()
-        self.status_log.setMaximumHeight(150)
-        self.status_log.setReadOnly(True)
+        # Console com número máximo de linhas e inserção em lote
+        self.status_log = LogConsole(max_blocks=1000, log_file=LOG_FILE)
+        self.status_log.setMaximumHeight(120)
         self.status_log.setStyleSheet("background-color: #f8f8f8; font-family: monospace;")
         main_layout.addWidget(self.status_log)
         
@@ -369,10 +333,11 @@ class PlaylistWindow(QMainWindow):
         
         header_layout.addStretch()
         
-        # Espaço para balancear o layout
-        spacer_widget = QWidget()
-        spacer_widget.setMinimumWidth(120)
-        header_layout.addWidget(spacer_widget)
+        # Botão da fila de downloads (também balanceia o layout)
+        self.queue_button = QPushButton("Fila de Downloads")
+        self.queue_button.setMinimumWidth(120)
+        self.queue_button.clicked.connect(self.queue_panel_requested.emit)
+        header_layout.addWidget(self.queue_button)
         
         main_layout.addLayout(header_layout)
 
@@ -443,44 +408,77 @@ class PlaylistWindow(QMainWindow):
             QMessageBox.warning(self, "Aviso", "Por favor, insira uma URL válida de playlist do YouTube.")
             return
         
+        self.url_resolver.resolve_now(url)
+
+    def on_url_text_changed(self, text):
+        """Invalida a consulta anterior e agenda uma nova quando uma URL é colada"""
+        self.resolved_url = None
+        self.resolved_info = None
+        self.download_button.setEnabled(False)
+        
+        url = text.strip()
+        if "list=" in url:
+            self.url_resolver.request(url)
+        else:
+            self.url_resolver.cancel()
+
+    def cancel_process_url(self):
+        self.url_resolver.cancel()
+
+    def set_resolving(self, resolving):
+        """Mostra ou esconde o indicador de consulta em andamento"""
+        self.resolve_spinner.setVisible(resolving)
+        self.cancel_resolve_button.setVisible(resolving)
+
+    def on_resolve_started(self, url):
+        self.set_resolving(True)
         self.log_message("Processando playlist...")
+
+    def on_resolve_cancelled(self):
+        self.set_resolving(False)
+        self.log_message("Consulta da playlist cancelada.")
+
+    def on_resolve_failed(self, url, message):
+        self.set_resolving(False)
+        QMessageBox.critical(self, "Erro", f"Erro ao processar playlist: {message}")
+        self.log_message(f"Erro: {message}")
+
+    def on_url_resolved(self, url, info_dict):
+        """Recebe os metadados da playlist; as faixas chegam depois, em lotes"""
+        self.track_model.clear()
         
-        try:
-            import yt_dlp
-            ydl_opts = {'quiet': True, 'extract_flat': True}
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info_dict = ydl.extract_info(url, download=False)
-                
-                title = info_dict.get('title', 'N/A')
-                author = info_dict.get('uploader', 'N/A')
-                
-                # Verificar se é realmente uma playlist
-                is_playlist = info_dict.get('_type') == 'playlist' or \
-                             ('entries' in info_dict and len(info_dict['entries']) > 1)
-                
-                if not is_playlist:
-                    QMessageBox.warning(self, "Aviso", "Esta URL não parece ser uma playlist. Use a opção 'Baixar Vídeo Único' no menu principal.")
-                    return
-                
-                entries_count = len(info_dict.get('entries', []))
-                
-                self.title_label.setText(title)
-                self.author_label.setText(author)
-                self.count_label.setText(f"{entries_count} vídeos")
-                
-                # Mostrar pasta de destino
-                from file_manager import FileManager
-                file_manager = FileManager(self.output_directory)
-                playlist_dir_name = file_manager.sanitize_filename(title)
-                playlist_path = os.path.join(self.output_directory, playlist_dir_name)
-                self.folder_label.setText(playlist_path)
-                
-                self.download_button.setEnabled(True)
-                self.log_message(f"Playlist processada: {entries_count} vídeos encontrados")
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao processar playlist: {str(e)}")
-            self.log_message(f"Erro: {str(e)}")
+        title = info_dict.get('title', 'N/A')
+        author = info_dict.get('uploader', 'N/A')
+        
+        # Verificar se é realmente uma playlist
+        if info_dict.get('_type') != 'playlist':
+            self.url_resolver.cancel()
+            QMessageBox.warning(self, "Aviso", "Esta URL não parece ser uma playlist. Use a opção 'Baixar Vídeo Único' no menu principal.")
+            return
+        
+        self.title_label.setText(title)
+        self.author_label.setText(author)
+        self.count_label.setText("Carregando...")
+        
+        # Mostrar pasta de destino
+        from file_manager import FileManager
+        file_manager = FileManager(self.output_directory)
+        playlist_dir_name = file_manager.sanitize_filename(title)
+        playlist_path = os.path.join(self.output_directory, playlist_dir_name)
+        self.folder_label.setText(playlist_path)
+        
+        self.resolved_url = url
+        self.resolved_info = info_dict
+    
+    def on_entries_received(self, entries):
+        self.track_model.append_entries(entries)
+        self.count_label.setText(f"{self.track_model.rowCount()} vídeos (carregando...)")
+    
+    def on_listing_finished(self, entries_count):
+        self.set_resolving(False)
+        self.count_label.setText(f"{entries_count} vídeos")
+        self.download_button.setEnabled(entries_count > 0)
+        self.log_message(f"Playlist processada: {entries_count} vídeos encontrados")
 
     def browse_output_directory(self):
         directory = QFileDialog.getExistingDirectory(self, "Selecionar Diretório Base")
@@ -505,9 +503,14 @@ class PlaylistWindow(QMainWindow):
             QMessageBox.warning(self, "Aviso", "Por favor, insira uma URL válida.")
             return
         
+        selected = self.track_model.selected_indices()
+        if not selected:
+            QMessageBox.warning(self, "Aviso", "Marque ao menos uma faixa para baixar.")
+            return
+        
         # Confirmação antes de iniciar download de playlist
         reply = QMessageBox.question(self, "Confirmar Download", 
-                                   f"Você está prestes a baixar uma playlist completa.\\n"
+                                   f"Você está prestes a baixar {len(selected)} faixa(s) da playlist.\\n"
                                    f"Isso pode demorar bastante tempo.\\n\\n"
                                    f"Deseja continuar?",
                                    QMessageBox.Yes | QMessageBox.No)
@@ -515,21 +518,84 @@ class PlaylistWindow(QMainWindow):
         if reply != QMessageBox.Yes:
             return
         
-        self.download_button.setEnabled(False)
-        self.progress_bar.setVisible(True)
+        # O botão continua habilitado: novos downloads entram na fila global
         self.progress_bar.setRange(0, 0)  # Indeterminate progress
         
         self.log_message("Iniciando download da playlist...")
         
-        self.extractor_thread = PlaylistExtractorThread(url, self.output_directory, format, quality)
-        self.extractor_thread.progress_signal.connect(self.update_progress)
-        self.extractor_thread.progress_percentage_signal.connect(self.update_progress_percentage)
-        self.extractor_thread.finished_signal.connect(self.download_finished)
-        self.extractor_thread.error_signal.connect(self.download_error)
-        self.extractor_thread.start()
+        # Reaproveitar as informações e a listagem da pré-visualização, se forem desta mesma URL
+        info_dict = None
+        if url == self.resolved_url:
+            info_dict = dict(self.resolved_info, entries=self.track_model.entries())
+        # Só restringir as faixas quando parte delas foi desmarcada
+        playlist_items = None
+        if len(selected) < self.track_model.rowCount():
+            playlist_items = ",".join(str(index) for index in selected)
+        self.track_model.reset_progress()
+        
+        job = PlaylistExtractionJob(url, self.output_directory, format, quality,
+                                    info_dict, playlist_items)
+        self.current_job = job
+        self.last_logged_milestone = None
+        job.progress_signal.connect(lambda message, job=job: self.update_progress(job, message))
+        job.progress_state_signal.connect(lambda state, job=job: self.update_progress_state(job, state))
+        job.finished_signal.connect(lambda name, message, job=job: self.download_finished(job, name, message))
+        job.error_signal.connect(lambda message, job=job: self.download_error(job, message))
+        job.state_changed.connect(self.on_job_state_changed)
+        self.set_download_controls_visible(True)
+        self.job_queue.submit(job)
+        if job.state == DownloadJob.PENDING:
+            self.log_message(f"Adicionado à fila de downloads: {job.title}")
 
-    def update_progress(self, message):
-        self.log_message(message)
+    def set_download_controls_visible(self, visible):
+        self.progress_bar.setVisible(visible)
+        self.pause_button.setVisible(visible)
+        self.cancel_download_button.setVisible(visible)
+        self.pause_button.setText("Pausar")
+    
+    def toggle_pause(self):
+        """Pausa ou retoma o download mais recente desta janela"""
+        job = self.current_job
+        if job is None:
+            return
+        if job.state == DownloadJob.PAUSED:
+            self.job_queue.resume(job)
+        else:
+            self.job_queue.pause(job)
+            self.log_message("Pausando download...")
+    
+    def cancel_download(self):
+        if self.current_job is not None:
+            self.job_queue.cancel(self.current_job)
+            self.log_message("Cancelando download...")
+    
+    def on_job_state_changed(self, job):
+        if job is not self.current_job:
+            return
+        if job.state == DownloadJob.PAUSED:
+            self.pause_button.setText("Retomar")
+        elif job.state in (DownloadJob.PENDING, DownloadJob.RUNNING):
+            self.pause_button.setText("Pausar")
+        elif job.state == DownloadJob.CANCELLED:
+            self.current_job = None
+            self.set_download_controls_visible(False)
+    
+    def update_progress(self, job, message):
+        self.log_message(f"[{job.title}] {message}")
+    
+    def update_progress_state(self, job, state):
+        """Atualiza a interface a partir do estado agregado de progresso"""
+        # A barra acompanha o download mais recente desta janela; os demais aparecem na fila
+        if job is not self.current_job:
+            return
+        if state['status'] == 'finished':
+            self.log_message("Download concluído, processando...")
+        if state['playlist_index']:
+            status = 'finished' if state['status'] == 'finished' else 'downloading'
+            self.track_model.set_track_progress(state['playlist_index'], status, state['percent'])
+        if state['percent'] is not None:
+            self.update_progress_percentage(state['percent'])
+            self.progress_bar.setFormat(format_progress_state(state))
     
     def update_progress_percentage(self, percentage):
         """Atualiza a barra de progresso com porcentagem específica"""
@@ -537,26 +603,32 @@ class PlaylistWindow(QMainWindow):
         self.progress_bar.setValue(percentage)
         # Atualizar o texto da barra de progresso para mostrar a porcentagem
         self.progress_bar.setFormat(f"{percentage}%")
-        # Só logar em marcos importantes (0%, 25%, 50%, 75%, 100%)
-        if percentage in [0, 25, 50, 75, 100]:
-            self.log_message(f"Progresso: {percentage}%")
+        # Só logar em marcos importantes (0%, 25%, 50%, 75%, 100%); como as
+        # atualizações são agregadas, um marco pode ser ultrapassado sem ser visto
+        milestone = percentage // 25 * 25
+        if milestone != self.last_logged_milestone:
+            self.last_logged_milestone = milestone
+            self.log_message(f"Progresso: {milestone}%")
 
-    def download_finished(self, playlist_name, message):
+    def download_finished(self, job, playlist_name, message):
         self.log_message(f"{message} - {playlist_name}")
-        self.progress_bar.setVisible(False)
-        self.download_button.setEnabled(True)
-        # Limpar o campo de URL após o download ser concluído
-        self.url_input.clear()
+        if job is self.current_job:
+            self.current_job = None
+            self.set_download_controls_visible(False)
+        # Limpar o campo de URL se ainda mostrar a URL deste download
+        if self.url_input.text().strip() == job.url:
+            self.url_input.clear()
         QMessageBox.information(self, "Sucesso", f"Playlist baixada com sucesso!\\nPasta: {playlist_name}")
 
-    def download_error(self, error_message):
+    def download_error(self, job, error_message):
         self.log_message(f"Erro: {error_message}")
-        self.progress_bar.setVisible(False)
-        self.download_button.setEnabled(True)
+        if job is self.current_job:
+            self.current_job = None
+            self.set_download_controls_visible(False)
         QMessageBox.critical(self, "Erro", f"Erro no download da playlist:\\n{error_message}")
 
     def log_message(self, message):
-        self.status_log.append(f"[{self.get_timestamp()}] {message}")
+        self.status_log.log(f"[{self.get_timestamp()}] {message}")
 
     def get_timestamp(self):
         from datetime import datetime
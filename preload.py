@@ -0,0 +1,69 @@
+import time
+import threading
+
+# Importar o yt-dlp carrega centenas de módulos de extratores; isso é feito
+# numa thread em segundo plano enquanto a interface já está na tela.
+_loaded = threading.Event()
+_lock = threading.Lock()
+_thread = None
+_error = None
+_elapsed = None
+
+
+def import_yt_dlp():
+    """
+    Importa o yt-dlp e carrega as classes dos extratores.
+
+    Returns:
+        float: Tempo gasto, em segundos
+    """
+    start = time.perf_counter()
+    import yt_dlp
+    # O YoutubeDL gera a lista de extratores no construtor; fazer isso aqui
+    # tira o custo do primeiro download
+    list(yt_dlp.extractor.gen_extractor_classes())
+    return time.perf_counter() - start
+
+
+def _run():
+    global _error, _elapsed
+    try:
+        _elapsed = import_yt_dlp()
+    except Exception as e:
+        _error = e
+        print(f"Erro ao pré-carregar o yt-dlp: {e}")
+    finally:
+        _loaded.set()
+
+
+def start_preload():
+    """Inicia a importação do yt-dlp em segundo plano (apenas na primeira chamada)."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="yt_dlp-preload", daemon=True)
+            _thread.start()
+
+
+def wait_until_loaded(timeout=None):
+    """
+    Espera o pré-carregamento terminar.
+
+    Não é necessário chamar antes de usar o yt-dlp: um `import yt_dlp`
+    concorrente simplesmente espera a importação em andamento.
+
+    Returns:
+        bool: True se o yt-dlp foi carregado com sucesso
+    """
+    start_preload()
+    _loaded.wait(timeout)
+    return _loaded.is_set() and _error is None
+
+
+def is_loaded():
+    return _loaded.is_set() and _error is None
+
+
+def preload_time():
+    """Retorna o tempo gasto na importação, em segundos (None se ainda não terminou)."""
+    return _elapsed
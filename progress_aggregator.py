@@ -0,0 +1,103 @@
+import time
+import threading
+
+
+class ProgressAggregator:
+    """
+    Agrega os callbacks de progresso do yt-dlp antes de repassá-los à interface.
+
+    O yt-dlp chama o progress_hook centenas de vezes por segundo; cada chamada
+    virava um sinal Qt e um append no log. Aqui as atualizações são reduzidas
+    a no máximo `rate_hz` por segundo, apenas quando o estado realmente muda,
+    e carregam valores numéricos (bytes, velocidade, ETA) em vez de textos
+    formatados. Mudanças de status ('downloading' -> 'finished') são sempre
+    enviadas imediatamente.
+    """
+
+    def __init__(self, emit, rate_hz=10):
+        """
+        Args:
+            emit (callable): Recebe o dicionário de estado a cada atualização enviada
+            rate_hz (float): Frequência máxima de envio de atualizações
+        """
+        self.emit = emit
+        self.min_interval = 1.0 / rate_hz
+        self._last_emit_time = 0.0
+        self._last_state = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def state_from_hook(d):
+        """
+        Converte o dicionário do progress_hook do yt-dlp em um estado numérico.
+
+        Returns:
+            dict: status, downloaded_bytes, total_bytes, percent, speed (bytes/s),
+                  eta (s), filename, playlist_index e playlist_count
+        """
+        total_bytes = d.get('total_bytes') or d.get('total_bytes_estimate')
+        downloaded_bytes = d.get('downloaded_bytes') or 0
+        if d.get('status') == 'finished':
+            percent = 100
+        elif total_bytes:
+            percent = min(100, int(downloaded_bytes * 100 / total_bytes))
+        else:
+            percent = None
+
+        info_dict = d.get('info_dict') or {}
+        return {
+            'status': d.get('status'),
+            'downloaded_bytes': downloaded_bytes,
+            'total_bytes': total_bytes,
+            'percent': percent,
+            'speed': d.get('speed'),
+            'eta': d.get('eta'),
+            'filename': d.get('filename'),
+            'playlist_index': info_dict.get('playlist_index'),
+            'playlist_count': info_dict.get('n_entries') or info_dict.get('playlist_count'),
+        }
+
+    def _visible_key(self, state):
+        # Só conta como mudança o que aparece na interface
+        speed = state['speed']
+        return (state['status'], state['percent'], state['playlist_index'],
+                state['eta'], int(speed / 1024) if speed else None)
+
+    def update(self, d):
+        """Deve ser usado como progress_hook do yt-dlp."""
+        state = self.state_from_hook(d)
+        now = time.monotonic()
+
+        with self._lock:
+            last = self._last_state
+            status_changed = last is None or last['status'] != state['status']
+            if not status_changed:
+                if now - self._last_emit_time < self.min_interval:
+                    return
+                if self._visible_key(state) == self._visible_key(last):
+                    return
+            self._last_state = state
+            self._last_emit_time = now
+
+        self.emit(state)
+
+    def reset(self):
+        """Esquece o último estado (ex: ao começar a próxima faixa)."""
+        with self._lock:
+            self._last_state = None
+            self._last_emit_time = 0.0
+
+
+def format_progress_state(state):
+    """Formata um estado de progresso para exibição (ex: '42% - 1.2 MB/s - ETA 0:31')."""
+    parts = []
+    if state.get('playlist_index') and state.get('playlist_count'):
+        parts.append(f"Faixa {state['playlist_index']}/{state['playlist_count']}")
+    if state.get('percent') is not None:
+        parts.append(f"{state['percent']}%")
+    if state.get('speed'):
+        parts.append(f"{state['speed'] / (1024 * 1024):.1f} MB/s")
+    if state.get('eta') is not None:
+        minutes, seconds = divmod(int(state['eta']), 60)
+        parts.append(f"ETA {minutes}:{seconds:02d}")
+    return " - ".join(parts)
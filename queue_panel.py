@@ -0,0 +1,195 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QSpinBox, QTableWidget, QTableWidgetItem, QHeaderView,
+                             QAbstractItemView, QComboBox, QInputDialog, QMessageBox)
+from PyQt5.QtCore import Qt
+from job_queue import DownloadJob
+from progress_aggregator import format_progress_state
+from bandwidth_limiter import parse_rate, compact_rate
+
+
+class QueuePanel(QWidget):
+    """Janela com todas as tarefas da fila global: em andamento, pendentes, pausadas e encerradas."""
+
+    HEADERS = ["#", "Título", "Tipo", "Prioridade", "Status", "Progresso"]
+    COLUMN_PROGRESS = 5
+    BANDWIDTH_PRESETS = ["Ilimitado", "256K", "512K", "1M", "2M", "5M", "10M"]
+
+    def __init__(self, job_queue, parent=None):
+        super().__init__(parent)
+        self.job_queue = job_queue
+        self._rows = {}  # job_id -> linha
+        self.init_ui()
+
+        self.job_queue.job_added.connect(self.on_job_added)
+        self.job_queue.queue_changed.connect(self.refresh)
+        for job in self.job_queue.jobs():
+            self.on_job_added(job)
+        self.refresh()
+
+    def init_ui(self):
+        self.setWindowTitle("YouTube Audio Extractor - Fila de Downloads")
+        self.resize(700, 400)
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        buttons_layout = QHBoxLayout()
+        self.up_button = QPushButton("Subir")
+        self.up_button.clicked.connect(lambda: self.move_selected(-1))
+        buttons_layout.addWidget(self.up_button)
+
+        self.down_button = QPushButton("Descer")
+        self.down_button.clicked.connect(lambda: self.move_selected(1))
+        buttons_layout.addWidget(self.down_button)
+
+        self.priority_button = QPushButton("Prioridade +")
+        self.priority_button.clicked.connect(self.raise_selected_priority)
+        buttons_layout.addWidget(self.priority_button)
+
+        self.pause_button = QPushButton("Pausar/Retomar")
+        self.pause_button.clicked.connect(self.toggle_pause_selected)
+        buttons_layout.addWidget(self.pause_button)
+
+        self.cancel_button = QPushButton("Cancelar")
+        self.cancel_button.clicked.connect(self.cancel_selected)
+        buttons_layout.addWidget(self.cancel_button)
+
+        self.job_bandwidth_button = QPushButton("Limitar Banda")
+        self.job_bandwidth_button.clicked.connect(self.limit_selected_bandwidth)
+        buttons_layout.addWidget(self.job_bandwidth_button)
+
+        self.clear_button = QPushButton("Limpar Encerrados")
+        self.clear_button.clicked.connect(self.job_queue.clear_finished)
+        buttons_layout.addWidget(self.clear_button)
+
+        buttons_layout.addStretch()
+
+        buttons_layout.addWidget(QLabel("Downloads simultâneos:"))
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 8)
+        self.concurrency_spin.setValue(self.job_queue.max_concurrent)
+        self.concurrency_spin.valueChanged.connect(self.job_queue.set_max_concurrent)
+        buttons_layout.addWidget(self.concurrency_spin)
+
+        # Banda total, dividida entre os downloads em andamento (ex: 2M, 500K)
+        buttons_layout.addWidget(QLabel("Banda máxima:"))
+        self.bandwidth_combo = QComboBox()
+        self.bandwidth_combo.setEditable(True)
+        self.bandwidth_combo.addItems(self.BANDWIDTH_PRESETS)
+        self.bandwidth_combo.setCurrentText(self.format_bandwidth(self.job_queue.bandwidth_rate))
+        self.bandwidth_combo.activated.connect(self.apply_bandwidth_limit)
+        self.bandwidth_combo.lineEdit().editingFinished.connect(self.apply_bandwidth_limit)
+        buttons_layout.addWidget(self.bandwidth_combo)
+
+        layout.addLayout(buttons_layout)
+
+    def on_job_added(self, job):
+        job.progress_state_signal.connect(lambda state, job=job: self.update_job_progress(job, state))
+
+    def refresh(self):
+        """Redesenha a tabela na ordem da fila, mantendo a tarefa selecionada."""
+        selected = self.selected_job()
+        jobs = self.job_queue.jobs()
+
+        self.table.setRowCount(len(jobs))
+        self._rows = {}
+        for row, job in enumerate(jobs):
+            self._rows[job.job_id] = row
+            progress = format_progress_state(job.last_progress) if job.last_progress else ""
+            values = [str(job.job_id), job.title,
+                      "Playlist" if job.kind == 'playlist' else "Vídeo",
+                      str(job.priority), DownloadJob.STATE_LABELS.get(job.state, job.state),
+                      progress]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setData(Qt.UserRole, job)
+                self.table.setItem(row, column, item)
+
+        if selected is not None and selected.job_id in self._rows:
+            self.table.selectRow(self._rows[selected.job_id])
+
+        # O limite pode mudar sozinho (controlador adaptativo do daemon)
+        if self.concurrency_spin.value() != self.job_queue.max_concurrent:
+            self.concurrency_spin.blockSignals(True)
+            self.concurrency_spin.setValue(self.job_queue.max_concurrent)
+            self.concurrency_spin.blockSignals(False)
+
+        # O limite de banda também pode ser alterado por fora (linha de comando do daemon)
+        if not self.bandwidth_combo.hasFocus():
+            text = self.format_bandwidth(self.job_queue.bandwidth_rate)
+            if self.bandwidth_combo.currentText() != text:
+                self.bandwidth_combo.blockSignals(True)
+                self.bandwidth_combo.setCurrentText(text)
+                self.bandwidth_combo.blockSignals(False)
+
+    @staticmethod
+    def format_bandwidth(rate):
+        return "Ilimitado" if rate is None else compact_rate(rate)
+
+    def apply_bandwidth_limit(self):
+        try:
+            rate = parse_rate(self.bandwidth_combo.currentText())
+        except ValueError as e:
+            QMessageBox.warning(self, "Banda máxima", str(e))
+            self.bandwidth_combo.setCurrentText(self.format_bandwidth(self.job_queue.bandwidth_rate))
+            return
+        if rate != self.job_queue.bandwidth_rate:
+            self.job_queue.set_bandwidth_limit(rate)
+
+    def update_job_progress(self, job, state):
+        row = self._rows.get(job.job_id)
+        if row is None:
+            return
+        item = self.table.item(row, self.COLUMN_PROGRESS)
+        if item is not None:
+            item.setText(format_progress_state(state))
+
+    def selected_job(self):
+        items = self.table.selectedItems()
+        return items[0].data(Qt.UserRole) if items else None
+
+    def move_selected(self, offset):
+        job = self.selected_job()
+        if job is not None:
+            self.job_queue.move(job, offset)
+
+    def raise_selected_priority(self):
+        job = self.selected_job()
+        if job is not None:
+            self.job_queue.set_priority(job, job.priority + 1)
+
+    def toggle_pause_selected(self):
+        job = self.selected_job()
+        if job is None:
+            return
+        if job.state == DownloadJob.PAUSED:
+            self.job_queue.resume(job)
+        else:
+            self.job_queue.pause(job)
+
+    def limit_selected_bandwidth(self):
+        job = self.selected_job()
+        if job is None:
+            return
+        text, ok = QInputDialog.getText(self, "Limitar Banda",
+                                        f"Banda máxima de \"{job.title}\" (ex: 500K, 1M, ilimitado):")
+        if not ok:
+            return
+        try:
+            self.job_queue.set_job_bandwidth_limit(job, parse_rate(text))
+        except ValueError as e:
+            QMessageBox.warning(self, "Limitar Banda", str(e))
+
+    def cancel_selected(self):
+        job = self.selected_job()
+        if job is not None:
+            self.job_queue.cancel(job)
@@ -0,0 +1,347 @@
+"""
+Política de novas tentativas para as extrações.
+
+Os erros são classificados pela mensagem:
+
+    transient    falhas de rede passageiras (timeout, conexão, HTTP 5xx)
+    throttled    bloqueio pelo servidor remoto (HTTP 429/403, "not a bot")
+    unavailable  o vídeo não existe ou não pode ser baixado (privado, removido...)
+    fatal        erros que não mudam com o tempo (URL inválida, ffmpeg, disco)
+
+Cada classe tem seu limite de tentativas e seu backoff exponencial com
+jitter. O que esgota as tentativas vai para a lista de falhas permanentes
+(DeadLetterList), gravada em disco e reenviada em lote depois, pela linha
+de comando (cli.py --retry-dead-letters) ou pelo daemon
+(extraction_daemon.py dead-letters --retry).
+"""
+import os
+import re
+import json
+import time
+import random
+import secrets
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from concurrency_controller import is_throttling_error
+
+TRANSIENT = 'transient'
+THROTTLED = 'throttled'
+UNAVAILABLE = 'unavailable'
+FATAL = 'fatal'
+
+ERROR_CLASS_LABELS = {
+    TRANSIENT: "temporário",
+    THROTTLED: "bloqueio",
+    UNAVAILABLE: "indisponível",
+    FATAL: "fatal",
+}
+
+UNAVAILABLE_PATTERN = re.compile(
+    r"video unavailable|private video|has been removed|no longer available|not available in your country"
+    r"|members.only|join this channel|confirm your age|age.restricted|copyright|premieres in"
+    r"|live event will begin|account .* terminated|\b(404|410)\b|does not exist", re.IGNORECASE)
+
+FATAL_PATTERN = re.compile(
+    r"unsupported url|is not a valid url|no such file|no space left|permission denied|ffmpeg|ffprobe"
+    r"|postprocessing|requested format is not available", re.IGNORECASE)
+
+TRANSIENT_PATTERN = re.compile(
+    r"timed? ?out|connection (reset|refused|aborted)|temporary failure|name resolution|network is unreachable"
+    r"|remote end closed|incomplete ?read|\b5\d\d\b|unable to download|ssl|eof occurred|broken pipe",
+    re.IGNORECASE)
+
+# Mensagens do yt-dlp no formato "[extrator] id_do_video: ..."
+_TRACK_ID_PATTERN = re.compile(r"\[([\w:]+)\] ([\w-]+): ")
+
+DEAD_LETTERS_FILE = os.path.join(os.path.expanduser("~"), ".youtube_audio_extractor", "dead_letters.jsonl")
+
+
+def classify_error(error):
+    """
+    Classifica uma mensagem de erro (ou exceção).
+
+    Erros sem padrão conhecido contam como temporários: tentar de novo
+    custa pouco e cobre falhas de rede com mensagens inesperadas.
+
+    Returns:
+        str: TRANSIENT, THROTTLED, UNAVAILABLE ou FATAL
+    """
+    text = str(error)
+    if is_throttling_error(text):
+        return THROTTLED
+    if UNAVAILABLE_PATTERN.search(text):
+        return UNAVAILABLE
+    if FATAL_PATTERN.search(text):
+        return FATAL
+    return TRANSIENT
+
+
+def failed_track(error):
+    """
+    Identifica o vídeo citado numa mensagem de erro do yt-dlp.
+
+    Returns:
+        tuple: (extrator, id do vídeo) ou None
+    """
+    match = _TRACK_ID_PATTERN.search(str(error))
+    return (match.group(1).split(':')[0].lower(), match.group(2)) if match else None
+
+
+class RetryRule:
+    """Limite de tentativas e backoff de uma classe de erro."""
+
+    def __init__(self, max_retries, base_delay=1.0, max_delay=60.0, multiplier=2.0, jitter=0.5):
+        """
+        Args:
+            max_retries (int): Novas tentativas permitidas (0 = nenhuma)
+            base_delay (float): Espera antes da primeira nova tentativa, em segundos
+            max_delay (float): Espera máxima, em segundos
+            multiplier (float): Fator de crescimento da espera a cada tentativa
+            jitter (float): Fração da espera sorteada (0 = sem jitter, 1 = jitter total)
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+
+
+DEFAULT_RULES = {
+    TRANSIENT: RetryRule(4, base_delay=2.0, max_delay=60.0),
+    THROTTLED: RetryRule(5, base_delay=30.0, max_delay=600.0),
+    UNAVAILABLE: RetryRule(0),
+    FATAL: RetryRule(0),
+}
+
+
+class RetryPolicy:
+    """Decide se e quando uma extração que falhou deve ser tentada de novo."""
+
+    def __init__(self, rules=None, sleep=time.sleep, rng=random.random):
+        """
+        Args:
+            rules (dict): Classe de erro -> RetryRule; as ausentes usam DEFAULT_RULES
+            sleep (callable): Função de espera (substituível em testes)
+            rng (callable): Gerador de números em [0, 1) para o jitter
+        """
+        self.rules = dict(DEFAULT_RULES, **(rules or {}))
+        self.sleep = sleep
+        self.rng = rng
+
+    @classmethod
+    def disabled(cls):
+        """Política sem novas tentativas: toda falha é permanente."""
+        return cls({error_class: RetryRule(0) for error_class in DEFAULT_RULES})
+
+    def max_retries(self, error_class):
+        return self.rules[error_class].max_retries
+
+    def should_retry(self, error_class, attempt):
+        """
+        Args:
+            error_class (str): Classe do erro (ver classify_error)
+            attempt (int): Número de falhas até agora (1 na primeira)
+        """
+        return attempt <= self.rules[error_class].max_retries
+
+    def delay(self, error_class, attempt):
+        """Espera antes da nova tentativa: exponencial, limitada e com jitter."""
+        rule = self.rules[error_class]
+        delay = min(rule.max_delay, rule.base_delay * rule.multiplier ** (attempt - 1))
+        return delay * (1 - rule.jitter * self.rng())
+
+    def wait(self, delay, control=None):
+        """Espera `delay` segundos; com `control`, pausa e cancelamento interrompem a espera."""
+        while delay > 0:
+            if control is not None:
+                control.checkpoint()
+            step = min(delay, 0.5)
+            self.sleep(step)
+            delay -= step
+        if control is not None:
+            control.checkpoint()
+
+
+class DeadLetterList:
+    """
+    Falhas permanentes gravadas num arquivo JSON Lines, para reenvio em lote.
+
+    Cada entrada guarda a URL, o erro, a classe, o número de tentativas e
+    as opções da extração original (formato, qualidade, diretório...).
+
+    O arquivo só recebe linhas novas: uma entrada por falha e uma linha
+    {"taken": [ids]} por reenvio; a leitura reaplica as linhas em ordem.
+    Interface, daemon e linha de comando podem usar o mesmo arquivo: as
+    escritas passam por um lock entre processos (arquivo .lock ao lado), e
+    o arquivo é compactado quando as linhas obsoletas passam das válidas.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): Arquivo JSON Lines. Se None, usa DEAD_LETTERS_FILE
+        """
+        self.path = path or DEAD_LETTERS_FILE
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        """Lock entre threads e entre processos."""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + '.lock', 'a+b') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    else:
+                        lock_file.seek(0)
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _load(self):
+        """
+        Returns:
+            tuple: (entradas válidas, quantidade de linhas do arquivo)
+        """
+        entries = {}  # url -> entrada; uma URL aparece uma vez só
+        lines = 0
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Linha cortada por um processo encerrado no meio da escrita
+                        continue
+                    if 'taken' in record:
+                        taken = set(record['taken'])
+                        entries = {url: e for url, e in entries.items() if e['id'] not in taken}
+                    else:
+                        # A falha mais recente substitui a anterior e vai para o fim
+                        entries.pop(record['url'], None)
+                        entries[record['url']] = record
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Erro ao ler a lista de falhas {self.path}: {e}")
+        return list(entries.values()), lines
+
+    def _append(self, record):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def _compact(self, entries, lines):
+        if lines <= 2 * len(entries) + 64:
+            return
+        fd, temp_path = tempfile.mkstemp(prefix='.dead_letters.', suffix='.tmp', dir=os.path.dirname(self.path))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def add(self, url, error, error_class, attempts, options=None, title=None, playlist_url=None):
+        """
+        Registra uma falha permanente.
+
+        Args:
+            url (str): URL do vídeo ou playlist que falhou
+            error (str): Última mensagem de erro
+            error_class (str): Classe do erro
+            attempts (int): Tentativas feitas
+            options (dict): Argumentos de extract_audio para o reenvio
+            title (str): Título, se conhecido
+            playlist_url (str): Playlist de origem, quando a falha é de uma faixa
+
+        Returns:
+            dict: A entrada registrada
+        """
+        entry = {
+            'id': secrets.token_hex(4),
+            'url': url,
+            'title': title,
+            'playlist_url': playlist_url,
+            'error': str(error),
+            'error_class': error_class,
+            'attempts': attempts,
+            'time': time.time(),
+            'options': dict(options or {}),
+        }
+        try:
+            with self._locked():
+                self._append(entry)
+        except OSError as e:
+            print(f"Erro ao gravar a lista de falhas {self.path}: {e}")
+        return entry
+
+    def entries(self):
+        with self._lock:
+            return self._load()[0]
+
+    def take(self, ids=None):
+        """
+        Remove e retorna entradas para reenvio.
+
+        Args:
+            ids (list): Ids das entradas; se None, todas
+
+        Returns:
+            list: As entradas removidas
+        """
+        try:
+            with self._locked():
+                entries, lines = self._load()
+                taken = [e for e in entries if ids is None or e['id'] in ids]
+                if taken:
+                    self._append({'taken': [e['id'] for e in taken]})
+                    self._compact([e for e in entries if e not in taken], lines + 1)
+                return taken
+        except OSError as e:
+            print(f"Erro ao gravar a lista de falhas {self.path}: {e}")
+            return []
+
+    def restore(self, entries):
+        """
+        Devolve entradas retiradas por take() cujo reenvio não terminou
+        (ex: lote interrompido). Uma URL que já voltou à lista com uma falha
+        nova fica com ela.
+
+        Args:
+            entries (list): Entradas retornadas por take()
+
+        Returns:
+            int: Quantidade de entradas devolvidas
+        """
+        try:
+            with self._locked():
+                current = {e['url'] for e in self._load()[0]}
+                restored = [e for e in entries if e['url'] not in current]
+                for entry in restored:
+                    self._append(entry)
+                return len(restored)
+        except OSError as e:
+            print(f"Erro ao gravar a lista de falhas {self.path}: {e}")
+            return 0
+
+    def clear(self):
+        return len(self.take())
@@ -0,0 +1,246 @@
+"""
+Download segmentado de um único stream grande (ex: o áudio de vídeos de horas).
+
+O servidor limita a vazão por conexão, então um stream único usa só uma
+fração do link. Aqui o arquivo é dividido em faixas de bytes baixadas em
+paralelo (requisições HTTP Range), cada uma num arquivo '<nome>.<tamanho>.segN':
+
+    - cada resposta precisa ser 206 com o Content-Range pedido e trazer
+      exatamente os bytes pedidos; senão a requisição é repetida;
+    - cada segmento completo tem o tamanho conferido, assim como o arquivo
+      remontado (em ordem) no fim;
+    - numa pausa os segmentos ficam no disco e a retomada continua cada um
+      do ponto onde parou.
+
+O progresso é informado no formato dos progress_hooks do yt-dlp, então
+pausa/cancelamento, barra de progresso e limite de banda continuam valendo.
+"""
+import os
+import time
+import shutil
+import threading
+import http.client
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+DEFAULT_CONNECTIONS = 4
+MIN_SEGMENTED_SIZE = 16 * 1024 * 1024   # streams menores não compensam o custo das conexões extras
+CHUNK_SIZE = 10 * 1024 * 1024           # tamanho máximo de cada requisição (o YouTube limita pedidos maiores)
+READ_SIZE = 64 * 1024
+SEGMENT_RETRIES = 3
+
+
+class SegmentError(Exception):
+    """Um segmento não pôde ser baixado ou veio com o tamanho errado."""
+
+
+class _Aborted(Exception):
+    """Outro segmento falhou; este para sem baixar mais nada."""
+
+
+def _request(url, http_headers, start, end):
+    headers = dict(http_headers or {})
+    headers['Range'] = f"bytes={start}-{end}"
+    return urllib.request.Request(url, headers=headers)
+
+
+def probe_size(url, http_headers=None, timeout=30):
+    """
+    Descobre o tamanho do stream e se o servidor aceita requisições Range.
+
+    Returns:
+        int: Tamanho total em bytes, ou None se o servidor não aceita Range
+    """
+    try:
+        with urllib.request.urlopen(_request(url, http_headers, 0, 0), timeout=timeout) as response:
+            content_range = response.headers.get('Content-Range', '')
+            if response.status != 206 or '/' not in content_range:
+                return None
+            total = content_range.rsplit('/', 1)[1]
+            return int(total) if total.isdigit() else None
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+
+def plan_segments(total_size, connections):
+    """
+    Divide [0, total_size) em até `connections` faixas contíguas.
+
+    Returns:
+        list: Tuplas (início, fim) com o fim inclusivo, como no cabeçalho Range
+    """
+    count = max(1, min(connections, total_size))
+    size = -(-total_size // count)
+    return [(start, min(total_size, start + size) - 1) for start in range(0, total_size, size)]
+
+
+class SegmentedDownload:
+    """Baixa um arquivo em segmentos paralelos e o remonta em ordem."""
+
+    def __init__(self, url, filename, total_size, connections=DEFAULT_CONNECTIONS, http_headers=None,
+                 progress=None, control=None, chunk_size=CHUNK_SIZE, retries=SEGMENT_RETRIES, timeout=30):
+        """
+        Args:
+            url (str): URL do stream
+            filename (str): Arquivo final
+            total_size (int): Tamanho total em bytes (ver probe_size)
+            connections (int): Conexões paralelas
+            http_headers (dict): Cabeçalhos exigidos pelo servidor (ex: os 'http_headers' do yt-dlp)
+            progress (callable): Recebe dicionários no formato dos progress_hooks do yt-dlp
+            control (JobControl): Registra os segmentos para limpeza num cancelamento
+            chunk_size (int): Tamanho máximo de cada requisição Range
+            retries (int): Novas tentativas de cada requisição
+            timeout (float): Timeout de cada conexão, em segundos
+        """
+        self.url = url
+        self.filename = filename
+        self.total_size = total_size
+        self.connections = max(1, connections)
+        self.http_headers = http_headers
+        self.progress = progress
+        self.control = control
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.timeout = timeout
+
+        self.downloaded = 0
+        self._lock = threading.Lock()
+        self._abort = threading.Event()
+        self._started = None
+
+    def part_path(self, index):
+        # O tamanho no nome evita misturar segmentos de outro stream numa retomada
+        return f"{self.filename}.{self.total_size}.seg{index}"
+
+    @property
+    def assembly_path(self):
+        # Não é o '.part' do yt-dlp, que tentaria continuar um arquivo remontado pela metade
+        return f"{self.filename}.{self.total_size}.assembling"
+
+    def discard(self):
+        """Remove os segmentos e a remontagem incompleta (ex: antes de usar o download normal)."""
+        for index in range(self.connections):
+            for path in (self.part_path(index), self.assembly_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def run(self):
+        """
+        Baixa todos os segmentos e remonta o arquivo final.
+
+        Raises:
+            SegmentError: Se um segmento falhar após as novas tentativas
+        """
+        segments = plan_segments(self.total_size, self.connections)
+        if self.control is not None:
+            for index in range(len(segments)):
+                self.control.track_file(self.part_path(index))
+            self.control.track_file(self.assembly_path)
+
+        # Segmentos já baixados antes de uma pausa contam no progresso
+        self.downloaded = sum(min(os.path.getsize(self.part_path(i)), end - start + 1)
+                              for i, (start, end) in enumerate(segments) if os.path.exists(self.part_path(i)))
+        self._started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=len(segments), thread_name_prefix="segment") as executor:
+            futures = [executor.submit(self._download_segment, index, start, end)
+                       for index, (start, end) in enumerate(segments)]
+            # Pausa/cancelamento (lançados nos hooks) ou falha num segmento param os demais
+            wait(futures, return_when=FIRST_EXCEPTION)
+            if any(future.done() and future.exception() is not None for future in futures):
+                self._abort.set()
+            errors = [future.exception() for future in futures
+                      if future.exception() is not None and not isinstance(future.exception(), _Aborted)]
+            if errors:
+                raise errors[0]
+
+        self._assemble(segments)
+
+    def _download_segment(self, index, start, end):
+        path = self.part_path(index)
+        length = end - start + 1
+        if os.path.exists(path) and os.path.getsize(path) > length:
+            os.remove(path)
+
+        with open(path, 'ab') as f:
+            while f.tell() < length:
+                position = start + f.tell()
+                chunk_end = min(end, position + self.chunk_size - 1)
+                for attempt in range(self.retries + 1):
+                    try:
+                        self._fetch(f, position, chunk_end)
+                        break
+                    except (SegmentError, urllib.error.URLError, http.client.HTTPException, OSError) as e:
+                        # Descarta o que veio dessa requisição e tenta de novo
+                        f.seek(position - start)
+                        f.truncate()
+                        if attempt == self.retries:
+                            raise SegmentError(f"Segmento {index} (bytes {position}-{chunk_end}): {e}")
+                        self._wait_retry(2 ** attempt)
+
+        if os.path.getsize(path) != length:
+            raise SegmentError(f"Segmento {index} com {os.path.getsize(path)} bytes em vez de {length}")
+
+    def _wait_retry(self, delay):
+        # Sem progresso não há hooks: a pausa e o cancelamento são conferidos aqui
+        deadline = time.monotonic() + delay
+        while True:
+            if self.control is not None:
+                self.control.checkpoint()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if self._abort.wait(min(remaining, 0.25)):
+                raise _Aborted()
+
+    def _fetch(self, f, start, end):
+        with urllib.request.urlopen(_request(self.url, self.http_headers, start, end),
+                                    timeout=self.timeout) as response:
+            expected = f"bytes {start}-{end}/"
+            if response.status != 206 or not response.headers.get('Content-Range', '').startswith(expected):
+                raise SegmentError(f"Resposta inesperada ao pedir bytes {start}-{end}: HTTP {response.status} "
+                                   f"{response.headers.get('Content-Range')}")
+            received = 0
+            while True:
+                if self._abort.is_set():
+                    raise _Aborted()
+                block = response.read(READ_SIZE)
+                if not block:
+                    break
+                f.write(block)
+                received += len(block)
+                self._report(len(block))
+            if received != end - start + 1:
+                raise SegmentError(f"Recebidos {received} de {end - start + 1} bytes")
+
+    def _report(self, amount):
+        # Os hooks não são feitos para várias threads: chamadas em série
+        with self._lock:
+            self.downloaded += amount
+            if self.progress is None:
+                return
+            elapsed = time.monotonic() - self._started
+            speed = self.downloaded / elapsed if elapsed > 0 else None
+            self.progress({
+                'status': 'downloading',
+                'filename': self.filename,
+                'downloaded_bytes': self.downloaded,
+                'total_bytes': self.total_size,
+                'elapsed': elapsed,
+                'speed': speed,
+                'eta': (self.total_size - self.downloaded) / speed if speed else None,
+            })
+
+    def _assemble(self, segments):
+        temp_path = self.assembly_path
+        with open(temp_path, 'wb') as out:
+            for index in range(len(segments)):
+                with open(self.part_path(index), 'rb') as part:
+                    shutil.copyfileobj(part, out, 1024 * 1024)
+        if os.path.getsize(temp_path) != self.total_size:
+            raise SegmentError(f"Arquivo remontado com {os.path.getsize(temp_path)} bytes "
+                               f"em vez de {self.total_size}")
+        os.replace(temp_path, self.filename)
+        for index in range(len(segments)):
+            os.remove(self.part_path(index))
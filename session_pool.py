@@ -0,0 +1,197 @@
+"""
+Sessões do yt-dlp reaproveitadas entre itens e tarefas.
+
+Cada `yt_dlp.YoutubeDL(...)` novo refaz a inicialização dos extratores, o
+cookie jar e as conexões HTTP (handshake TLS incluído). O SessionPool
+guarda as instâncias ociosas e as empresta de novo, com os extratores já
+aquecidos (ex: o player do YouTube já baixado) e as conexões keep-alive do
+yt-dlp abertas.
+
+As opções de uma sessão se dividem em dois grupos:
+
+    fixas        definidas no construtor do YoutubeDL (formato, pós-processadores,
+                 quiet...); instâncias só são reaproveitadas com as mesmas opções fixas
+    emprestadas  trocadas a cada empréstimo (LEASED_OPTIONS): hooks, match_filter,
+                 outtmpl, download_archive, noplaylist, playlist_items, extract_flat
+
+Os hooks do yt-dlp são registrados uma vez só na criação; a instância
+recebe hooks intermediários que repassam os eventos aos hooks do
+empréstimo atual.
+"""
+import time
+import threading
+from contextlib import contextmanager
+
+from job_control import JobInterrupted
+
+LEASED_OPTIONS = ('progress_hooks', 'postprocessor_hooks', 'match_filter', 'outtmpl', 'download_archive',
+                  'noplaylist', 'playlist_items', 'extract_flat')
+
+MAX_IDLE = 8             # instâncias ociosas guardadas (uma por download simultâneo basta)
+IDLE_TIMEOUT = 300.0     # instâncias ociosas há mais tempo são fechadas, em segundos
+
+
+class _Session:
+    """Uma instância do YoutubeDL e os hooks do empréstimo atual."""
+
+    def __init__(self, key, fixed_opts):
+        import yt_dlp
+        self.key = key
+        self.progress_hooks = []
+        self.postprocessor_hooks = []
+        self.ydl = yt_dlp.YoutubeDL(dict(fixed_opts, progress_hooks=[self._progress_hook],
+                                         postprocessor_hooks=[self._postprocessor_hook]))
+        self.released_at = None
+
+    def _progress_hook(self, d):
+        for hook in self.progress_hooks:
+            hook(d)
+
+    def _postprocessor_hook(self, d):
+        for hook in self.postprocessor_hooks:
+            hook(d)
+
+    def lease(self, ydl_opts):
+        params = self.ydl.params
+        self.progress_hooks = list(ydl_opts.get('progress_hooks') or [])
+        self.postprocessor_hooks = list(ydl_opts.get('postprocessor_hooks') or [])
+        for option in ('match_filter', 'noplaylist', 'playlist_items', 'extract_flat'):
+            if option in ydl_opts:
+                params[option] = ydl_opts[option]
+            else:
+                params.pop(option, None)
+        # O yt-dlp normaliza o outtmpl e carrega o arquivo de downloads só no construtor
+        params['outtmpl'] = ydl_opts.get('outtmpl') or {}
+        self.ydl._parse_outtmpl()
+        archive = ydl_opts.get('download_archive')
+        params['download_archive'] = archive
+        # Um set vazio também é um arquivo de downloads: é nele que o yt-dlp registra as faixas
+        self.ydl.archive = archive if archive is not None else set()
+        return self.ydl
+
+    def release(self):
+        """Solta os hooks e o arquivo de downloads do empréstimo, que não podem vazar para o próximo."""
+        self.lease({})
+        self.released_at = time.monotonic()
+
+    def close(self):
+        try:
+            self.ydl.close()
+        except Exception as e:
+            print(f"Erro ao fechar sessão do yt-dlp: {e}")
+
+
+def _session_key(ydl_opts):
+    """Chave das opções fixas; opções que não podem ser comparadas impedem o reaproveitamento."""
+    fixed = {key: value for key, value in ydl_opts.items() if key not in LEASED_OPTIONS}
+    try:
+        return repr(sorted(fixed.items())), fixed
+    except TypeError:
+        return None, fixed
+
+
+class SessionPool:
+    """Instâncias do YoutubeDL compartilhadas por todas as extrações de um processo."""
+
+    def __init__(self, max_idle=MAX_IDLE, idle_timeout=IDLE_TIMEOUT):
+        """
+        Args:
+            max_idle (int): Instâncias ociosas guardadas; as excedentes são fechadas
+            idle_timeout (float): Tempo máximo de ociosidade de uma instância, em segundos
+        """
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._idle = []   # sessões livres, da mais antiga para a mais recente
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    @contextmanager
+    def session(self, ydl_opts):
+        """
+        Empresta um YoutubeDL configurado com `ydl_opts`.
+
+        Uso: `with pool.session(ydl_opts) as ydl: ydl.extract_info(...)`. Um
+        arquivo de downloads em disco (download_archive com caminho) usa uma
+        instância descartável, pois o yt-dlp o lê só no construtor.
+        """
+        archive = ydl_opts.get('download_archive')
+        key, fixed = _session_key(ydl_opts)
+        if key is None or (archive is not None and not isinstance(archive, set)):
+            import yt_dlp
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                yield ydl
+            return
+
+        session = self._acquire(key, fixed)
+        reusable = False
+        try:
+            yield session.lease(ydl_opts)
+            reusable = True
+        except JobInterrupted:
+            # Pausa ou cancelamento no meio de um download podem deixar uma conexão pela metade
+            raise
+        except Exception:
+            # Erros comuns (vídeo indisponível, rede) não deixam a instância inconsistente
+            reusable = True
+            raise
+        finally:
+            session.release()
+            if reusable:
+                self._put_back(session)
+            else:
+                session.close()
+
+    def _acquire(self, key, fixed):
+        expired = []
+        session = None
+        with self._lock:
+            now = time.monotonic()
+            expired = [s for s in self._idle if now - s.released_at > self.idle_timeout]
+            self._idle = [s for s in self._idle if s not in expired]
+            # A mais recente primeiro: conexões com menos chance de terem sido fechadas pelo servidor
+            for candidate in reversed(self._idle):
+                if candidate.key == key:
+                    session = candidate
+                    self._idle.remove(candidate)
+                    self.reused += 1
+                    break
+        for stale in expired:
+            stale.close()
+        if session is None:
+            session = _Session(key, fixed)
+            with self._lock:
+                self.created += 1
+        return session
+
+    def _put_back(self, session):
+        with self._lock:
+            self._idle.append(session)
+            excess = self._idle[:-self.max_idle] if len(self._idle) > self.max_idle else []
+            self._idle = self._idle[len(excess):]
+        for old in excess:
+            old.close()
+
+    def close(self):
+        """Fecha as instâncias ociosas (ex: ao encerrar o daemon)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session in idle:
+            session.close()
+
+    def stats(self):
+        with self._lock:
+            return {'created': self.created, 'reused': self.reused, 'idle': len(self._idle)}
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def shared_pool():
+    """Retorna o SessionPool do processo, criado na primeira chamada."""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = SessionPool()
+        return _shared_pool
@@ -2,179 +2,75 @@ import sys
 import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
                              QWidget, QLabel, QLineEdit, QPushButton, QComboBox, 
-                             QProgressBar, QTextEdit, QGroupBox, QGridLayout, 
+                             QProgressBar, QGroupBox, QGridLayout, 
                              QMessageBox, QFileDialog)
-from PyQt5.QtCore import QThread, pyqtSignal, Qt
+from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtGui import QFont, QPixmap
-from integrated_audio_extractor_playlist import extract_audio_from_url
+from log_console import LogConsole, LOG_FILE
+from progress_aggregator import format_progress_state
+from url_resolver import UrlResolver
+from job_queue import DownloadJob, JobQueue
+from extraction_core import extract_audio, is_playlist_info
+from retry_policy import DeadLetterList
 
-class AudioExtractorThread(QThread):
-    progress_signal = pyqtSignal(str)
-    progress_percentage_signal = pyqtSignal(int)  # Novo sinal para progresso em porcentagem
-    finished_signal = pyqtSignal(str, str)
-    error_signal = pyqtSignal(str)
-
-    def __init__(self, url, output_path, format, quality):
-        super().__init__()
+class AudioExtractionJob(DownloadJob):
+    def __init__(self, url, output_path, format, quality, info_dict=None):
+        title = info_dict.get('title') if info_dict else None
+        super().__init__(title or url, kind='video')
         self.url = url
+        self.info_dict = info_dict  # Informações já resolvidas na pré-visualização
         self.output_path = output_path
         self.format = format
         self.quality = quality
 
     def run(self):
-        try:
-            self.progress_signal.emit("Iniciando extração de áudio...")
-            
-            # Usar a função integrada de extração de áudio com callback de progresso
-            result = self.extract_audio_with_progress(
-                url=self.url,
-                output_directory=self.output_path,
-                format=self.format,
-                quality=self.quality
-            )
-            
-            if result['success']:
-                if result['type'] == 'video':
-                    self.finished_signal.emit(result['filename'], result['message'])
-                else:
-                    self.finished_signal.emit(result.get('filename', 'Arquivo'), result['message'])
-            else:
-                self.error_signal.emit(result['error'])
-                
-        except Exception as e:
-            self.error_signal.emit(f"Erro na extração: {str(e)}")
-    
-    def extract_audio_with_progress(self, url, output_directory=None, format='mp3', quality='128K'):
-        """Versão modificada da função de extração com callback de progresso"""
-        import yt_dlp
-        import os
-        from file_manager import FileManager
-        
-        # Inicializar o gerenciador de arquivos
-        file_manager = FileManager(output_directory)
-        
-        try:
-            # Primeiro, obter informações do vídeo sem baixar
-            ydl_opts_info = {'quiet': True}
-            with yt_dlp.YoutubeDL(ydl_opts_info) as ydl:
-                info_dict = ydl.extract_info(url, download=False)
-                
-            # Verificar se é playlist ou vídeo único
-            if info_dict.get('_type') == 'playlist' or ('entries' in info_dict and len(info_dict['entries']) > 1):
-                # Lógica para playlist
-                playlist_title = info_dict.get('title', 'Unknown Playlist')
-                playlist_author = info_dict.get('uploader', 'Unknown')
-                
-                # Criar diretório para a playlist
-                playlist_dir_name = file_manager.sanitize_filename(playlist_title)
-                playlist_path = os.path.join(file_manager.base_directory, playlist_dir_name)
-                os.makedirs(playlist_path, exist_ok=True)
-                
-                def progress_hook(d):
-                    if d['status'] == 'downloading':
-                        percent_str = d.get('_percent_str', 'N/A')
-                        self.progress_signal.emit(f"Baixando: {percent_str}")
-                        
-                        # Extrair porcentagem numérica e emitir sinal
-                        if percent_str != 'N/A' and '%' in percent_str:
-                            try:
-                                percent_value = int(float(percent_str.replace('%', '')))
-                                self.progress_percentage_signal.emit(percent_value)
-                            except (ValueError, TypeError):
-                                pass
-                    elif d['status'] == 'finished':
-                        self.progress_signal.emit("Download concluído, processando...")
-                        self.progress_percentage_signal.emit(100)
-                
-                ydl_opts = {
-                    'format': 'bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': format,
-                        'preferredquality': quality,
-                    }],
-                    'outtmpl': os.path.join(playlist_path, '%(title)s.%(ext)s'),
-                    'noplaylist': False,
-                    'progress_hooks': [progress_hook],
-                }
-                
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([url])
-                
-                return {
-                    'success': True,
-                    'type': 'playlist',
-                    'playlist_title': playlist_title,
-                    'playlist_path': playlist_path,
-                    'message': 'Playlist baixada com sucesso!'
-                }
-            else:
-                # Lógica para vídeo único
-                video_title = info_dict.get('title', 'Unknown Video')
-                video_author = info_dict.get('uploader', 'Unknown')
-                
-                final_filename = file_manager.generate_filename(video_title, format)
-                final_path = os.path.join(file_manager.base_directory, final_filename)
-                
-                def progress_hook(d):
-                    if d['status'] == 'downloading':
-                        percent_str = d.get('_percent_str', 'N/A')
-                        self.progress_signal.emit(f"Baixando: {percent_str}")
-                        
-                        # Extrair porcentagem numérica e emitir sinal
-                        if percent_str != 'N/A' and '%' in percent_str:
-                            try:
-                                percent_value = int(float(percent_str.replace('%', '')))
-                                self.progress_percentage_signal.emit(percent_value)
-                            except (ValueError, TypeError):
-                                pass
-                    elif d['status'] == 'finished':
-                        self.progress_signal.emit("Download concluído, processando...")
-                        self.progress_percentage_signal.emit(100)
-                
-                ydl_opts = {
-                    'format': 'bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': format,
-                        'preferredquality': quality,
-                    }],
-                    'outtmpl': os.path.join(file_manager.base_directory, '%(title)s.%(ext)s'),
-                    'noplaylist': True,
-                    'progress_hooks': [progress_hook],
-                }
-                
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([url])
-                
-                # Renomear o arquivo baixado para o nome padronizado
-                downloaded_files = [f for f in os.listdir(file_manager.base_directory) if f.startswith(video_title) and f.endswith(f'.{format}')]
-                if downloaded_files:
-                    temp_file_path = os.path.join(file_manager.base_directory, downloaded_files[0])
-                    os.rename(temp_file_path, final_path)
-                
-                return {
-                    'success': True,
-                    'type': 'video',
-                    'filename': final_filename,
-                    'file_path': final_path,
-                    'message': 'Áudio extraído com sucesso!'
-                }
-                
-        except Exception as e:
-            return {
-                'success': False,
-                'error': f"Erro na extração: {str(e)}"
-            }
+        self.progress_signal.emit("Iniciando extração de áudio...")
+
+        # O núcleo faz a extração; aqui os callbacks só viram sinais Qt
+        result = extract_audio(
+            self.url,
+            output_directory=self.output_path,
+            format=self.format,
+            quality=self.quality,
+            info_dict=self.info_dict,
+            control=self.control,
+            on_message=self.progress_signal.emit,
+            on_progress=self.progress_state_signal.emit,
+            progress_hooks=[self.bandwidth_hook],
+            dead_letters=DeadLetterList(),
+            circuit_breaker=self.circuit_breaker,
+        )
+
+        if result['success']:
+            name = result['filename'] if result['type'] == 'video' else result['playlist_title']
+            self.finished_signal.emit(name, result['message'])
+        else:
+            self.error_signal.emit(result['error'])
 
 class SingleVideoWindow(QMainWindow):
     # Sinal para voltar ao menu principal
     back_to_menu_requested = pyqtSignal()
     
-    def __init__(self):
+    # Sinal para abrir o painel da fila de downloads
+    queue_panel_requested = pyqtSignal()
+    
+    def __init__(self, job_queue=None):
         super().__init__()
         self.output_directory = ""  # Correção: inicializa o atributo antes de usar
+        # Fila global da aplicação; sozinha, a janela usa uma fila própria
+        self.job_queue = job_queue or JobQueue(max_concurrent=1, parent=self)
+        self.current_job = None
         self.init_ui()
+        
+        # Resolução de URL fora da thread da interface; o resultado é reaproveitado no download
+        self.resolved_url = None
+        self.resolved_info = None
+        self.url_resolver = UrlResolver(parent=self)
+        self.url_resolver.started.connect(self.on_resolve_started)
+        self.url_resolver.resolved.connect(self.on_url_resolved)
+        self.url_resolver.failed.connect(self.on_resolve_failed)
+        self.url_resolver.cancelled.connect(self.on_resolve_cancelled)
+        self.url_input.textChanged.connect(self.on_url_text_changed)
         self.output_directory = os.path.join(os.path.expanduser("~"), "Audios")
         
         # Criar diretório de saída se não existir
@@ -213,6 +109,20 @@ class SingleVideoWindow(QMainWindow):
         self.process_url_button.clicked.connect(self.process_url)
         self.process_url_button.setMinimumHeight(35)
         url_button_layout.addWidget(self.process_url_button)
+        
+        # Indicador de consulta em andamento e botão para cancelá-la
+        self.resolve_spinner = QProgressBar()
+        self.resolve_spinner.setRange(0, 0)  # Animação indeterminada
+        self.resolve_spinner.setTextVisible(False)
+        self.resolve_spinner.setMaximumWidth(120)
+        self.resolve_spinner.setVisible(False)
+        url_button_layout.addWidget(self.resolve_spinner)
+        
+        self.cancel_resolve_button = QPushButton("Cancelar")
+        self.cancel_resolve_button.clicked.connect(self.cancel_process_url)
+        self.cancel_resolve_button.setMinimumHeight(35)
+        self.cancel_resolve_button.setVisible(False)
+        url_button_layout.addWidget(self.cancel_resolve_button)
         url_button_layout.addStretch()
         
         url_layout.addLayout(url_button_layout)
@@ -297,19 +207,32 @@ class SingleVideoWindow(QMainWindow):
         main_layout.addWidget(self.download_button)
         
         # Barra de progresso
+        # Barra de progresso com controles de pausa e cancelamento do download atual
+        progress_layout = QHBoxLayout()
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
         self.progress_bar.setMinimumHeight(25)
-        main_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.progress_bar)
+        
+        self.pause_button = QPushButton("Pausar")
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.pause_button.setVisible(False)
+        progress_layout.addWidget(self.pause_button)
+        
+        self.cancel_download_button = QPushButton("Cancelar")
+        self.cancel_download_button.clicked.connect(self.cancel_download)
+        self.cancel_download_button.setVisible(False)
+        progress_layout.addWidget(self.cancel_download_button)
+        main_layout.addLayout(progress_layout)
         
         # Log de status
         status_label = QLabel("Log de Status:")
         status_label.setStyleSheet("font-weight: bold; margin-top: 10px;")
         main_layout.addWidget(status_label)
         
-        self.status_log = QTextEdit()
+        # Console com número máximo de linhas e inserção em lote
+        self.status_log = LogConsole(max_blocks=1000, log_file=LOG_FILE)
         self.status_log.setMaximumHeight(150)
-        self.status_log.setReadOnly(True)
         self.status_log.setStyleSheet("background-color: #f8f8f8; font-family: monospace;")
         main_layout.addWidget(self.status_log)
         
@@ -359,10 +282,11 @@ class SingleVideoWindow(QMainWindow):
         
         header_layout.addStretch()
         
-        # Espaço para balancear o layout
-        spacer_widget = QWidget()
-        spacer_widget.setMinimumWidth(120)
-        header_layout.addWidget(spacer_widget)
+        # Botão da fila de downloads (também balanceia o layout)
+        self.queue_button = QPushButton("Fila de Downloads")
+        self.queue_button.setMinimumWidth(120)
+        self.queue_button.clicked.connect(self.queue_panel_requested.emit)
+        header_layout.addWidget(self.queue_button)
         
         main_layout.addLayout(header_layout)
 
@@ -426,43 +350,68 @@ class SingleVideoWindow(QMainWindow):
             QMessageBox.warning(self, "Aviso", "Por favor, insira uma URL válida do YouTube.")
             return
         
+        self.url_resolver.resolve_now(url)
+
+    def on_url_text_changed(self, text):
+        """Invalida a consulta anterior e agenda uma nova quando uma URL é colada"""
+        self.resolved_url = None
+        self.resolved_info = None
+        self.download_button.setEnabled(False)
+        
+        url = clean_video_url(text.strip())
+        if "youtube.com" in url or "youtu.be" in url:
+            self.url_resolver.request(url)
+        else:
+            self.url_resolver.cancel()
+
+    def cancel_process_url(self):
+        self.url_resolver.cancel()
+
+    def set_resolving(self, resolving):
+        """Mostra ou esconde o indicador de consulta em andamento"""
+        self.resolve_spinner.setVisible(resolving)
+        self.cancel_resolve_button.setVisible(resolving)
+
+    def on_resolve_started(self, url):
+        self.set_resolving(True)
         self.log_message("Processando URL...")
+
+    def on_resolve_cancelled(self):
+        self.set_resolving(False)
+        self.log_message("Consulta da URL cancelada.")
+
+    def on_resolve_failed(self, url, message):
+        self.set_resolving(False)
+        QMessageBox.critical(self, "Erro", f"Erro ao processar URL: {message}")
+        self.log_message(f"Erro: {message}")
+
+    def on_url_resolved(self, url, info_dict):
+        self.set_resolving(False)
         
-        try:
-            import yt_dlp
-            ydl_opts = {'quiet': True, 'extract_flat': True}
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info_dict = ydl.extract_info(url, download=False)
-                
-                title = info_dict.get('title', 'N/A')
-                author = info_dict.get('uploader', 'N/A')
-                duration = info_dict.get('duration', 0)
-                
-                # Verificar se não é uma playlist
-                is_playlist = info_dict.get('_type') == 'playlist' or \
-                             ('entries' in info_dict and len(info_dict['entries']) > 1)
-                
-                if is_playlist:
-                    QMessageBox.warning(self, "Aviso", "Esta URL parece ser uma playlist. Use a opção 'Baixar Playlist' no menu principal.")
-                    return
-                
-                self.title_label.setText(title)
-                self.author_label.setText(author)
-                
-                # Formatar duração
-                if duration > 0:
-                    minutes = duration // 60
-                    seconds = duration % 60
-                    self.duration_label.setText(f"{minutes}:{seconds:02d}")
-                else:
-                    self.duration_label.setText("N/A")
-                
-                self.download_button.setEnabled(True)
-                self.log_message("URL processada com sucesso!")
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao processar URL: {str(e)}")
-            self.log_message(f"Erro: {str(e)}")
+        title = info_dict.get('title', 'N/A')
+        author = info_dict.get('uploader', 'N/A')
+        duration = info_dict.get('duration', 0)
+        
+        # Verificar se não é uma playlist
+        if is_playlist_info(info_dict):
+            QMessageBox.warning(self, "Aviso", "Esta URL parece ser uma playlist. Use a opção 'Baixar Playlist' no menu principal.")
+            return
+        
+        self.title_label.setText(title)
+        self.author_label.setText(author)
+        
+        # Formatar duração
+        if duration and duration > 0:
+            minutes = int(duration) // 60
+            seconds = int(duration) % 60
+            self.duration_label.setText(f"{minutes}:{seconds:02d}")
+        else:
+            self.duration_label.setText("N/A")
+        
+        self.resolved_url = url
+        self.resolved_info = info_dict
+        self.download_button.setEnabled(True)
+        self.log_message("URL processada com sucesso!")
 
     def browse_output_directory(self):
         directory = QFileDialog.getExistingDirectory(self, "Selecionar Diretório de Saída")
@@ -480,21 +429,72 @@ class SingleVideoWindow(QMainWindow):
             QMessageBox.warning(self, "Aviso", "Por favor, insira uma URL válida.")
             return
         
-        self.download_button.setEnabled(False)
-        self.progress_bar.setVisible(True)
+        # O botão continua habilitado: novos downloads entram na fila global
         self.progress_bar.setRange(0, 0)  # Indeterminate progress
         
         self.log_message("Iniciando download...")
         
-        self.extractor_thread = AudioExtractorThread(url, self.output_directory, format, quality)
-        self.extractor_thread.progress_signal.connect(self.update_progress)
-        self.extractor_thread.progress_percentage_signal.connect(self.update_progress_percentage)
-        self.extractor_thread.finished_signal.connect(self.download_finished)
-        self.extractor_thread.error_signal.connect(self.download_error)
-        self.extractor_thread.start()
+        # Reaproveitar as informações da pré-visualização, se forem desta mesma URL
+        info_dict = self.resolved_info if url == self.resolved_url else None
+        job = AudioExtractionJob(url, self.output_directory, format, quality, info_dict)
+        self.current_job = job
+        self.last_logged_milestone = None
+        job.progress_signal.connect(lambda message, job=job: self.update_progress(job, message))
+        job.progress_state_signal.connect(lambda state, job=job: self.update_progress_state(job, state))
+        job.finished_signal.connect(lambda name, message, job=job: self.download_finished(job, name, message))
+        job.error_signal.connect(lambda message, job=job: self.download_error(job, message))
+        job.state_changed.connect(self.on_job_state_changed)
+        self.set_download_controls_visible(True)
+        self.job_queue.submit(job)
+        if job.state == DownloadJob.PENDING:
+            self.log_message(f"Adicionado à fila de downloads: {job.title}")
 
-    def update_progress(self, message):
-        self.log_message(message)
+    def set_download_controls_visible(self, visible):
+        self.progress_bar.setVisible(visible)
+        self.pause_button.setVisible(visible)
+        self.cancel_download_button.setVisible(visible)
+        self.pause_button.setText("Pausar")
+    
+    def toggle_pause(self):
+        """Pausa ou retoma o download mais recente desta janela"""
+        job = self.current_job
+        if job is None:
+            return
+        if job.state == DownloadJob.PAUSED:
+            self.job_queue.resume(job)
+        else:
+            self.job_queue.pause(job)
+            self.log_message("Pausando download...")
+    
+    def cancel_download(self):
+        if self.current_job is not None:
+            self.job_queue.cancel(self.current_job)
+            self.log_message("Cancelando download...")
+    
+    def on_job_state_changed(self, job):
+        if job is not self.current_job:
+            return
+        if job.state == DownloadJob.PAUSED:
+            self.pause_button.setText("Retomar")
+        elif job.state in (DownloadJob.PENDING, DownloadJob.RUNNING):
+            self.pause_button.setText("Pausar")
+        elif job.state == DownloadJob.CANCELLED:
+            self.current_job = None
+            self.set_download_controls_visible(False)
+    
+    def update_progress(self, job, message):
+        self.log_message(f"[{job.title}] {message}")
+    
+    def update_progress_state(self, job, state):
+        """Atualiza a interface a partir do estado agregado de progresso"""
+        # A barra acompanha o download mais recente desta janela; os demais aparecem na fila
+        if job is not self.current_job:
+            return
+        if state['status'] == 'finished':
+            self.log_message("Download concluído, processando...")
+        if state['percent'] is not None:
+            self.update_progress_percentage(state['percent'])
+            self.progress_bar.setFormat(format_progress_state(state))
     
     def update_progress_percentage(self, percentage):
         """Atualiza a barra de progresso com porcentagem específica"""
@@ -502,26 +502,32 @@ class SingleVideoWindow(QMainWindow):
         self.progress_bar.setValue(percentage)
         # Atualizar o texto da barra de progresso para mostrar a porcentagem
         self.progress_bar.setFormat(f"{percentage}%")
-        # Só logar em marcos importantes (0%, 25%, 50%, 75%, 100%)
-        if percentage in [0, 25, 50, 75, 100]:
-            self.log_message(f"Progresso: {percentage}%")
+        # Só logar em marcos importantes (0%, 25%, 50%, 75%, 100%); como as
+        # atualizações são agregadas, um marco pode ser ultrapassado sem ser visto
+        milestone = percentage // 25 * 25
+        if milestone != self.last_logged_milestone:
+            self.last_logged_milestone = milestone
+            self.log_message(f"Progresso: {milestone}%")
 
-    def download_finished(self, filename, message):
+    def download_finished(self, job, filename, message):
         self.log_message(f"{message} - {filename}")
-        self.progress_bar.setVisible(False)
-        self.download_button.setEnabled(True)
-        # Limpar o campo de URL após o download ser concluído
-        self.url_input.clear()
+        if job is self.current_job:
+            self.current_job = None
+            self.set_download_controls_visible(False)
+        # Limpar o campo de URL se ainda mostrar a URL deste download
+        if clean_video_url(self.url_input.text().strip()) == job.url:
+            self.url_input.clear()
         QMessageBox.information(self, "Sucesso", f"Vídeo baixado com sucesso!\\nArquivo: {filename}")
 
-    def download_error(self, error_message):
+    def download_error(self, job, error_message):
         self.log_message(f"Erro: {error_message}")
-        self.progress_bar.setVisible(False)
-        self.download_button.setEnabled(True)
+        if job is self.current_job:
+            self.current_job = None
+            self.set_download_controls_visible(False)
         QMessageBox.critical(self, "Erro", f"Erro no download:\\n{error_message}")
 
     def log_message(self, message):
-        self.status_log.append(f"[{self.get_timestamp()}] {message}")
+        self.status_log.log(f"[{self.get_timestamp()}] {message}")
 
     def get_timestamp(self):
         from datetime import datetime
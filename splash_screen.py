@@ -1,7 +1,7 @@
 import sys
 import os
 from PyQt5.QtWidgets import QWidget, QApplication, QLabel, QVBoxLayout, QProgressBar
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPixmap, QFont
 
 class SplashScreen(QWidget):
@@ -16,11 +16,6 @@ class SplashScreen(QWidget):
         
         # UI
         self.setup_ui()
-        
-        # Timer de carregamento
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_progress)
-        self.progress_value = 0
 
     def center_on_screen(self):
         screen = QApplication.primaryScreen().geometry()
@@ -101,29 +96,23 @@ class SplashScreen(QWidget):
             }           
         """)
 
-    def start_loading(self):
-        self.timer.start(50)
+    def set_stage(self, text, index, total):
+        """Mostra a etapa de inicialização em andamento (chamado pelo StartupLoader)"""
+        self.progress_bar.setValue(int(index * 100 / total) if total else 0)
+        self.status_label.setText(text)
 
-    def update_progress(self):
-        self.progress_value += 2
-        if self.progress_value <= 100:
-            self.progress_bar.setValue(self.progress_value)
-            if self.progress_value < 30:
-                self.status_label.setText("Carregando módulos...")
-            elif self.progress_value < 60:
-                self.status_label.setText("Inicializando interface...")
-            elif self.progress_value < 90:
-                self.status_label.setText("Preparando sistema...")
-            else:
-                self.status_label.setText("Quase pronto...")
-        else:
-            self.timer.stop()
-            self.status_label.setText("Sistema carregado!")
-            QTimer.singleShot(500, self.close)
+    def finish(self):
+        self.progress_bar.setValue(100)
+        self.status_label.setText("Sistema carregado!")
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     splash = SplashScreen()
     splash.show()
-    splash.start_loading()
+    
+    from startup_tasks import StartupLoader
+    loader = StartupLoader()
+    loader.stage_started.connect(splash.set_stage)
+    loader.ready.connect(lambda report: (print(report['timings']), splash.finish(), splash.close()))
+    loader.start()
     sys.exit(app.exec_())
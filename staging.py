@@ -0,0 +1,153 @@
+import os
+import errno
+import shutil
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+
+# Diretórios em uso por jobs ativos; o coletor de artefatos não toca neles
+_active_paths = {}
+_active_lock = threading.Lock()
+
+
+def register_active_path(path):
+    """Marca um diretório como em uso por um job ativo."""
+    path = os.path.abspath(path)
+    with _active_lock:
+        _active_paths[path] = _active_paths.get(path, 0) + 1
+
+
+def release_active_path(path):
+    """Libera um diretório registrado com register_active_path."""
+    path = os.path.abspath(path)
+    with _active_lock:
+        count = _active_paths.get(path, 0) - 1
+        if count > 0:
+            _active_paths[path] = count
+        else:
+            _active_paths.pop(path, None)
+
+
+def active_paths():
+    """Retorna os diretórios atualmente em uso por jobs."""
+    with _active_lock:
+        return list(_active_paths)
+
+
+@contextmanager
+def active_job(path):
+    """Mantém o diretório registrado como ativo durante o bloco `with`."""
+    register_active_path(path)
+    try:
+        yield path
+    finally:
+        release_active_path(path)
+
+
+def atomic_move(source, destination):
+    """
+    Move um arquivo para o destino de forma atômica, criando o diretório
+    do destino se preciso.
+
+    No mesmo sistema de arquivos é apenas um os.replace. Entre sistemas de
+    arquivos diferentes (ex: tmpfs -> disco de rede), o arquivo é copiado
+    para um nome temporário oculto ao lado do destino e só então renomeado,
+    de modo que o destino nunca fica visível pela metade.
+
+    Args:
+        source (str): Caminho do arquivo pronto
+        destination (str): Caminho final
+
+    Returns:
+        str: Caminho final
+    """
+    directory = os.path.dirname(destination)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    try:
+        os.replace(source, destination)
+        return destination
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    directory, name = os.path.split(destination)
+    temp_destination = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(source, 'rb') as src, open(temp_destination, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+            dst.flush()
+            os.fsync(dst.fileno())
+        shutil.copystat(source, temp_destination)
+        os.replace(temp_destination, destination)
+    except BaseException:
+        if os.path.exists(temp_destination):
+            os.remove(temp_destination)
+        raise
+
+    os.remove(source)
+    return destination
+
+
+class StagingArea:
+    """
+    Diretório temporário exclusivo de um job, criado dentro do diretório
+    de rascunho (ex: SSD local ou tmpfs).
+
+    Todos os arquivos .part, contêineres intermediários e saídas do FFmpeg
+    ficam aqui; só o arquivo final é movido para a biblioteca. Ao sair do
+    bloco `with`, o diretório é removido, tenha o job dado certo ou não.
+
+    Exemplo:
+        with StagingArea(scratch_directory) as staging:
+            ... baixar para staging.path ...
+            atomic_move(staging.find_output('mp3'), final_path)
+    """
+
+    PREFIX = "yae_stage_"
+
+    def __init__(self, scratch_directory=None):
+        """
+        Args:
+            scratch_directory (str): Diretório de rascunho. Se None, usa o
+                                     diretório temporário do sistema
+        """
+        self.scratch_directory = scratch_directory
+        self.path = None
+
+    def __enter__(self):
+        if self.scratch_directory:
+            os.makedirs(self.scratch_directory, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix=self.PREFIX, dir=self.scratch_directory)
+        register_active_path(self.path)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+        return False
+
+    def cleanup(self):
+        """Remove o diretório de staging e tudo o que restou nele."""
+        if self.path is None:
+            return
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path, ignore_errors=True)
+        release_active_path(self.path)
+        self.path = None
+
+    def find_output(self, audio_format):
+        """
+        Localiza o arquivo final produzido no staging.
+
+        Args:
+            audio_format (str): Extensão esperada (mp3, flac, ...)
+
+        Returns:
+            str: Caminho do arquivo ou None se não encontrado
+        """
+        outputs = [name for name in os.listdir(self.path) if name.endswith(f".{audio_format}")]
+        if not outputs:
+            return None
+        outputs.sort(key=lambda name: os.path.getmtime(os.path.join(self.path, name)))
+        return os.path.join(self.path, outputs[-1])
@@ -0,0 +1,131 @@
+"""
+Mede o tempo até o primeiro quadro (time-to-first-paint) da aplicação.
+
+Cada medição inicia um processo Python novo, cria a aplicação e anota o
+momento do primeiro evento de pintura da splash screen. O modo `eager`
+reproduz a inicialização antiga (yt-dlp importado e todas as janelas
+construídas antes do primeiro quadro) para comparação com o modo `lazy`
+atual.
+
+Uso:
+    python startup_benchmark.py --runs 5
+    python startup_benchmark.py --offscreen   # sem display (ex: CI)
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+CHILD_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QEvent, QTimer
+
+qt_app = QApplication(sys.argv)
+
+if {eager!r}:
+    import preload
+    preload.import_yt_dlp()
+
+from app import YouTubeAudioExtractorApp
+youtube_app = YouTubeAudioExtractorApp()
+
+if {eager!r}:
+    youtube_app.single_video_window
+    youtube_app.playlist_window
+    youtube_app.queue_panel
+
+class FirstPaintFilter(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            print("FIRST_PAINT", flush=True)
+            QTimer.singleShot(0, qt_app.quit)
+        return False
+
+first_paint_filter = FirstPaintFilter()
+youtube_app.splash.installEventFilter(first_paint_filter)
+youtube_app.run()
+qt_app.exec_()
+"""
+
+
+def measure_once(mode, timeout=60, env=None):
+    """
+    Executa uma inicialização e mede o tempo até o primeiro quadro.
+
+    Args:
+        mode (str): 'lazy' (inicialização atual) ou 'eager' (inicialização antiga)
+        timeout (float): Tempo máximo de espera, em segundos
+        env (dict): Variáveis de ambiente do processo filho
+
+    Returns:
+        float: Segundos desde o início do processo até o primeiro quadro,
+               ou None se não houve pintura
+    """
+    script = CHILD_SCRIPT.format(root=ROOT, eager=(mode == 'eager'))
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', script], stdout=subprocess.PIPE,
+                               text=True, env=env)
+    elapsed = None
+    try:
+        for line in process.stdout:
+            if line.strip() == "FIRST_PAINT":
+                elapsed = time.perf_counter() - start
+                break
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    return elapsed
+
+
+def run_benchmark(modes=('eager', 'lazy'), runs=5, offscreen=False):
+    """
+    Mede cada modo `runs` vezes e imprime mínimo e mediana.
+
+    Returns:
+        dict: modo -> lista de tempos em segundos
+    """
+    env = dict(os.environ)
+    if offscreen:
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+
+    results = {}
+    for mode in modes:
+        # A primeira execução aquece o cache de disco e de bytecode
+        measure_once(mode, env=env)
+        times = [t for t in (measure_once(mode, env=env) for _ in range(runs)) if t is not None]
+        results[mode] = times
+        if times:
+            print(f"{mode:>6}: mínimo {min(times) * 1000:.0f} ms, "
+                  f"mediana {statistics.median(times) * 1000:.0f} ms ({len(times)} execuções)")
+        else:
+            print(f"{mode:>6}: nenhuma pintura detectada")
+
+    if results.get('eager') and results.get('lazy'):
+        saved = statistics.median(results['eager']) - statistics.median(results['lazy'])
+        print(f"Ganho da inicialização preguiçosa: {saved * 1000:.0f} ms")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o tempo até o primeiro quadro da aplicação.")
+    parser.add_argument("--runs", type=int, default=5, help="Execuções por modo")
+    parser.add_argument("--mode", choices=['eager', 'lazy', 'both'], default='both',
+                        help="Modo de inicialização a medir")
+    parser.add_argument("--offscreen", action="store_true",
+                        help="Usa a plataforma offscreen do Qt (sem display)")
+    args = parser.parse_args(argv)
+
+    modes = ('eager', 'lazy') if args.mode == 'both' else (args.mode,)
+    results = run_benchmark(modes, runs=args.runs, offscreen=args.offscreen)
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import os
+import time
+import shutil
+import subprocess
+from PyQt5.QtCore import QThread, pyqtSignal
+import preload
+
+
+def detect_ffmpeg():
+    """
+    Procura o FFmpeg no PATH e lê sua versão.
+
+    Returns:
+        dict: {'path': caminho ou None, 'version': primeira linha de `ffmpeg -version` ou None}
+    """
+    path = shutil.which('ffmpeg')
+    if path is None:
+        return {'path': None, 'version': None}
+    try:
+        result = subprocess.run([path, '-version'], capture_output=True, text=True, timeout=10)
+        version = result.stdout.splitlines()[0] if result.stdout else None
+    except (OSError, subprocess.TimeoutExpired):
+        version = None
+    return {'path': path, 'version': version}
+
+
+class StartupLoader(QThread):
+    """
+    Executa as etapas reais de inicialização fora da thread da interface.
+
+    Cada etapa é anunciada por stage_started (para a splash screen) e, ao
+    final, `ready` traz os resultados e o tempo gasto em cada etapa.
+    """
+
+    stage_started = pyqtSignal(str, int, int)  # texto, índice, total
+    stage_finished = pyqtSignal(str, float)    # chave, segundos
+    ready = pyqtSignal(dict)
+
+    STAGES = [
+        ('yt_dlp', "Carregando módulos de extração..."),
+        ('ffmpeg', "Verificando FFmpeg..."),
+        ('daemon', "Conectando ao serviço de downloads..."),
+        ('library', "Indexando a biblioteca..."),
+    ]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.results = {}
+        self.timings = {}
+
+    def run(self):
+        total = len(self.STAGES)
+        for index, (key, label) in enumerate(self.STAGES):
+            self.stage_started.emit(label, index, total)
+            start = time.perf_counter()
+            try:
+                self.results[key] = getattr(self, f"stage_{key}")()
+            except Exception as e:
+                print(f"Erro na etapa de inicialização '{key}': {e}")
+                self.results[key] = None
+            self.timings[key] = time.perf_counter() - start
+            self.stage_finished.emit(key, self.timings[key])
+        self.ready.emit({'results': self.results, 'timings': self.timings})
+
+    def stage_yt_dlp(self):
+        # A importação pode já ter começado em preload.start_preload()
+        return preload.wait_until_loaded()
+
+    def stage_ffmpeg(self):
+        return detect_ffmpeg()
+
+    def stage_library(self):
+        """Indexa a biblioteca e passa a acompanhar suas mudanças (ver library_watcher)."""
+        from file_manager import FileManager
+        from library_watcher import LibraryWatcher
+        watcher = LibraryWatcher(FileManager())
+        watcher.start()
+        return watcher
+
+    def stage_daemon(self):
+        """Conecta ao daemon de extração, iniciando-o se preciso (YAE_NO_DAEMON=1 desativa)."""
+        if os.environ.get('YAE_NO_DAEMON'):
+            return None
+        from extraction_daemon import ensure_daemon
+        try:
+            return ensure_daemon(timeout=10)
+        except (OSError, EOFError, TimeoutError) as e:
+            print(f"Daemon de extração indisponível, usando a fila local: {e}")
+            return None
@@ -0,0 +1,106 @@
+import pytest
+
+from conftest import FakeClock
+from bandwidth_limiter import (BandwidthLimiter, BandwidthSchedule, parse_rate, compact_rate,
+                               IDLE_AFTER, REALLOCATE_EVERY)
+
+
+def make_limiter(global_rate):
+    clock = FakeClock()
+    sleeps = []
+    return BandwidthLimiter(global_rate=global_rate, clock=clock, sleep=sleeps.append), clock, sleeps
+
+
+def report(hook, downloaded):
+    hook({'status': 'downloading', 'filename': 'video', 'downloaded_bytes': downloaded})
+
+
+def shares(limiter):
+    return {key: job['share'] for key, job in limiter.snapshot()['jobs'].items()}
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('2M', 2 * 1024 ** 2),
+    ('500K', 500 * 1024),
+    ('1,5MB/s', 1.5 * 1024 ** 2),
+    ('ilimitado', None),
+    ('0', None),
+    (None, None),
+])
+def test_parse_rate(text, expected):
+    assert parse_rate(text) == expected
+
+
+def test_parse_rate_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_rate('rápido')
+
+
+def test_compact_rate_round_trips():
+    assert compact_rate(parse_rate('2M')) == '2M'
+    assert compact_rate(None) == 'ilimitado'
+
+
+def test_schedule_parses_and_formats():
+    schedule = BandwidthSchedule.parse("22:00-07:00=ilimitado;07:00-22:00=2M")
+    assert schedule.rules == [(22 * 60, 7 * 60, None), (7 * 60, 22 * 60, 2 * 1024 ** 2)]
+    assert str(schedule) == "22:00-07:00=ilimitado;07:00-22:00=2M"
+    with pytest.raises(ValueError):
+        BandwidthSchedule.parse("25:00-07:00=1M")
+
+
+def test_global_rate_is_split_evenly():
+    limiter, _, _ = make_limiter(300.0)
+    with limiter.job('a') as a, limiter.job('b') as b, limiter.job('c') as c:
+        for hook in (a, b, c):
+            report(hook, 1)
+        assert shares(limiter) == pytest.approx({'a': 100.0, 'b': 100.0, 'c': 100.0})
+
+
+def test_capped_job_leftover_is_redistributed():
+    limiter, _, _ = make_limiter(300.0)
+    limiter.set_job_rate('a', 50.0)
+    with limiter.job('a') as a, limiter.job('b') as b, limiter.job('c') as c:
+        for hook in (a, b, c):
+            report(hook, 1)
+        assert shares(limiter) == pytest.approx({'a': 50.0, 'b': 125.0, 'c': 125.0})
+
+        # Limite acima da parcela justa não muda nada
+        limiter.set_job_rate('a', 1000.0)
+        report(a, 2)
+        assert shares(limiter) == pytest.approx({'a': 100.0, 'b': 100.0, 'c': 100.0})
+
+
+def test_idle_job_leaves_the_split_and_gets_a_share_back():
+    limiter, clock, _ = make_limiter(300.0)
+    with limiter.job('a') as a, limiter.job('b') as b, limiter.job('c') as c:
+        for hook in (a, b, c):
+            report(hook, 1)
+        clock.advance(IDLE_AFTER)
+        report(a, 2)
+        report(b, 2)
+        # 'c' (ex: convertendo) não baixa há IDLE_AFTER segundos
+        assert shares(limiter) == pytest.approx({'a': 150.0, 'b': 150.0, 'c': 100.0})
+
+
+def test_unlimited_global_rate_keeps_job_caps():
+    limiter, _, sleeps = make_limiter(None)
+    limiter.set_job_rate('a', 1000.0)
+    with limiter.job('a') as a, limiter.job('b') as b:
+        report(a, 1)
+        report(b, 1)
+        assert shares(limiter) == {'a': 1000.0, 'b': None}
+        before = list(sleeps)
+        report(b, 10 ** 9)
+        assert sleeps == before
+
+
+def test_throttle_sleeps_for_the_debt():
+    limiter, clock, sleeps = make_limiter(1024.0 * 1024)
+    with limiter.job('a') as a:
+        report(a, 1)
+        clock.advance(REALLOCATE_EVERY)
+        # Meio segundo de taxa acumulado; 1.5 MB pedem mais um segundo
+        report(a, 1 + 3 * 512 * 1024)
+    assert sum(sleeps) == pytest.approx(1.0, rel=1e-3)
+    assert max(sleeps) <= 0.2 + 1e-9
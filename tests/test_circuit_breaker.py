@@ -0,0 +1,77 @@
+from conftest import FakeClock
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+THROTTLED = "HTTP Error 429: Too Many Requests"
+
+
+def make_breaker(**kwargs):
+    clock = FakeClock()
+    states = []
+    options = dict(threshold=2, window=60.0, cooldown=10.0, max_cooldown=30.0, probe_successes=2,
+                   on_change=lambda snapshot: states.append(snapshot['state']),
+                   clock=clock, sleep=clock.advance)
+    options.update(kwargs)
+    return CircuitBreaker(**options), clock, states
+
+
+def test_opens_after_threshold_in_window():
+    breaker, clock, states = make_breaker()
+    breaker.record_failure(THROTTLED)
+    clock.advance(61.0)
+    breaker.record_failure(THROTTLED)
+    assert breaker.state == CLOSED
+    breaker.record_failure(THROTTLED)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()['remaining'] == 10.0
+    assert states == [OPEN]
+
+
+def test_other_errors_do_not_count():
+    breaker, _, _ = make_breaker()
+    for _ in range(5):
+        breaker.record_failure("HTTP Error 404: Not Found")
+    assert breaker.state == CLOSED
+
+
+def test_wait_blocks_for_cooldown_then_half_opens():
+    breaker, clock, states = make_breaker()
+    breaker.record_failure(THROTTLED)
+    breaker.record_failure(THROTTLED)
+    opened = clock.now
+    breaker.wait()
+    assert clock.now - opened >= 10.0
+    assert breaker.state == HALF_OPEN
+    assert breaker.snapshot()['probes'] == 1
+    assert states == [OPEN, HALF_OPEN]
+
+
+def test_probe_successes_close():
+    breaker, _, states = make_breaker()
+    breaker.record_failure(THROTTLED)
+    breaker.record_failure(THROTTLED)
+    for _ in range(2):
+        breaker.wait()
+        breaker.record_success()
+    assert breaker.state == CLOSED
+    assert states == [OPEN, HALF_OPEN, CLOSED]
+
+
+def test_failed_probe_reopens_with_longer_cooldown():
+    breaker, _, states = make_breaker()
+    breaker.record_failure(THROTTLED)
+    breaker.record_failure(THROTTLED)
+    for expected in (20.0, 30.0, 30.0):
+        breaker.wait()
+        breaker.record_failure(THROTTLED)
+        assert breaker.state == OPEN
+        assert breaker.cooldown == expected
+    assert states == [OPEN, HALF_OPEN, OPEN, HALF_OPEN, OPEN, HALF_OPEN, OPEN]
+
+
+def test_reset_closes():
+    breaker, _, _ = make_breaker()
+    breaker.record_failure(THROTTLED)
+    breaker.record_failure(THROTTLED)
+    breaker.reset()
+    assert breaker.snapshot()['state'] == CLOSED
+    breaker.wait()
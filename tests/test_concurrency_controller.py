@@ -0,0 +1,110 @@
+from conftest import FakeClock
+from concurrency_controller import ConcurrencyController, is_throttling_error
+
+
+def make_controller(**kwargs):
+    clock = FakeClock()
+    changes = []
+    options = dict(initial=2, max_concurrency=4, window=10.0, probe_after=2,
+                   on_change=lambda limit, decision: changes.append(limit), clock=clock)
+    options.update(kwargs)
+    return ConcurrencyController(**options), clock, changes
+
+
+def download(controller, filename, total):
+    controller.progress_hook({'status': 'downloading', 'filename': filename, 'downloaded_bytes': total})
+
+
+def close_window(controller, clock, throughput):
+    """Fecha a janela atual depois de baixar `throughput` bytes/s nela."""
+    download(controller, f'video-{clock.now}', throughput * controller.window)
+    clock.advance(controller.window)
+    return controller.evaluate()
+
+
+def busy(controller, count):
+    for _ in range(count - controller.active):
+        controller.job_started()
+
+
+def test_is_throttling_error():
+    assert is_throttling_error("HTTP Error 429: Too Many Requests")
+    assert is_throttling_error("HTTP Error 403: Forbidden")
+    assert not is_throttling_error("HTTP Error 404: Not Found")
+    assert not is_throttling_error(None)
+
+
+def test_probes_only_when_all_slots_are_busy():
+    controller, clock, changes = make_controller()
+    busy(controller, 1)
+    assert close_window(controller, clock, 1000) == 2
+    busy(controller, 2)
+    assert close_window(controller, clock, 1000) == 3
+    assert changes == [3]
+
+
+def test_keeps_growing_while_throughput_grows():
+    controller, clock, _ = make_controller()
+    busy(controller, 2)
+    assert close_window(controller, clock, 1000) == 3
+    busy(controller, 3)
+    assert close_window(controller, clock, 1500) == 4
+    # No máximo: não passa do limite configurado
+    busy(controller, 4)
+    assert close_window(controller, clock, 3000) == 4
+
+
+def test_growth_with_free_slots_does_not_increase():
+    controller, clock, _ = make_controller()
+    busy(controller, 2)
+    assert close_window(controller, clock, 1000) == 3
+    # O ganho veio, mas o terceiro slot ficou livre
+    assert close_window(controller, clock, 1500) == 3
+    busy(controller, 3)
+    assert close_window(controller, clock, 1500) == 4
+
+
+def test_plateau_steps_back_and_holds():
+    controller, clock, changes = make_controller()
+    busy(controller, 2)
+    assert close_window(controller, clock, 1000) == 3
+    busy(controller, 3)
+    assert close_window(controller, clock, 1000) == 2
+    # probe_after janelas estáveis antes de sondar de novo
+    assert close_window(controller, clock, 1000) == 2
+    assert close_window(controller, clock, 1000) == 2
+    assert close_window(controller, clock, 1000) == 3
+    assert changes == [3, 2, 3]
+
+
+def test_throttling_halves_immediately_once_per_window():
+    controller, clock, changes = make_controller(initial=4)
+    busy(controller, 4)
+    controller.job_finished("HTTP Error 429: Too Many Requests")
+    assert controller.limit == 2
+    controller.job_finished("HTTP Error 429: Too Many Requests")
+    assert controller.limit == 2
+    clock.advance(10.0)
+    controller.job_finished("HTTP Error 429: Too Many Requests")
+    assert controller.limit == 1
+    assert changes == [2, 1]
+
+
+def test_error_rate_decreases_at_window_end():
+    controller, clock, _ = make_controller(initial=4)
+    busy(controller, 4)
+    controller.job_finished("HTTP Error 404: Not Found")
+    controller.job_finished(None)
+    assert controller.limit == 4
+    clock.advance(10.0)
+    assert controller.evaluate() == 2
+
+
+def test_window_is_evaluated_from_events():
+    controller, clock, changes = make_controller()
+    busy(controller, 2)
+    download(controller, 'a', 5000)
+    clock.advance(10.0)
+    download(controller, 'a', 10000)
+    assert controller.limit == 3
+    assert changes == [3]
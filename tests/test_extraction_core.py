@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip('yt_dlp')
+
+from extraction_core import _select_entries, is_playlist_info
+
+
+def listing(count, consumed):
+    for index in range(1, count + 1):
+        consumed.append(index)
+        yield {'id': f'v{index}', 'playlist_index': index}
+
+
+def select(playlist_items, count=10):
+    consumed = []
+    selected = [entry['playlist_index'] for entry in _select_entries(listing(count, consumed), playlist_items)]
+    return selected, consumed
+
+
+def test_no_selection_yields_everything():
+    assert select(None, 3) == ([1, 2, 3], [1, 2, 3])
+
+
+@pytest.mark.parametrize('playlist_items, expected', [
+    ('1,3', [1, 3]),
+    ('2-4', [2, 3, 4]),
+    ('1:7:3', [1, 4, 7]),
+    ('8:', [8, 9, 10]),
+])
+def test_selection(playlist_items, expected):
+    assert select(playlist_items)[0] == expected
+
+
+def test_listing_stops_after_the_last_requested_item():
+    selected, consumed = select('2,4', count=1000)
+    assert selected == [2, 4]
+    assert consumed == [1, 2, 3, 4, 5]
+
+
+def test_negative_indexes_count_from_the_end():
+    assert select('-1')[0] == [10]
+    assert select('-3:')[0] == [8, 9, 10]
+    assert select('1,-2')[0] == [1, 9]
+
+
+def test_is_playlist_info():
+    assert is_playlist_info({'_type': 'playlist', 'entries': iter([])})
+    assert is_playlist_info({'entries': [{}, {}]})
+    assert not is_playlist_info({'entries': [{}]})
+    assert not is_playlist_info({'id': 'abc'})
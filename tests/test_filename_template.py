@@ -0,0 +1,49 @@
+import pytest
+
+from filename_template import FilenameTemplate, compile_template, MISSING_VALUE
+from file_manager import FileManager
+
+
+def test_render_with_format_spec():
+    template = FilenameTemplate("{playlist_index:03d} - {artist} - {song} [{id}]")
+    assert template.fields == ['playlist_index', 'artist', 'song', 'id']
+    values = {'playlist_index': 7, 'artist': 'Queen', 'song': 'Bohemian Rhapsody', 'id': 'fJ9rUzIMcZQ'}
+    assert template.render(values) == "007 - Queen - Bohemian Rhapsody [fJ9rUzIMcZQ]"
+
+
+def test_missing_and_mismatched_values():
+    template = FilenameTemplate("{playlist_index:03d} - {artist}")
+    assert template.render({'playlist_index': 'x', 'artist': ''}) == f"x - {MISSING_VALUE}"
+
+
+def test_render_many():
+    template = FilenameTemplate("{n:02d}")
+    assert template.render_many([{'n': 1}, {'n': 2}]) == ["01", "02"]
+
+
+@pytest.mark.parametrize('template', ["{}", "{0}", "{a.b}", "{unclosed"])
+def test_invalid_templates(template):
+    with pytest.raises(ValueError):
+        FilenameTemplate(template)
+
+
+def test_compile_template_is_cached():
+    assert compile_template("{title}") is compile_template("{title}")
+
+
+def test_default_filename_is_artist_dash_song(tmp_path):
+    file_manager = FileManager(str(tmp_path))
+    assert file_manager.generate_filename("Queen - Bohemian Rhapsody (Official Video)", 'mp3') == \
+        "Queen - Bohemian Rhapsody.mp3"
+
+
+def test_template_prefers_site_artist(tmp_path):
+    file_manager = FileManager(str(tmp_path), filename_template="{artist} - {song} [{id}]")
+    info_dict = {'id': 'abc', 'artist': 'Queen', 'ext': 'webm'}
+    assert file_manager.generate_filename("Someone - Song", 'mp3', info_dict) == "Queen - Song [abc].mp3"
+
+
+def test_playlist_filenames_number_by_position(tmp_path):
+    file_manager = FileManager(str(tmp_path), filename_template="{playlist_index:02d} {title}")
+    entries = [{'title': 'A'}, None, {'title': 'B', 'playlist_index': 9}]
+    assert file_manager.generate_playlist_filenames(entries, 'mp3') == ["01 A.mp3", "09 B.mp3"]
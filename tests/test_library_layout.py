@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from file_manager import FileManager
+from library_layout import LibraryLayout, plan_migration, migrate_library
+
+
+def sanitize(text):
+    return text.replace('/', '_')
+
+
+def test_flat_layout():
+    assert LibraryLayout().relative_path("Queen - Song.mp3", 'Queen', 'Song', sanitize) == "Queen - Song.mp3"
+
+
+def test_artist_layout():
+    layout = LibraryLayout('artist')
+    assert layout.relative_path("queen - Song.mp3", 'queen', 'Song', sanitize) == \
+        os.path.join('Q', 'queen', "queen - Song.mp3")
+    assert layout.relative_path("Song.mp3", None, 'Song', sanitize) == \
+        os.path.join('D', 'Desconhecido', "Song.mp3")
+    assert layout.relative_path("_x - Song.mp3", '_x', 'Song', sanitize) == \
+        os.path.join('#', '_x', "_x - Song.mp3")
+
+
+def test_hash_layout_is_stable_and_case_insensitive():
+    layout = LibraryLayout('hash')
+    path = layout.relative_path("Queen - Song.mp3", 'Queen', 'Song', sanitize)
+    first, second, name = path.split(os.sep)
+    assert len(first) == len(second) == 2 and int(first + second, 16) >= 0
+    assert name == "Queen - Song.mp3"
+    assert layout.relative_path("queen - song.mp3", 'queen', 'song', sanitize).split(os.sep)[:2] == [first, second]
+
+
+def test_custom_layout_sanitizes_directories():
+    layout = LibraryLayout('{artist}/{song}.{ext}')
+    assert layout.relative_path("AC/DC - Song.mp3", 'AC/DC', 'Song', sanitize) == \
+        os.path.join('AC_DC', "Song.mp3")
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(ValueError):
+        LibraryLayout('{album}/{filename}')
+
+
+def test_get_full_path_does_not_create_directories(tmp_path):
+    file_manager = FileManager(str(tmp_path), layout='artist')
+    path = file_manager.get_full_path("Queen - Song", 'mp3')
+    assert path == os.path.join(str(tmp_path), 'Q', 'Queen', "Queen - Song.mp3")
+    assert os.listdir(str(tmp_path)) == []
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'w').close()
+
+
+def test_migration_keeps_playlist_folders(tmp_path):
+    base = str(tmp_path)
+    touch(os.path.join(base, "Queen - Song.mp3"))
+    touch(os.path.join(base, 'Q', 'Queen', "Queen - Other.mp3"))
+    touch(os.path.join(base, 'Minha Playlist', "Queen - Song.mp3"))
+    touch(os.path.join(base, 'notas.txt'))
+
+    file_manager = FileManager(base)
+    moves = dict(plan_migration(file_manager, LibraryLayout('artist')))
+    assert moves == {
+        os.path.join(base, 'Minha Playlist', "Queen - Song.mp3"):
+            os.path.join(base, 'Minha Playlist', 'Q', 'Queen', "Queen - Song.mp3"),
+        os.path.join(base, "Queen - Song.mp3"): os.path.join(base, 'Q', 'Queen', "Queen - Song.mp3"),
+    }
+
+    migrate_library(file_manager, LibraryLayout('flat'))
+    assert sorted(os.listdir(base)) == ['Minha Playlist', "Queen - Other.mp3", "Queen - Song.mp3", 'notas.txt']
+    assert os.listdir(os.path.join(base, 'Minha Playlist')) == ["Queen - Song.mp3"]
@@ -0,0 +1,117 @@
+import json
+import threading
+
+import pytest
+
+from retry_policy import (RetryPolicy, RetryRule, DeadLetterList, classify_error, failed_track,
+                          TRANSIENT, THROTTLED, UNAVAILABLE, FATAL)
+
+
+@pytest.mark.parametrize('message, expected', [
+    ("HTTP Error 429: Too Many Requests", THROTTLED),
+    ("Sign in to confirm you're not a bot", THROTTLED),
+    ("ERROR: [youtube] abc123: Private video", UNAVAILABLE),
+    ("HTTP Error 404: Not Found", UNAVAILABLE),
+    ("ERROR: Postprocessing: ffprobe and ffmpeg not found", FATAL),
+    ("[Errno 28] No space left on device", FATAL),
+    ("The read operation timed out", TRANSIENT),
+    ("HTTP Error 503: Service Unavailable", TRANSIENT),
+    ("algo completamente inesperado", TRANSIENT),
+])
+def test_classify_error(message, expected):
+    assert classify_error(message) == expected
+
+
+def test_classify_error_accepts_exceptions():
+    assert classify_error(ConnectionResetError("Connection reset by peer")) == TRANSIENT
+
+
+def test_failed_track():
+    assert failed_track("ERROR: [youtube] dQw4w9WgXcQ: Video unavailable") == ('youtube', 'dQw4w9WgXcQ')
+    assert failed_track("ERROR: [youtube:tab] PL123: erro") == ('youtube', 'PL123')
+    assert failed_track("erro sem identificação") is None
+
+
+def test_unknown_errors_get_four_retries():
+    policy = RetryPolicy()
+    error_class = classify_error("falha nunca vista")
+    assert policy.max_retries(error_class) == 4
+    assert all(policy.should_retry(error_class, attempt) for attempt in range(1, 5))
+    assert not policy.should_retry(error_class, 5)
+
+
+def test_permanent_errors_are_not_retried():
+    policy = RetryPolicy()
+    assert not policy.should_retry(UNAVAILABLE, 1)
+    assert not policy.should_retry(FATAL, 1)
+
+
+def test_disabled_policy():
+    policy = RetryPolicy.disabled()
+    assert not any(policy.should_retry(c, 1) for c in (TRANSIENT, THROTTLED, UNAVAILABLE, FATAL))
+
+
+def test_delay_is_exponential_capped_and_jittered():
+    policy = RetryPolicy({TRANSIENT: RetryRule(10, base_delay=1.0, max_delay=5.0, jitter=0.5)}, rng=lambda: 0.0)
+    assert [policy.delay(TRANSIENT, attempt) for attempt in range(1, 6)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+    policy.rng = lambda: 1.0
+    assert policy.delay(TRANSIENT, 2) == 1.0
+
+
+def test_wait_sleeps_in_slices():
+    sleeps = []
+    RetryPolicy(sleep=sleeps.append).wait(1.2)
+    assert sleeps == pytest.approx([0.5, 0.5, 0.2])
+
+
+def test_dead_letters_take_and_restore(tmp_path):
+    dead_letters = DeadLetterList(str(tmp_path / 'dead_letters.jsonl'))
+    dead_letters.add('u1', "erro", TRANSIENT, 5, options={'format': 'mp3'})
+    dead_letters.add('u2', "erro", TRANSIENT, 5)
+    dead_letters.add('u1', "erro novo", FATAL, 1)
+    assert [(e['url'], e['error']) for e in dead_letters.entries()] == [('u2', "erro"), ('u1', "erro novo")]
+
+    taken = dead_letters.take()
+    assert dead_letters.entries() == []
+    # u2 falhou de novo durante o reenvio; a falha nova prevalece
+    dead_letters.add('u2', "falhou de novo", TRANSIENT, 5)
+    assert dead_letters.restore(taken) == 1
+    assert {(e['url'], e['error']) for e in dead_letters.entries()} == {('u2', "falhou de novo"),
+                                                                        ('u1', "erro novo")}
+
+
+def test_dead_letters_concurrent_add_and_take_compacts(tmp_path):
+    path = str(tmp_path / 'dead_letters.jsonl')
+    writers, per_writer = 6, 60
+    taken = []
+    done = threading.Event()
+
+    def add(writer):
+        # Instâncias separadas, como processos diferentes usando o mesmo arquivo
+        dead_letters = DeadLetterList(path)
+        for index in range(per_writer):
+            dead_letters.add(f'https://example.com/{writer}/{index}', "erro", TRANSIENT, 5)
+
+    def take():
+        dead_letters = DeadLetterList(path)
+        while not done.is_set():
+            taken.extend(dead_letters.take())
+        taken.extend(dead_letters.take())
+
+    taker = threading.Thread(target=take)
+    taker.start()
+    threads = [threading.Thread(target=add, args=(writer,)) for writer in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    taker.join()
+
+    urls = [entry['url'] for entry in taken]
+    assert len(urls) == len(set(urls)) == writers * per_writer
+    assert DeadLetterList(path).entries() == []
+    with open(path, encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    # Sem compactação o arquivo teria uma linha por falha e por take()
+    assert len(lines) <= 64 + 1
@@ -0,0 +1,25 @@
+import pytest
+
+from segmented_download import plan_segments
+
+
+@pytest.mark.parametrize('total_size, connections, expected', [
+    (10, 3, [(0, 3), (4, 7), (8, 9)]),
+    (12, 4, [(0, 2), (3, 5), (6, 8), (9, 11)]),
+    (10, 1, [(0, 9)]),
+    (3, 8, [(0, 0), (1, 1), (2, 2)]),
+    (5, 0, [(0, 4)]),
+])
+def test_plan_segments(total_size, connections, expected):
+    assert plan_segments(total_size, connections) == expected
+
+
+@pytest.mark.parametrize('total_size', [1, 7, 1000, 10 ** 9 + 7])
+@pytest.mark.parametrize('connections', [1, 2, 3, 8, 16])
+def test_plan_segments_covers_every_byte_once(total_size, connections):
+    segments = plan_segments(total_size, connections)
+    assert len(segments) <= connections
+    assert segments[0][0] == 0
+    assert segments[-1][1] == total_size - 1
+    for (_, end), (start, _) in zip(segments, segments[1:]):
+        assert start == end + 1
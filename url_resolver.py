@@ -0,0 +1,198 @@
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from session_pool import shared_pool
+
+
+class UrlResolverThread(QThread):
+    """
+    Executa o extract_info do yt-dlp fora da thread da interface.
+
+    No modo de streaming, as entradas de uma playlist são enviadas em lotes
+    pelo entries_signal à medida que as páginas chegam, em vez de esperar a
+    listagem completa.
+    """
+
+    resolved_signal = pyqtSignal(int, str, dict)
+    entries_signal = pyqtSignal(int, list)
+    listing_finished_signal = pyqtSignal(int, int)
+    error_signal = pyqtSignal(int, str, str)
+
+    def __init__(self, request_id, url, ydl_opts, stream_entries=False, batch_size=50):
+        super().__init__()
+        self.request_id = request_id
+        self.url = url
+        self.ydl_opts = ydl_opts
+        self.stream_entries = stream_entries
+        self.batch_size = batch_size
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Marca a consulta como cancelada.
+
+        No modo de streaming a listagem para na próxima entrada. Um
+        extract_info em andamento não pode ser interrompido; seu resultado
+        é simplesmente descartado.
+        """
+        self.cancelled = True
+
+    def run(self):
+        try:
+            # Instância do pool do processo: o download depois reaproveita extratores e conexões
+            with shared_pool().session(self.ydl_opts) as ydl:
+                if self.stream_entries:
+                    self.run_streaming(ydl)
+                    return
+                info_dict = ydl.extract_info(self.url, download=False)
+            if not self.cancelled:
+                self.resolved_signal.emit(self.request_id, self.url, info_dict)
+        except Exception as e:
+            if not self.cancelled:
+                self.error_signal.emit(self.request_id, self.url, str(e))
+
+    def run_streaming(self, ydl):
+        # process=False devolve as entradas como gerador, página por página
+        info_dict = ydl.extract_info(self.url, download=False, process=False)
+        while info_dict.get('_type') in ('url', 'url_transparent') and not self.cancelled:
+            info_dict = ydl.extract_info(info_dict['url'], download=False,
+                                         ie_key=info_dict.get('ie_key'), process=False)
+
+        entries = info_dict.pop('entries', None)
+        if self.cancelled:
+            return
+        self.resolved_signal.emit(self.request_id, self.url, dict(info_dict, entries=[]))
+        if entries is None:
+            self.listing_finished_signal.emit(self.request_id, 0)
+            return
+
+        count = 0
+        batch = []
+        for entry in entries:
+            if self.cancelled:
+                return
+            if not entry:
+                continue
+            count += 1
+            batch.append(dict(entry, playlist_index=count))
+            if len(batch) >= self.batch_size:
+                self.entries_signal.emit(self.request_id, batch)
+                batch = []
+
+        if batch:
+            self.entries_signal.emit(self.request_id, batch)
+        self.listing_finished_signal.emit(self.request_id, count)
+
+
+class UrlResolver(QObject):
+    """
+    Resolve URLs em segundo plano, com debounce e cancelamento.
+
+    Cada nova solicitação cancela a anterior; apenas o resultado da
+    solicitação mais recente chega aos sinais `resolved` e `failed`.
+    """
+
+    started = pyqtSignal(str)
+    resolved = pyqtSignal(str, dict)
+    entries_received = pyqtSignal(list)
+    listing_finished = pyqtSignal(int)
+    failed = pyqtSignal(str, str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, ydl_opts=None, debounce_ms=500, stream_entries=False, parent=None):
+        """
+        Args:
+            ydl_opts (dict): Opções do yt-dlp usadas na consulta
+            debounce_ms (int): Espera após a última solicitação antes de consultar
+            stream_entries (bool): Se True, emite `resolved` com os metadados da
+                                   playlist e depois as entradas em lotes por
+                                   `entries_received`, terminando com `listing_finished`
+            parent (QObject): Objeto pai
+        """
+        super().__init__(parent)
+        self.ydl_opts = ydl_opts or {'quiet': True, 'extract_flat': True}
+        self.stream_entries = stream_entries
+
+        self._request_id = 0
+        self._pending_url = None
+        self._current_thread = None
+        # Threads canceladas continuam vivas até o extract_info retornar
+        self._threads = set()
+
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(debounce_ms)
+        self._debounce_timer.timeout.connect(self._start_pending)
+
+    def is_busy(self):
+        return self._current_thread is not None or self._debounce_timer.isActive()
+
+    def request(self, url):
+        """Agenda a resolução da URL após o intervalo de debounce."""
+        self._cancel_current()
+        self._pending_url = url
+        self._debounce_timer.start()
+
+    def resolve_now(self, url):
+        """Resolve a URL imediatamente, cancelando qualquer consulta anterior."""
+        self._debounce_timer.stop()
+        self._cancel_current()
+        self._pending_url = url
+        self._start_pending()
+
+    def cancel(self):
+        """Cancela a consulta agendada ou em andamento."""
+        was_busy = self.is_busy()
+        self._debounce_timer.stop()
+        self._pending_url = None
+        self._cancel_current()
+        if was_busy:
+            self.cancelled.emit()
+
+    def _cancel_current(self):
+        if self._current_thread is not None:
+            self._current_thread.cancel()
+            self._current_thread = None
+
+    def _start_pending(self):
+        url = self._pending_url
+        self._pending_url = None
+        if not url:
+            return
+
+        self._request_id += 1
+        thread = UrlResolverThread(self._request_id, url, self.ydl_opts, self.stream_entries)
+        thread.resolved_signal.connect(self._on_resolved)
+        thread.entries_signal.connect(self._on_entries)
+        thread.listing_finished_signal.connect(self._on_listing_finished)
+        thread.error_signal.connect(self._on_error)
+        thread.finished.connect(lambda: self._threads.discard(thread))
+        self._threads.add(thread)
+        self._current_thread = thread
+
+        self.started.emit(url)
+        thread.start()
+
+    def _is_current(self, request_id):
+        return request_id == self._request_id and self._current_thread is not None
+
+    def _on_resolved(self, request_id, url, info_dict):
+        if not self._is_current(request_id):
+            return
+        if not self.stream_entries:
+            self._current_thread = None
+        self.resolved.emit(url, info_dict)
+
+    def _on_entries(self, request_id, entries):
+        if self._is_current(request_id):
+            self.entries_received.emit(entries)
+
+    def _on_listing_finished(self, request_id, count):
+        if not self._is_current(request_id):
+            return
+        self._current_thread = None
+        self.listing_finished.emit(count)
+
+    def _on_error(self, request_id, url, message):
+        if not self._is_current(request_id):
+            return
+        self._current_thread = None
+        self.failed.emit(url, message)
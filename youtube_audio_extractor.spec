@@ -28,6 +28,7 @@ hidden_imports = [
     'pycryptodomex',
     'file_manager',
     'integrated_audio_extractor_playlist',
+    'extraction_core',
     'main_menu',
     'single_video_window',
     'playlist_window'
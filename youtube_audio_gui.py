@@ -3,12 +3,14 @@ import os
 import threading
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
                              QWidget, QLabel, QLineEdit, QPushButton, QComboBox, 
-                             QProgressBar, QTextEdit, QGroupBox, QGridLayout, 
+                             QProgressBar, QGroupBox, QGridLayout, 
                              QMessageBox, QFileDialog)
 from PyQt5.QtCore import QThread, pyqtSignal, Qt
 from PyQt5.QtGui import QFont, QPixmap
-import yt_dlp
+from log_console import LogConsole, LOG_FILE
 import subprocess
+from progress_aggregator import format_progress_state
+from extraction_core import extract_audio
 
 class AudioExtractorThread(QThread):
     progress_signal = pyqtSignal(str)
@@ -24,42 +26,33 @@ class AudioExtractorThread(QThread):
         self.quality = quality
 
     def run(self):
-        try:
-            self.progress_signal.emit("Iniciando extração de áudio...")
-            
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': self.format,
-                    'preferredquality': self.quality,
-                }],
-                'outtmpl': f'{self.output_path}/%(title)s.%(ext)s',
-                'noplaylist': True,
-                'progress_hooks': [self.progress_hook],
-            }
+        self.progress_signal.emit("Iniciando extração de áudio...")
 
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info_dict = ydl.extract_info(self.video_url, download=True)
-                filename = f"{info_dict['title']}.{self.format}"
-                self.finished_signal.emit(filename, "Áudio extraído com sucesso!")
-                
-        except Exception as e:
-            self.error_signal.emit(f"Erro na extração: {str(e)}")
+        # O núcleo faz a extração; aqui os callbacks só viram sinais Qt
+        result = extract_audio(
+            self.video_url,
+            output_directory=self.output_path,
+            format=self.format,
+            quality=self.quality,
+            on_message=self.progress_signal.emit,
+            on_progress=self.on_progress,
+        )
+
+        if result['success']:
+            if result['type'] == 'playlist':
+                self.finished_signal.emit(result['playlist_title'], result['message'])
+            else:
+                self.finished_signal.emit(result['filename'], result['message'])
+        else:
+            self.error_signal.emit(result['error'])
 
-    def progress_hook(self, d):
-        if d['status'] == 'downloading':
-            percent_str = d.get('_percent_str', 'N/A')
-            self.progress_signal.emit(f"Baixando: {percent_str}")
-            
-            # Extrair porcentagem numérica e emitir sinal
-            if percent_str != 'N/A' and '%' in percent_str:
-                try:
-                    percent_value = int(float(percent_str.replace('%', '')))
-                    self.progress_percentage_signal.emit(percent_value)
-                except (ValueError, TypeError):
-                    pass
-        elif d['status'] == 'finished':
+    def on_progress(self, state):
+        """Converte os estados do núcleo nos sinais de texto e porcentagem."""
+        if state['status'] == 'downloading':
+            self.progress_signal.emit(f"Baixando: {format_progress_state(state) or 'N/A'}")
+            if state['percent'] is not None:
+                self.progress_percentage_signal.emit(state['percent'])
+        elif state['status'] == 'finished':
             self.progress_signal.emit("Download concluído, processando...")
             self.progress_percentage_signal.emit(100)
 
@@ -174,9 +167,9 @@ class YouTubeAudioExtractorGUI(QMainWindow):
         main_layout.addWidget(self.progress_bar)
         
         # Log de status
-        self.status_log = QTextEdit()
+        # Console com número máximo de linhas e inserção em lote
+        self.status_log = LogConsole(max_blocks=1000, log_file=LOG_FILE)
         self.status_log.setMaximumHeight(150)
-        self.status_log.setReadOnly(True)
         main_layout.addWidget(self.status_log)
 
     def process_url(self):
@@ -188,6 +181,7 @@ class YouTubeAudioExtractorGUI(QMainWindow):
         self.log_message("Processando URL...")
         
         try:
+            import yt_dlp
             ydl_opts = {'quiet': True}
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 info_dict = ydl.extract_info(url, download=False)
@@ -256,7 +250,7 @@ class YouTubeAudioExtractorGUI(QMainWindow):
         QMessageBox.critical(self, "Erro", error_message)
 
     def log_message(self, message):
-        self.status_log.append(f"[{self.get_timestamp()}] {message}")
+        self.status_log.log(f"[{self.get_timestamp()}] {message}")
 
     def get_timestamp(self):
         from datetime import datetime
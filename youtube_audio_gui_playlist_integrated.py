@@ -3,11 +3,13 @@ import os
 import threading
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
                              QWidget, QLabel, QLineEdit, QPushButton, QComboBox, 
-                             QProgressBar, QTextEdit, QGroupBox, QGridLayout, 
+                             QProgressBar, QGroupBox, QGridLayout, 
                              QMessageBox, QFileDialog, QCheckBox)
 from PyQt5.QtCore import QThread, pyqtSignal, Qt
 from PyQt5.QtGui import QFont, QPixmap
-from integrated_audio_extractor_playlist import extract_audio_from_url
+from log_console import LogConsole, LOG_FILE
+from progress_aggregator import format_progress_state
+from extraction_core import extract_audio, fetch_info, is_playlist_info
 
 class AudioExtractorThread(QThread):
     progress_signal = pyqtSignal(str)
@@ -23,150 +25,35 @@ class AudioExtractorThread(QThread):
         self.quality = quality
 
     def run(self):
-        try:
-            self.progress_signal.emit("Iniciando extração de áudio...")
-            
-            # Usar a função integrada de extração de áudio com callback de progresso
-            result = self.extract_audio_with_progress(
-                url=self.url,
-                output_directory=self.output_path,
-                format=self.format,
-                quality=self.quality
-            )
-            
-            if result['success']:
-                if result['type'] == 'playlist':
-                    self.finished_signal.emit(result['playlist_title'], result['message'])
-                else:
-                    self.finished_signal.emit(result['filename'], result['message'])
-            else:
-                self.error_signal.emit(result['error'])
-                
-        except Exception as e:
-            self.error_signal.emit(f"Erro na extração: {str(e)}")
-    
-    def extract_audio_with_progress(self, url, output_directory=None, format='mp3', quality='128K'):
-        """Versão modificada da função de extração com callback de progresso"""
-        import yt_dlp
-        import os
-        from file_manager import FileManager
-        
-        # Inicializar o gerenciador de arquivos
-        file_manager = FileManager(output_directory)
-        
-        try:
-            # Primeiro, obter informações do vídeo sem baixar
-            ydl_opts_info = {'quiet': True}
-            with yt_dlp.YoutubeDL(ydl_opts_info) as ydl:
-                info_dict = ydl.extract_info(url, download=False)
-                
-            # Verificar se é playlist ou vídeo único
-            if info_dict.get('_type') == 'playlist' or ('entries' in info_dict and len(info_dict['entries']) > 1):
-                # Lógica para playlist
-                playlist_title = info_dict.get('title', 'Unknown Playlist')
-                playlist_author = info_dict.get('uploader', 'Unknown')
-                
-                # Criar diretório para a playlist
-                playlist_dir_name = file_manager.sanitize_filename(playlist_title)
-                playlist_path = os.path.join(file_manager.base_directory, playlist_dir_name)
-                os.makedirs(playlist_path, exist_ok=True)
-                
-                def progress_hook(d):
-                    if d['status'] == 'downloading':
-                        percent_str = d.get('_percent_str', 'N/A')
-                        self.progress_signal.emit(f"Baixando: {percent_str}")
-                        
-                        # Extrair porcentagem numérica e emitir sinal
-                        if percent_str != 'N/A' and '%' in percent_str:
-                            try:
-                                percent_value = int(float(percent_str.replace('%', '')))
-                                self.progress_percentage_signal.emit(percent_value)
-                            except (ValueError, TypeError):
-                                pass
-                    elif d['status'] == 'finished':
-                        self.progress_signal.emit("Download concluído, processando...")
-                        self.progress_percentage_signal.emit(100)
-                
-                ydl_opts = {
-                    'format': 'bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': format,
-                        'preferredquality': quality,
-                    }],
-                    'outtmpl': os.path.join(playlist_path, '%(title)s.%(ext)s'),
-                    'noplaylist': False,
-                    'progress_hooks': [progress_hook],
-                }
-                
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([url])
-                
-                return {
-                    'success': True,
-                    'type': 'playlist',
-                    'playlist_title': playlist_title,
-                    'playlist_path': playlist_path,
-                    'message': 'Playlist baixada com sucesso!'
-                }
+        self.progress_signal.emit("Iniciando extração de áudio...")
+
+        # O núcleo faz a extração; aqui os callbacks só viram sinais Qt
+        result = extract_audio(
+            self.url,
+            output_directory=self.output_path,
+            format=self.format,
+            quality=self.quality,
+            on_message=self.progress_signal.emit,
+            on_progress=self.on_progress,
+        )
+
+        if result['success']:
+            if result['type'] == 'playlist':
+                self.finished_signal.emit(result['playlist_title'], result['message'])
             else:
-                # Lógica para vídeo único
-                video_title = info_dict.get('title', 'Unknown Video')
-                video_author = info_dict.get('uploader', 'Unknown')
-                
-                final_filename = file_manager.generate_filename(video_title, format)
-                final_path = os.path.join(file_manager.base_directory, final_filename)
-                
-                def progress_hook(d):
-                    if d['status'] == 'downloading':
-                        percent_str = d.get('_percent_str', 'N/A')
-                        self.progress_signal.emit(f"Baixando: {percent_str}")
-                        
-                        # Extrair porcentagem numérica e emitir sinal
-                        if percent_str != 'N/A' and '%' in percent_str:
-                            try:
-                                percent_value = int(float(percent_str.replace('%', '')))
-                                self.progress_percentage_signal.emit(percent_value)
-                            except (ValueError, TypeError):
-                                pass
-                    elif d['status'] == 'finished':
-                        self.progress_signal.emit("Download concluído, processando...")
-                        self.progress_percentage_signal.emit(100)
-                
-                ydl_opts = {
-                    'format': 'bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': format,
-                        'preferredquality': quality,
-                    }],
-                    'outtmpl': os.path.join(file_manager.base_directory, '%(title)s.%(ext)s'),
-                    'noplaylist': True,
-                    'progress_hooks': [progress_hook],
-                }
-                
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([url])
-                
-                # Renomear o arquivo baixado para o nome padronizado
-                downloaded_files = [f for f in os.listdir(file_manager.base_directory) if f.startswith(video_title) and f.endswith(f'.{format}')]
-                if downloaded_files:
-                    temp_file_path = os.path.join(file_manager.base_directory, downloaded_files[0])
-                    os.rename(temp_file_path, final_path)
-                
-                return {
-                    'success': True,
-                    'type': 'video',
-                    'filename': final_filename,
-                    'file_path': final_path,
-                    'message': 'Áudio extraído com sucesso!'
-                }
-                
-        except Exception as e:
-            return {
-                'success': False,
-                'error': f"Erro na extração: {str(e)}"
-            }
+                self.finished_signal.emit(result['filename'], result['message'])
+        else:
+            self.error_signal.emit(result['error'])
+
+    def on_progress(self, state):
+        """Converte os estados do núcleo nos sinais de texto e porcentagem."""
+        if state['status'] == 'downloading':
+            self.progress_signal.emit(f"Baixando: {format_progress_state(state) or 'N/A'}")
+            if state['percent'] is not None:
+                self.progress_percentage_signal.emit(state['percent'])
+        elif state['status'] == 'finished':
+            self.progress_signal.emit("Download concluído, processando...")
+            self.progress_percentage_signal.emit(100)
 
 class YouTubeAudioExtractorGUI(QMainWindow):
     def __init__(self):
@@ -321,9 +208,9 @@ class YouTubeAudioExtractorGUI(QMainWindow):
         status_label.setStyleSheet("font-weight: bold; margin-top: 10px;")
         main_layout.addWidget(status_label)
         
-        self.status_log = QTextEdit()
+        # Console com número máximo de linhas e inserção em lote
+        self.status_log = LogConsole(max_blocks=1000, log_file=LOG_FILE)
         self.status_log.setMaximumHeight(150)
-        self.status_log.setReadOnly(True)
         self.status_log.setStyleSheet("background-color: #f8f8f8; font-family: monospace;")
         main_layout.addWidget(self.status_log)
 
@@ -340,33 +227,34 @@ class YouTubeAudioExtractorGUI(QMainWindow):
         self.log_message("Processando URL...")
         
         try:
-            import yt_dlp
-            ydl_opts = {'quiet': True, 'extract_flat': True}
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info_dict = ydl.extract_info(url, download=False)
-                
-                title = info_dict.get('title', 'N/A')
-                author = info_dict.get('uploader', 'N/A')
-                
-                # Detectar se é playlist
-                is_playlist = info_dict.get('_type') == 'playlist' or \
-                             ('entries' in info_dict and len(info_dict['entries']) > 1)
-                
-                self.title_label.setText(title)
-                self.author_label.setText(author)
-                
-                if is_playlist:
-                    self.type_label.setText("Playlist")
-                    self.playlist_checkbox.setChecked(True)
-                    entries_count = len(info_dict.get('entries', []))
+            # Só a primeira página da listagem é consultada (ver fetch_info)
+            info_dict = fetch_info(url)
+            
+            title = info_dict.get('title', 'N/A')
+            author = info_dict.get('uploader', 'N/A')
+            
+            self.title_label.setText(title)
+            self.author_label.setText(author)
+            
+            if is_playlist_info(info_dict):
+                # O total vem dos metadados; contar as entradas percorreria a playlist inteira
+                entries = info_dict.get('entries')
+                if hasattr(entries, 'close'):
+                    entries.close()
+                self.type_label.setText("Playlist")
+                self.playlist_checkbox.setChecked(True)
+                entries_count = info_dict.get('playlist_count')
+                if entries_count:
                     self.log_message(f"Playlist detectada com {entries_count} vídeos")
                 else:
-                    self.type_label.setText("Vídeo único")
-                    self.playlist_checkbox.setChecked(False)
-                    self.log_message("Vídeo único detectado")
-                
-                self.download_button.setEnabled(True)
-                self.log_message("URL processada com sucesso!")
+                    self.log_message("Playlist detectada")
+            else:
+                self.type_label.setText("Vídeo único")
+                self.playlist_checkbox.setChecked(False)
+                self.log_message("Vídeo único detectado")
+            
+            self.download_button.setEnabled(True)
+            self.log_message("URL processada com sucesso!")
                 
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao processar URL: {str(e)}")
@@ -434,7 +322,7 @@ class YouTubeAudioExtractorGUI(QMainWindow):
         QMessageBox.critical(self, "Erro", f"Erro no download:\\n{error_message}")
 
     def log_message(self, message):
-        self.status_log.append(f"[{self.get_timestamp()}] {message}")
+        self.status_log.log(f"[{self.get_timestamp()}] {message}")
 
     def get_timestamp(self):
         from datetime import datetime